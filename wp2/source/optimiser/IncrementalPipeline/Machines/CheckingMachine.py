@@ -8,8 +8,11 @@ from IncrementalPipeline.Tools.simple_computations import (
     min_consecutive_distance,
     compute_forbidden_zones
 )
-from gurobipy import GRB, quicksum, Model
+from gurobipy import GRB, Model
+from IncrementalPipeline.Tools.backends import quicksum
 from IncrementalPipeline.Tools.or_functions import add_or_constraints
+from IncrementalPipeline.Tools.formulation import INDICATORS, layer_bounds
+from IncrementalPipeline.Tools.lazy_constraints import add_lazy_disjunction, separate
 
 
 class CheckingMachine(GenericMachine):
@@ -18,144 +21,255 @@ class CheckingMachine(GenericMachine):
 
     This machine expects a list of Piece objects as input
     and does not produce any output.
+
+    If lazy is True, the rules on cuts too close in consecutive layers
+    and on cuts in forbidden zones are left out of the model,
+    and only added when an incumbent violates them, see separate
+    and Tools.lazy_constraints.
     """
 
-    def __init__(self, id: str, current_beam: int = 0):
+    def __init__(self, id: str, current_beam: int = 0,
+                 formulation: str = INDICATORS,
+                 lazy: bool = False):
         super().__init__(id=f"CheckingMachine{id}",
                          input_type=PieceVars,
-                         output_type=None)
+                         output_type=None,
+                         formulation=formulation)
+        self.lazy = lazy
+
+    def reset(self):
+        super().reset()
+        self.lengths_list = []
+        # Variables and constraints of each layer,
+        # those between layer[i - 1] and layer[i] belong to layer i
+        self.layer_objects = dict()
+        # seams[i][j] is the position of the seam after
+        # the first j + 1 pieces of layer i
+        self.seams = dict()
+        # Lazy rules of each layer, when lazy is True,
+        # and how many were added to the model by separate
+        self.lazy_rules = dict()
+        self.n_separated = 0
 
-    def impose_conditions(self, model, input_list: list) -> None:
+    def extend_conditions(self, model, new_input_list: list) -> None:
         """
         Defines the constraints that the pieces must satisfy.
         All pieces must be good.
 
         They must form layers of a beam,
+
+        When extending, only the layers that change are imposed again,
+        the constraints they had are removed from the model first.
         """
-        lengths_list = [piece.length for piece in input_list]
-        input_length = len(lengths_list)
+        if not new_input_list and self.lengths_list:
+            return dict(), []
         max_pieces_per_layer = compute_max_pieces_per_layer()
+        first_changed_layer = len(self.lengths_list) // max_pieces_per_layer
+        removed = []
+        for i in range(first_changed_layer, len(self.layer_objects)):
+            removed.extend(self.layer_objects.pop(i))
+            self.lazy_rules.pop(i, None)
+        if removed:
+            # They must exist in the model before removing them
+            model.update()
+            model.remove(removed)
+
+        self.lengths_list.extend(piece.length for piece in new_input_list)
+        input_length = len(self.lengths_list)
 
         # break the input list into layers
-        layers = [lengths_list[i:i + max_pieces_per_layer]
+        layers = [self.lengths_list[i:i + max_pieces_per_layer]
                   for i in range(0, input_length, max_pieces_per_layer)]
 
+        for i in range(first_changed_layer, len(layers)):
+            self.layer_objects[i] = self.impose_layer_conditions(model, layers, i)
+
+        self.n_inputs = input_length
+        return dict(), []
+
+    def impose_layer_conditions(self, model, layers: list, i: int) -> list:
+        """
+        Imposes the constraints of layer i, and those between
+        layer i - 1 and layer i, returns what was added to the model.
+        """
+        added = []
+        self.lazy_rules[i] = []
+
+        # Positions of the seams, used by all the other constraints
+        added.extend(self.define_seams(model, layers, i))
+
         # Layers never exceed layer_length.
-        self.layers_below_length(model, layers)
+        added.extend(self.layers_below_length(model, layers, i))
 
-        # If one layer is not complete, then the next layer is empty.
-        self.layers_are_complete(model, layers)
+        if i > 0:
+            # If one layer is not complete, then the next layer is empty.
+            added.extend(self.layers_are_complete(model, layers, i - 1))
 
-        # Check that there are no two cuts too close to each other
-        # in two consecutive layers.
-        self.cuts_not_too_close(model, layers)
+            # Check that there are no two cuts too close to each other
+            # in two consecutive layers.
+            added.extend(self.cuts_not_too_close(model, layers, i - 1))
 
         # Check that there are no cuts in the global danger zones
-        self.cuts_not_in_forbidden_zones(model, layers)
+        added.extend(self.cuts_not_in_forbidden_zones(model, layers, i))
 
-        return dict(), []
+        return added
+
+    def define_seams(self, model, layers: list, i: int) -> list:
+        """
+        Defines one variable per prefix of layer i with the position
+        of the seam after it, each one is the previous seam
+        plus the length of one piece.
+        """
+        layer = layers[i]
+        seams = model.addVars(len(layer),
+                              vtype=GRB.CONTINUOUS,
+                              name=f"{self.id} seam[{i}]")
+        constrs = [model.addConstr(seams[0] == layer[0],
+                                   name=f"{self.id} seam[{i}]_0")]
+        constrs.extend(model.addConstr(seams[j] == seams[j - 1] + layer[j],
+                                       name=f"{self.id} seam[{i}]_{j}")
+                       for j in range(1, len(layer)))
+        self.seams[i] = [seams[j] for j in range(len(layer))]
+        return constrs + self.seams[i]
 
-    def layers_below_length(self, model, layers: list):
+    def layers_below_length(self, model, layers: list, i: int) -> list:
         """
-        Each layer must not exceed the layer length.
+        Layer i must not exceed the layer length.
         """
-        for i, layer in enumerate(layers):
-            model.addConstr(
-                quicksum(layer) <= layer_length,
-                name=f"{self.id} layer_length[{i}]"
-            )
+        return [model.addConstr(
+            self.seams[i][-1] <= layer_length,
+            name=f"{self.id} layer_length[{i}]"
+        )]
 
-    def layers_are_complete(self, model, layers: list):
+    def layers_are_complete(self, model, layers: list, i: int) -> list:
         """
-        If a layer is not complete the next layer must be empty.
+        If layer i is not complete the next layer must be empty.
         """
-        n_layers = len(layers)
-        for i in range(n_layers - 1):
-            # Do the reverse, if a layer is not empty,
-            # the previous one must be complete
+        # Do the reverse, if a layer is not empty,
+        # the previous one must be complete
 
-            # Similarly, or if layer[i + 1] is empty,
-            # or layer[i] is complete.
+        # Similarly, or if layer[i + 1] is empty,
+        # or layer[i] is complete.
 
-            upper_layer_empty = (quicksum(layers[i + 1]), '==', 0)
-            lower_layer_complete = (quicksum(layers[i]), '==', layer_length)
+        upper_layer_empty = (self.seams[i + 1][-1], '==', 0)
+        lower_layer_complete = (self.seams[i][-1], '==', layer_length)
 
-            # Add OR constraints for the layers
-            add_or_constraints(
-                model,
-                [
-                    upper_layer_empty,
-                    lower_layer_complete
-                ],
-                name_prefix=f"{self.id} layer_complete[{i}]"
-            )
+        # Add OR constraints for the layers
+        return add_or_constraints(
+            model,
+            [
+                upper_layer_empty,
+                lower_layer_complete
+            ],
+            name_prefix=f"{self.id} layer_complete[{i}]",
+            formulation=self.formulation,
+            bounds=[layer_bounds, layer_bounds]
+        )
 
-    def cuts_not_too_close(self, model, layers: list):
+    def cuts_not_too_close(self, model, layers: list, i: int) -> list:
         """
         Check that there are no two cuts too close to each other
-        in two consecutive layers.
+        in layer i and layer i + 1.
         """
-        for i in range(len(layers) - 1):
-            # Check the cuts in layer[i] and layer[i + 1]
-            for j in range(1, len(layers[i])):
-                # j first pieces in layer[i]
+        added = []
+        # Bounds of the differences and sums of two cut positions
+        difference_bounds = (-layer_length, layer_length)
+        sum_bounds = (0, 2 * layer_length)
+        # Check the cuts in layer[i] and layer[i + 1]
+        for j in range(1, len(layers[i])):
+            # j first pieces in layer[i]
+            # at most all but the last piece
+            # None and all are ignored
+            for k in range(1, len(layers[i + 1])):
+                # k first pieces in layer[i + 1]
                 # at most all but the last piece
-                # None and all are ignored
-                for k in range(1, len(layers[i + 1])):
-                    # k first pieces in layer[i + 1]
-                    # at most all but the last piece
-
-                    # If the cut in layer i + 1 is before the cut in layer i,
-                    cut_lower_before = (quicksum(layers[i + 1][:k]) -
-                                        quicksum(layers[i][:j]),
-                                        '>=',
-                                        min_consecutive_distance)
-                    # If the cut in layer i + 1 is after the cut in layer i,
-                    cut_upper_before = (quicksum(layers[i][:j]) -
-                                        quicksum(layers[i + 1][:k]),
-                                        '>=',
-                                        min_consecutive_distance)
-                    # Both sums are 0
-                    both_sum_zero = (quicksum(layers[i][:j]) +
-                                     quicksum(layers[i + 1][:k]), '==', 0)
-                    # Both sum layer length
-                    both_sum_layer_length = (quicksum(layers[i][:j]) +
-                                             quicksum(layers[i + 1][:k]),
-                                             '==', 2 * layer_length)
-                    # one of these two conditions must hold
-                    add_or_constraints(
-                        model,
-                        [
-                            cut_lower_before,
-                            cut_upper_before,
-                            both_sum_zero,
-                            both_sum_layer_length
-                        ],
-                        name_prefix=f"{self.id} cuts_[{i}]_{j}_{k}"
-                    )
-
-    def cuts_not_in_forbidden_zones(self, model, layers: list):
-        """
-        Check that there are no cuts in the global danger zones.
-        """
-        for i, layer in enumerate(layers):
-            for j in range(1, len(layer) + 1):
-                # Check if the piece is in a forbidden zone
-                forbidden_zones = compute_forbidden_zones()
-                for zone_index, zone in enumerate(forbidden_zones):
-                    cut_before_forbidden_zone = (quicksum(layer[:j]),
-                                                 '<=',
-                                                 zone[0])
-                    cut_after_forbidden_zone = (quicksum(layer[:j]),
-                                                '>=',
-                                                zone[1])
-
-                    # Add OR constraints for the forbidden zones
-                    add_or_constraints(
-                        model,
-                        [
-                            cut_before_forbidden_zone,
-                            cut_after_forbidden_zone
-                        ],
-                        name_prefix=f"{self.id} forbidden_zone_[{i}]_{j}_{zone_index}"
-                    )
+
+                lower_seam = self.seams[i][j - 1]
+                upper_seam = self.seams[i + 1][k - 1]
+                # If the cut in layer i + 1 is before the cut in layer i,
+                cut_lower_before = (upper_seam - lower_seam,
+                                    '>=',
+                                    min_consecutive_distance)
+                # If the cut in layer i + 1 is after the cut in layer i,
+                cut_upper_before = (lower_seam - upper_seam,
+                                    '>=',
+                                    min_consecutive_distance)
+                # Both sums are 0
+                both_sum_zero = (lower_seam + upper_seam, '==', 0)
+                # Both sum layer length
+                both_sum_layer_length = (lower_seam + upper_seam,
+                                         '==', 2 * layer_length)
+                # one of these two conditions must hold
+                added.extend(self.add_rule(
+                    model,
+                    i + 1,
+                    [
+                        cut_lower_before,
+                        cut_upper_before,
+                        both_sum_zero,
+                        both_sum_layer_length
+                    ],
+                    name_prefix=f"{self.id} cuts_[{i}]_{j}_{k}",
+                    bounds=[difference_bounds,
+                            difference_bounds,
+                            sum_bounds,
+                            sum_bounds]
+                ))
+        return added
+
+    def cuts_not_in_forbidden_zones(self, model, layers: list, i: int) -> list:
+        """
+        Check that there are no cuts of layer i in the global danger zones.
+        """
+        added = []
+        forbidden_zones = compute_forbidden_zones()
+        for j in range(1, len(layers[i]) + 1):
+            # Check if the piece is in a forbidden zone
+            seam = self.seams[i][j - 1]
+            for zone_index, zone in enumerate(forbidden_zones):
+                cut_before_forbidden_zone = (seam,
+                                             '<=',
+                                             zone[0])
+                cut_after_forbidden_zone = (seam,
+                                            '>=',
+                                            zone[1])
+
+                # Add OR constraints for the forbidden zones
+                added.extend(self.add_rule(
+                    model,
+                    i,
+                    [
+                        cut_before_forbidden_zone,
+                        cut_after_forbidden_zone
+                    ],
+                    name_prefix=f"{self.id} forbidden_zone_[{i}]_{j}_{zone_index}",
+                    bounds=[layer_bounds, layer_bounds]
+                ))
+        return added
+
+    def add_rule(self, model, i: int, constraints: list,
+                 name_prefix: str, bounds: list) -> list:
+        """
+        Adds the rule (C1) OR (C2) OR ... of layer i, as OR constraints,
+        or only its binaries if the machine is lazy.
+        Returns what was added to the model.
+        """
+        if not self.lazy:
+            return add_or_constraints(model, constraints,
+                                      name_prefix=name_prefix,
+                                      formulation=self.formulation,
+                                      bounds=bounds)
+        rule = add_lazy_disjunction(model, constraints, bounds, name_prefix)
+        self.lazy_rules[i].append(rule)
+        return rule.binaries
+
+    def separate(self, model) -> int:
+        """
+        Inside a MIPSOL callback, adds the lazy rules violated
+        by the new incumbent, returns how many there are.
+        """
+        n_violated = separate(model, [rule
+                                      for rules in self.lazy_rules.values()
+                                      for rule in rules])
+        self.n_separated += n_violated
+        return n_violated
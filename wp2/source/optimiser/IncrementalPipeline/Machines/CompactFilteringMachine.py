@@ -0,0 +1,188 @@
+"""Defines a filtering machine formulated with cumulative keep counts."""
+
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Objects.piece import Piece, create_piece_var_list
+from IncrementalPipeline.Tools.var_keys import register_vars
+from IncrementalPipeline.Tools.formulation import (
+    INDICATORS,
+    board_difference_bounds,
+    add_conditional_constr
+)
+from gurobipy import GRB
+from IncrementalPipeline.Tools.backends import quicksum
+
+
+class CompactFilteringMachine(FilteringMachine):
+    """
+    A filtering machine with the same behaviour as FilteringMachine,
+    the kept pieces are moved to the front of the output list
+    keeping their order, but formulated through cumulative keep counts.
+
+    count[i] is the number of kept pieces before input i, which is
+    the position in the output of input i if it is kept. As pieces only
+    move forward, input i can only go to outputs j <= i, and to
+    j >= i - max_shift if max_shift is given.
+    With max_shift the model is linear in the number of inputs,
+    but a kept piece can have at most max_shift dropped pieces before it.
+    """
+
+    def __init__(self, id: str, max_shift: int = None,
+                 formulation: str = INDICATORS):
+        super().__init__(id=id, formulation=formulation,
+                         id_prefix="CompactFilteringMachine")
+        self.max_shift = max_shift
+
+    def reset(self):
+        super().reset()
+        self.count = dict()
+        self.count_rows = []
+        # Committed empty outputs already in the counts
+        self.n_empty_counted = 0
+
+    def possible_outputs(self, i: int) -> range:
+        """
+        Returns the outputs input i can go to.
+        """
+        if self.max_shift is None:
+            return range(i + 1)
+        return range(max(i - self.max_shift, 0), i + 1)
+
+    def extend_conditions(self, model, new_input_list: list) -> list:
+        """
+        Filters the input list of pieces, dropping the bad ones.
+
+        Only the variables and constraints involving the new inputs
+        are added, as inputs only go to outputs with a lower or equal
+        index, the sums over the old outputs get the new terms
+        through chgCoeff.
+
+        The outputs committed empty since the last extension (see commit)
+        come before the new inputs, they are added to their counts.
+        """
+        if self.n_inputs > 0:
+            # Rows must exist in the model before changing their coefficients
+            model.update()
+
+        n_old = self.n_inputs
+        self.input_list.extend(new_input_list)
+        input_list = self.input_list
+        n = len(input_list)
+        new_indices = range(n_old, n)
+        new_pairs = [(i, j) for i in new_indices for j in self.possible_outputs(i)]
+
+        # keep[i] = 1 if the input is used, 0 if it is dropped
+        keep = model.addVars(new_indices, vtype=GRB.BINARY, name=f"{self.id} keep piece")
+        register_vars(model, keep, self.id, "keep", ('input',))
+        self.keep.update(keep)
+
+        # if piece quality is bad, then keep[i] must be 0
+        for i in new_indices:
+            add_conditional_constr(
+                model,
+                input_list[i].good,
+                0,
+                keep[i], '==', 0,
+                bounds=(0, 1),
+                formulation=self.formulation,
+                name=f"{self.id} good_constraint_{i}"
+            )
+
+        # count[i] is the number of kept pieces before input i
+        count = model.addVars(new_indices, vtype=GRB.CONTINUOUS, name=f"{self.id} count")
+        register_vars(model, count, self.id, "count", ('input',))
+        self.count.update(count)
+        new_empty = self.n_empty_committed - self.n_empty_counted
+        self.n_empty_counted = self.n_empty_committed
+        for i in new_indices:
+            skipped = new_empty if i == n_old else 0
+            if i == 0:
+                self.count_rows.append(model.addConstr(
+                    count[i] == skipped, name=f"{self.id} count_{i}"))
+            else:
+                self.count_rows.append(model.addConstr(
+                    count[i] == self.count[i - 1] + self.keep[i - 1] + skipped,
+                    name=f"{self.id} count_{i}"))
+
+        # define the output variables
+        new_output_list = create_piece_var_list(model, n - n_old, id_prefix=f"{self.id} output ",
+                                                start_index=n_old, machine_id=self.id)
+        self.output_list.extend(new_output_list)
+        output_list = self.output_list
+
+        # input_to_output[i, j] = 1 if input[i] goes to output[j]
+        input_to_output = model.addVars(new_pairs, vtype=GRB.BINARY, name=f"{self.id} input_to_output")
+        register_vars(model, input_to_output, self.id, "input_to_output",
+                      ('input', 'output'))
+        self.input_to_output.update(input_to_output)
+
+        for i, j in new_pairs:
+            output_list[j].conditional_equality(model,
+                                                input_to_output[i, j],
+                                                1,
+                                                input_list[i],
+                                                formulation=self.formulation)
+
+        # A kept input goes to exactly one output, a dropped one to none
+        for i in new_indices:
+            self.one_output_per_input_rows.append(model.addConstr(
+                quicksum(input_to_output[i, j] for j in self.possible_outputs(i)) == keep[i],
+                name=f"{self.id} at most one output per input constraint [{i}]"
+            ))
+
+        # The output of a kept input is its running position count[i]
+        for i in new_indices:
+            add_conditional_constr(
+                model,
+                keep[i],
+                1,
+                quicksum(j * input_to_output[i, j] for j in self.possible_outputs(i)) - count[i],
+                '==', 0,
+                bounds=(-i, i),
+                formulation=self.formulation,
+                name=f"{self.id} output_position_{i}"
+            )
+
+        # An output is filled if one input goes to it, else it has length 0,
+        # as is_output_filled is binary at most one input goes to each output
+        is_output_filled = model.addVars(new_indices, vtype=GRB.BINARY,
+                                         name=f"{self.id} is_output_filled")
+        register_vars(model, is_output_filled, self.id, "is_output_filled",
+                      ('output',))
+        self.is_output_filled.update(is_output_filled)
+        for i, j in new_pairs:
+            if j < n_old:
+                model.chgCoeff(self.output_filled_rows[j], input_to_output[i, j], -1)
+        for j in new_indices:
+            inputs = [i for i in range(j, n) if (i, j) in self.input_to_output]
+            self.output_filled_rows.append(model.addConstr(
+                is_output_filled[j] == quicksum(self.input_to_output[i, j] for i in inputs),
+                name=f"{self.id} output_filled_{j}"
+            ))
+            output_list[j].conditional_equality(
+                model,
+                is_output_filled[j],
+                0,
+                Piece(length=0, good=True),
+                formulation=self.formulation
+            )
+
+        # If keep[i] == 0, then add length to objective function
+        waste_added = model.addVars(new_indices, vtype=GRB.CONTINUOUS, name=f"{self.id} waste_added")
+        register_vars(model, waste_added, self.id, "waste_added", ('input',))
+        self.waste_added.update(waste_added)
+        for i in new_indices:
+            add_conditional_constr(
+                model,
+                keep[i],
+                0,
+                waste_added[i] - input_list[i].length, '==', 0,
+                bounds=board_difference_bounds,
+                formulation=self.formulation,
+                name=f"{self.id} waste_added_{i}"
+            )
+
+        # Define objective function as the sum of the waste
+        model.setObjective(quicksum(self.waste_added[i] for i in range(n)), GRB.MINIMIZE)
+
+        self.n_inputs = n
+        return self.keep, new_output_list
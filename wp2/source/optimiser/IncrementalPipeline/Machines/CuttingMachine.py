@@ -9,7 +9,16 @@ from IncrementalPipeline.Tools.simple_computations import (
     min_piece_length
 )
 from IncrementalPipeline.Tools.intervals_intersect import intersect_intervals, process_intersect_intervals
-from gurobipy import Model, GRB, quicksum
+from IncrementalPipeline.Tools.candidate_cuts import candidate_cut_positions, bad_segments
+from IncrementalPipeline.Tools.var_keys import register_var, register_vars
+from IncrementalPipeline.Tools.formulation import (
+    INDICATORS,
+    board_bounds,
+    add_conditional_constr,
+    add_and
+)
+from gurobipy import Model, GRB
+from IncrementalPipeline.Tools.backends import quicksum
 
 
 class CuttingMachine(GenericMachine):
@@ -18,13 +27,20 @@ class CuttingMachine(GenericMachine):
 
     This machine expects a list of Board objects as input
     and produces a list of Piece objects as output.
+
+    If candidate_cuts is True, the boards must be known, and the cuts
+    are chosen among the positions given by candidate_cut_positions,
+    whether a piece is bad is then known from the segments it covers.
     """
 
-    def __init__(self, id: str):
+    def __init__(self, id: str, formulation: str = INDICATORS,
+                 candidate_cuts: bool = False):
         super().__init__(id=f"CuttingMachine{id}",
                          input_type=BoardVars,
-                         output_type=PieceVars)
+                         output_type=PieceVars,
+                         formulation=formulation)
         self.max_pieces_per_board = max_pieces_per_board
+        self.candidate_cuts = candidate_cuts
 
     def output_length(self,
                       input_length: int,
@@ -47,25 +63,34 @@ class CuttingMachine(GenericMachine):
         return (input_length * self.max_pieces_per_board +
                 existing_output_length)
 
-    def impose_conditions(self, model, input_list):
-
+    def extend_conditions(self, model, new_input_list):
+        """
+        Every board is cut independently,
+        so only the boards in new_input_list are imposed.
+        """
 
         # create a list to store all pieces
         all_pieces = []
 
-        for board_index, board in enumerate(input_list):
+        for board_index, board in enumerate(new_input_list,
+                                            start=self.n_inputs):
             # create self.max_pieces_per_board - 1 variables for the cuts
             cuts = model.addVars(self.max_pieces_per_board - 1, vtype=GRB.CONTINUOUS, name=f"{self.id} cuts")
+            register_vars(model, cuts, self.id, "cuts", ('local',), input_index=board_index)
 
-            # Force cuts to be incremental
-            model.addConstrs((cuts[i] >= cuts[i - 1] for i in range(1, self.max_pieces_per_board - 1)), name=f"{self.id} incremental_cuts")
+            if self.candidate_cuts:
+                candidate_bad_quality = self.choose_candidate_cuts(model, board, board_index, cuts)
+            else:
+                # Force cuts to be incremental
+                model.addConstrs((cuts[i] >= cuts[i - 1] for i in range(1, self.max_pieces_per_board - 1)), name=f"{self.id} incremental_cuts")
 
             # create variables for the pieces
             pieces = create_piece_var_list(
                 model,
                 self.max_pieces_per_board,
                 id_prefix=f"{self.id} output ",
-                start_index=board_index * self.max_pieces_per_board
+                start_index=board_index * self.max_pieces_per_board,
+                machine_id=self.id
                 )
 
             # make their length equal to the difference of two cuts
@@ -76,36 +101,49 @@ class CuttingMachine(GenericMachine):
             # determine their quality: bad if (0<len and len<35)
             # if positive_length[i] is 0 then pieces[i].length is 0
             positive_length = model.addVars(self.max_pieces_per_board, vtype=GRB.BINARY, name=f"{self.id} positive_length")
+            register_vars(model, positive_length, self.id, "positive_length", ('local',), input_index=board_index)
             for i in range(self.max_pieces_per_board):
                 piece_index = board_index * self.max_pieces_per_board + i
-                model.addGenConstrIndicator(
+                add_conditional_constr(
+                    model,
                     positive_length[i],
                     0,
-                    pieces[i].length == 0,
+                    pieces[i].length, '==', 0,
+                    bounds=board_bounds,
+                    formulation=self.formulation,
                     name=f"{self.id} piece_[{piece_index}]_positive_length"
                 )
 
             below_min_length = model.addVars(self.max_pieces_per_board, vtype=GRB.BINARY, name=f"{self.id} below_min_length")
+            register_vars(model, below_min_length, self.id, "below_min_length", ('local',), input_index=board_index)
             for i in range(self.max_pieces_per_board):
                 piece_index = board_index * self.max_pieces_per_board + i
-                model.addGenConstrIndicator(
+                add_conditional_constr(
+                    model,
                     below_min_length[i],
                     0,
-                    pieces[i].length >= min_piece_length,
+                    pieces[i].length, '>=', min_piece_length,
+                    bounds=board_bounds,
+                    formulation=self.formulation,
                     name=f"{self.id} piece_[{piece_index}]_below_min_length"
                 )
             bad_size = model.addVars(self.max_pieces_per_board, vtype=GRB.BINARY, name=f"{self.id} bad_size")
+            register_vars(model, bad_size, self.id, "bad_size", ('local',), input_index=board_index)
             for i in range(self.max_pieces_per_board):
                 piece_index = board_index * self.max_pieces_per_board + i
-                model.addGenConstrAnd(
+                add_and(
+                    model,
                     bad_size[i],
                     [positive_length[i], below_min_length[i]],
+                    formulation=self.formulation,
                     name=f"{self.id} piece_[{piece_index}]_bad_size"
                 )
 
             # Check if any piece intersects with a bad part
             bad_quality = []
-            if self.max_pieces_per_board > 1:
+            if self.candidate_cuts:
+                bad_quality = candidate_bad_quality
+            elif self.max_pieces_per_board > 1:
                 piece_index = board_index * self.max_pieces_per_board
                 # Intersect the first piece with the bad parts?
                 bad_quality.append(
@@ -113,7 +151,8 @@ class CuttingMachine(GenericMachine):
                                         0,
                                         cuts[0],
                                         board.bad_parts,
-                                        name_prefix=f"{self.id} input [{board_index}] output [{piece_index}] bad_quality"
+                                        name_prefix=f"{self.id} input [{board_index}] output [{piece_index}] bad_quality",
+                                        formulation=self.formulation
                                         )
                 )
                 for i in range(self.max_pieces_per_board - 2):
@@ -124,7 +163,8 @@ class CuttingMachine(GenericMachine):
                                             cuts[i],
                                             cuts[i + 1],
                                             board.bad_parts,
-                                            name_prefix=f"{self.id} input [{board_index}] output [{piece_index}] bad_quality"
+                                            name_prefix=f"{self.id} input [{board_index}] output [{piece_index}] bad_quality",
+                                            formulation=self.formulation
                                             )
                     )
                 piece_index = board_index * self.max_pieces_per_board + self.max_pieces_per_board - 1
@@ -133,7 +173,8 @@ class CuttingMachine(GenericMachine):
                                         cuts[self.max_pieces_per_board - 2],
                                         board.length,
                                         board.bad_parts,
-                                        name_prefix=f"{self.id} input [{board_index}] output [{piece_index}] bad_quality"
+                                        name_prefix=f"{self.id} input [{board_index}] output [{piece_index}] bad_quality",
+                                        formulation=self.formulation
                                         )
                 )
             else:
@@ -143,32 +184,87 @@ class CuttingMachine(GenericMachine):
                                         0,
                                         board.length,
                                         board.bad_parts,
-                                        name_prefix=f"{self.id} input [{board_index}] output [{piece_index}] bad_quality"
+                                        name_prefix=f"{self.id} input [{board_index}] output [{piece_index}] bad_quality",
+                                        formulation=self.formulation
                                         )
                 )
 
             for i in range(self.max_pieces_per_board):
                 piece_index = board_index * self.max_pieces_per_board + i
-                pieces[i].good = model.addVar(vtype=GRB.BINARY,
-                                              name=f"{self.id} output [{piece_index}] good_quality")
-                model.addGenConstrIndicator(
+                add_conditional_constr(
+                    model,
                     pieces[i].good,
                     1,
-                    bad_size[i] == 0,
+                    bad_size[i], '==', 0,
+                    bounds=(0, 1),
+                    formulation=self.formulation,
                     name=f"{self.id} output [{piece_index}] good_size_indicator"
                 )
 
-                model.addGenConstrIndicator(
+                add_conditional_constr(
+                    model,
                     pieces[i].good,
                     1,
-                    bad_quality[i] == 0,
+                    bad_quality[i], '==', 0,
+                    bounds=(0, 1),
+                    formulation=self.formulation,
                     name=f"{self.id} output [{piece_index}] good_quality_indicator"
                 )
             
             # Add the pieces to the list of all pieces
             all_pieces.extend(pieces)
+        self.n_inputs += len(new_input_list)
         return [], all_pieces
 
+    def choose_candidate_cuts(self, model, board, board_index, cuts) -> list:
+        """
+        Makes every cut one of the candidate positions of the board,
+        and returns for every piece a variable that is 1 if it covers
+        a bad segment between two candidate positions.
+
+        before[k, t] is 1 if cut k is at positions[t] or before it,
+        so piece k covers the segment t if cut k - 1 is before it
+        and cut k is not.
+        """
+        known_board = board.board if isinstance(board, BoardVars) else board
+        if known_board is None:
+            raise ValueError(f"{self.id}: candidate cuts need known boards")
+        positions = candidate_cut_positions(known_board)
+        bad = bad_segments(positions, known_board.bad_parts)
+        n_cuts = self.max_pieces_per_board - 1
+        n_segments = len(positions) - 1
+        first_piece_index = board_index * self.max_pieces_per_board
+
+        # A cut at the end of the board is before no position but the last one
+        before = model.addVars(n_cuts, n_segments, vtype=GRB.BINARY, name=f"{self.id} cut_before")
+        for (k, t), var in before.items():
+            register_var(model, var, self.id, "cut_before", input_index=board_index, local_index=(k, t))
+        model.addConstrs((before[k, t] <= before[k, t + 1] for k in range(n_cuts) for t in range(n_segments - 1)),
+                         name=f"{self.id} cut_before_monotone")
+
+        # Force cuts to be incremental
+        model.addConstrs((before[k, t] <= before[k - 1, t] for k in range(1, n_cuts) for t in range(n_segments)),
+                         name=f"{self.id} incremental_cuts")
+
+        # The cut is the last position minus the segments it is before
+        model.addConstrs(
+            (cuts[k] == positions[-1] - quicksum((positions[t + 1] - positions[t]) * before[k, t]
+                                                 for t in range(n_segments))
+             for k in range(n_cuts)),
+            name=f"{self.id} cut_position")
+
+        # Piece k covers segment t if it starts at or before positions[t]
+        # and ends after it
+        bad_quality = model.addVars(self.max_pieces_per_board, vtype=GRB.BINARY, name=f"{self.id} bad_quality")
+        register_vars(model, bad_quality, self.id, "bad_quality", ('local',), input_index=board_index)
+        for k in range(self.max_pieces_per_board):
+            for t in bad:
+                starts_before = 1 if k == 0 else before[k - 1, t]
+                ends_before = 0 if k == n_cuts else before[k, t]
+                model.addConstr(bad_quality[k] >= starts_before - ends_before,
+                                name=f"{self.id} output [{first_piece_index + k}] covers_bad_segment_{t}")
+        return [bad_quality[k] for k in range(self.max_pieces_per_board)]
+
     def process(self,
                 decisions_list,
                 n_input_to_process,
@@ -202,16 +298,20 @@ class CuttingMachine(GenericMachine):
         it is necessary to determine whether the piece is good or bad,
         it will be bad if its length is less than the minimum length
         or if it intersects with a bad part of the board.
+
+        The last piece goes from the last cut to the end of the board,
+        empty pieces are not too short, as in the model.
         """
         pieces = []
         previous_cut = 0
-        for cut in decisions:
+        for cut in list(decisions) + [board.length]:
             piece_length = cut - previous_cut
             # Check if the piece is good or bad
-            if (piece_length < min_piece_length or
-                process_intersect_intervals(previous_cut, cut, board.bad_parts)):
+            if (0 < piece_length < min_piece_length or
+                process_intersect_intervals(previous_cut, cut, board.bad_parts or [])):
                 piece_good = False
             else:
                 piece_good = True
             pieces.append(Piece(length=piece_length, good=piece_good))
+            previous_cut = cut
         return pieces
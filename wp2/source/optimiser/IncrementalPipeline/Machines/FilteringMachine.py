@@ -2,7 +2,14 @@
 
 from IncrementalPipeline.Machines.GenericMachine import GenericMachine
 from IncrementalPipeline.Objects.piece import Piece, PieceVars, create_piece_var_list
-from gurobipy import GRB, quicksum
+from IncrementalPipeline.Tools.var_keys import register_vars
+from IncrementalPipeline.Tools.formulation import (
+    INDICATORS,
+    board_difference_bounds,
+    add_conditional_constr
+)
+from gurobipy import GRB
+from IncrementalPipeline.Tools.backends import quicksum
 
 
 class FilteringMachine(GenericMachine):
@@ -13,104 +20,207 @@ class FilteringMachine(GenericMachine):
     and produces a list of Piece objects as output.
     """
 
-    def __init__(self, id: str):
-        super().__init__(id=f"FilteringMachine{id}",
+    def __init__(self, id: str, formulation: str = INDICATORS,
+                 id_prefix: str = "FilteringMachine"):
+        """
+        The id of the machine is id_prefix followed by id,
+        subclasses give their own prefix.
+        """
+        super().__init__(id=f"{id_prefix}{id}",
                          input_type=PieceVars,
-                         output_type=PieceVars)
+                         output_type=PieceVars,
+                         formulation=formulation)
+
+    def reset(self):
+        super().reset()
+        self.input_list = []
+        self.output_list = []
+        self.keep = dict()
+        self.input_to_output = dict()
+        self.waste_added = dict()
+        self.is_output_filled = dict()
+        # Rows that sum over all inputs or all outputs,
+        # they get new terms when the machine is extended
+        self.output_filled_rows = []
+        self.one_output_per_input_rows = []
+        self.one_input_per_output_rows = []
+        # Pieces kept among the committed inputs, and committed outputs
+        # left empty, which the next kept pieces cannot go to
+        self.n_kept_committed = 0
+        self.n_empty_committed = 0
+        # Output of input i if it is kept, and its bounds,
+        # fixed when the input is added
+        self.kept_before = dict()
+        self.kept_before_bounds = dict()
+
+    def commit(self, model, n_inputs: int, n_outputs: int):
+        n_old_inputs, n_old_outputs = self.n_committed
+        kept = model.getAttr("X", [self.keep[i] for i in range(n_old_inputs, n_inputs)])
+        self.n_kept_committed += round(sum(kept))
+        filled = model.getAttr("X", [self.is_output_filled[j]
+                                     for j in range(n_old_outputs, n_outputs)])
+        self.n_empty_committed += len(filled) - round(sum(filled))
+        super().commit(model, n_inputs, n_outputs)
+
+    def first_free_output(self) -> int:
+        """
+        Returns the output of the first kept piece among
+        the inputs not committed yet: the committed kept pieces
+        and the committed empty outputs come before it.
+        """
+        return self.n_kept_committed + self.n_empty_committed
 
-    def impose_conditions(self, model, input_list: list) -> list:
+    def extend_conditions(self, model, new_input_list: list) -> list:
         """
         Filters the input list of pieces based on some conditions.
         For example, it can filter out pieces that are too short or too long.
+
+        Only the variables and constraints involving the new inputs
+        or the new outputs are added, the sums over all inputs
+        or all outputs get the new terms through chgCoeff.
+
+        Committed inputs and outputs (see commit) are already linked,
+        the new ones are only linked with those not committed yet,
+        and the outputs before them are a constant (first_free_output).
         """
+        if self.n_inputs > 0:
+            # Rows must exist in the model before changing their coefficients
+            model.update()
 
+        n_old = self.n_inputs
+        self.input_list.extend(new_input_list)
+        input_list = self.input_list
         n = len(input_list)  # Number of inputs
+        new_indices = range(n_old, n)
+        first_input, first_output = self.n_committed
+        new_pairs = [(i, j) for i in range(first_input, n) for j in range(first_output, n)
+                     if i >= n_old or j >= n_old]
 
         # define one boolean decision variable for each input
         # if the input is used, keep[i] = 1, if it's dropped keep[i] = 0
-        keep = model.addVars(n, vtype=GRB.BINARY, name=f"{self.id} keep piece")
+        keep = model.addVars(new_indices, vtype=GRB.BINARY, name=f"{self.id} keep piece")
+        register_vars(model, keep, self.id, "keep", ('input',))
+        self.keep.update(keep)
+        keep = self.keep
 
         # if piece quality is bad, then keep[i] must be 0
-        for i in range(n):
-            model.addGenConstrIndicator(
+        for i in new_indices:
+            add_conditional_constr(
+                model,
                 input_list[i].good,
                 0,
-                keep[i] == 0,
+                keep[i], '==', 0,
+                bounds=(0, 1),
+                formulation=self.formulation,
                 name=f"{self.id} good_constraint_{i}"
             )
 
         # define the output variables
-        output_list = create_piece_var_list(model, n, id_prefix=f"{self.id} output ")
+        new_output_list = create_piece_var_list(model, n - n_old, id_prefix=f"{self.id} output ",
+                                                start_index=n_old, machine_id=self.id)
+        self.output_list.extend(new_output_list)
+        output_list = self.output_list
 
         # create variables to link input and output
-        input_to_output = model.addVars(n, n, vtype=GRB.BINARY, name=f"{self.id} input_to_output")
+        input_to_output = model.addVars(new_pairs, vtype=GRB.BINARY, name=f"{self.id} input_to_output")
+        register_vars(model, input_to_output, self.id, "input_to_output",
+                      ('input', 'output'))
+        self.input_to_output.update(input_to_output)
 
         # if this variable is one then input[i] goes to output[j]
-        for i in range(n):
-            for j in range(n):
-                output_list[j].conditional_equality(model,
-                                                    input_to_output[i, j],
-                                                    1,
-                                                    input_list[i])
+        for i, j in new_pairs:
+            output_list[j].conditional_equality(model,
+                                                input_to_output[i, j],
+                                                1,
+                                                input_list[i],
+                                                formulation=self.formulation)
 
         # if the sum of this variables for one output is cero
         # then the piece has length 0
 
         is_output_filled = model.addVars(
-            n,
+            new_indices,
             vtype=GRB.BINARY,
             name=f"{self.id} is_output_filled",
             lb=0
         )
-        for j in range(n):
-            model.addConstr(
+        register_vars(model, is_output_filled, self.id, "is_output_filled",
+                      ('output',))
+        self.is_output_filled.update(is_output_filled)
+        for j in range(first_output, n_old):
+            for i in new_indices:
+                model.chgCoeff(self.output_filled_rows[j], input_to_output[i, j], -1)
+        for j in new_indices:
+            self.output_filled_rows.append(model.addConstr(
                 is_output_filled[j] == quicksum(
-                    input_to_output[i, j] for i in range(n)
+                    self.input_to_output[i, j] for i in range(first_input, n)
                 ),
                 name=f"{self.id} output_filled_{j}"
-            )
+            ))
             output_list[j].conditional_equality(
                 model,
                 is_output_filled[j],
                 0,
-                Piece(length=0, good=True)
+                Piece(length=0, good=True),
+                formulation=self.formulation
             )
 
         # input[i] goes to output[j] if input_to_output[i, j] == 1
-        # we want this to happen when we keep j pieces before the ith input
-        for i in range(n):
-            for j in range(n):
-                model.addGenConstrIndicator(
-                    input_to_output[i, j],
-                    1,
-                    quicksum(keep[k] for k in range(i)) == j,
-                    name=f"{self.id} input_to_output_indicator_{i}_{j}"
-                )
+        # we want this to happen when we keep j pieces before the ith input,
+        # committed empty outputs count as kept pieces
+        first_free_output = self.first_free_output()
+        for i in new_indices:
+            self.kept_before[i] = quicksum([first_free_output]
+                                           + [keep[k] for k in range(first_input, i)])
+            self.kept_before_bounds[i] = (first_free_output,
+                                          first_free_output + i - first_input)
+        for i, j in new_pairs:
+            add_conditional_constr(
+                model,
+                input_to_output[i, j],
+                1,
+                self.kept_before[i], '==', j,
+                bounds=self.kept_before_bounds[i],
+                formulation=self.formulation,
+                name=f"{self.id} input_to_output_indicator_{i}_{j}"
+            )
 
         # Only one output variable can be assigned to each input if we keep it
-        for i in range(n):
-            model.addConstr(
-                quicksum(input_to_output[i, j] for j in range(n)) == keep[i],
+        for i in range(first_input, n_old):
+            for j in new_indices:
+                model.chgCoeff(self.one_output_per_input_rows[i], input_to_output[i, j], 1)
+        for i in new_indices:
+            self.one_output_per_input_rows.append(model.addConstr(
+                quicksum(self.input_to_output[i, j] for j in range(first_output, n)) == keep[i],
                 name=f"{self.id} at most one output per input constraint [{i}]"
-            )
+            ))
 
         # At most one input variable can be assigned to each output
-        for j in range(n):
-            model.addConstr(
-                quicksum(input_to_output[i, j] for i in range(n)) <= 1,
-                name=f"{self.id} at most one input per output constraint [{j}]")
+        for j in range(first_output, n_old):
+            for i in new_indices:
+                model.chgCoeff(self.one_input_per_output_rows[j], input_to_output[i, j], 1)
+        for j in new_indices:
+            self.one_input_per_output_rows.append(model.addConstr(
+                quicksum(self.input_to_output[i, j] for i in range(first_input, n)) <= 1,
+                name=f"{self.id} at most one input per output constraint [{j}]"))
 
         # If keep[i] == 0, then add length to objective function
-        waste_added = model.addVars(n, vtype=GRB.CONTINUOUS, name=f"{self.id} waste_added")
-        for i in range(n):
-            model.addGenConstrIndicator(
+        waste_added = model.addVars(new_indices, vtype=GRB.CONTINUOUS, name=f"{self.id} waste_added")
+        register_vars(model, waste_added, self.id, "waste_added", ('input',))
+        self.waste_added.update(waste_added)
+        for i in new_indices:
+            add_conditional_constr(
+                model,
                 keep[i],
                 0,
-                waste_added[i] == input_list[i].length,
+                waste_added[i] - input_list[i].length, '==', 0,
+                bounds=board_difference_bounds,
+                formulation=self.formulation,
                 name=f"{self.id} waste_added_{i}"
             )
 
         # Define objective function as the sum of the waste
-        model.setObjective(quicksum(waste_added[i] for i in range(n)), GRB.MINIMIZE)
+        model.setObjective(quicksum(self.waste_added[i] for i in range(n)), GRB.MINIMIZE)
 
-        return keep, output_list
+        self.n_inputs = n
+        return keep, new_output_list
@@ -1,20 +1,33 @@
 """Defines a generic machine class."""
 
+from IncrementalPipeline.Tools.formulation import INDICATORS, check_formulation
+
 
 class GenericMachine:
     """
     Base class for all machines in the pipeline.
 
     Is a machine that takes a list of input_type
-    and produces a list of output_type."""
+    and produces a list of output_type.
+
+    formulation selects how its logical constraints are written,
+    INDICATORS or BIG_M, see Tools.formulation."""
 
     def __init__(self,
                  id: str,
                  input_type: type = None,
-                 output_type: type = None):
+                 output_type: type = None,
+                 formulation: str = INDICATORS):
         self.id = id
         self.input_type = input_type
         self.output_type = output_type
+        check_formulation(formulation)
+        self.formulation = formulation
+        # Number of inputs imposed on the current model
+        self.n_inputs = 0
+        # Inputs and outputs whose decisions are fixed
+        # in the current model, see commit
+        self.n_committed = (0, 0)
 
     def output_length(self,
                       input_length: int,
@@ -28,3 +41,43 @@ class GenericMachine:
         """
         raise NotImplementedError(
             "This method should be overridden by subclasses.")
+
+    def impose_conditions(self, model, input_list: list):
+        """
+        Imposes the conditions of the machine on a new model,
+        returns the decisions and the output list.
+
+        By default, it is an extension of an empty machine.
+        """
+        self.reset()
+        return self.extend_conditions(model, input_list)
+
+    def reset(self):
+        """
+        Forgets everything imposed on the current model.
+        Subclasses keeping more state should extend it.
+        """
+        self.n_inputs = 0
+        self.n_committed = (0, 0)
+
+    def commit(self, model, n_inputs: int, n_outputs: int):
+        """
+        Records that the decisions of the first n_inputs inputs and
+        n_outputs outputs are about to be fixed to their value in the
+        solution of the model, see Pipeline.commit_decisions.
+        Extensions need not link them to the new items.
+
+        Subclasses can read that solution here, before it is fixed.
+        """
+        self.n_committed = (n_inputs, n_outputs)
+
+    def extend_conditions(self, model, new_input_list: list):
+        """
+        Imposes the conditions of new_input_list, which come after the
+        inputs already imposed on the model, and returns the decisions
+        and the outputs that were not there before.
+
+        Should be overridden by subclasses.
+        """
+        raise NotImplementedError(
+            "This method should be overridden by subclasses.")
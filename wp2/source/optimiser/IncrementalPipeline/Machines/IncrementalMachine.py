@@ -1,83 +1,389 @@
-from IncrementalPipeline.Objects.board import BoardVars
-from IncrementalPipeline.Objects.piece import PieceVars
+from IncrementalPipeline.Objects.board import BoardBatch, BoardVars
+from IncrementalPipeline.Objects.piece import PieceBatch, PieceVars
 from IncrementalPipeline.Machines.Pipeline import Pipeline
 from gurobipy import Model
-from time import time
+from time import sleep, time
 
-from IncrementalPipeline.Tools.warm_start import warm_start
+from IncrementalPipeline.Tools.warm_start import (
+    keep_solution_as_start,
+    pool_values,
+    solution_values,
+    warm_start,
+    warm_start_from_pool,
+    warm_start_from_values
+)
+from IncrementalPipeline.Tools.beam_search import BeamSearchPlanner, set_plan_as_start
+from IncrementalPipeline.Tools.portfolio import PortfolioStatistics, solve_portfolio
+from IncrementalPipeline.Tools.early_stop import EarlyStopPolicy
+from IncrementalPipeline.Tools.lazy_constraints import lazy_callback
+from IncrementalPipeline.Tools.tuning import load_profile, pipeline_shape
+from IncrementalPipeline.Tools.model_size import format_build_report
+from IncrementalPipeline.Tools.time_budget import TimeBudgetScheduler
+from IncrementalPipeline.Tools.model_cache import ModelTemplateCache
+from IncrementalPipeline.Tools.checkpoint import (
+    CheckpointWriter,
+    checkpoint_state,
+    read_checkpoint
+)
 
 
 class IncrementalMachine():
-    def __init__(self, pipeline: Pipeline, input_list):
+    def __init__(self, pipeline: Pipeline, input_list,
+                 incremental_model: bool = False,
+                 heuristic: BeamSearchPlanner = None,
+                 portfolio: dict = None,
+                 gap_target: float = None,
+                 early_stop: EarlyStopPolicy = None,
+                 dump_outputs: bool = False,
+                 horizon: dict = None,
+                 scheduler: TimeBudgetScheduler = None,
+                 arrival_times: list = None,
+                 checkpoint_path: str = None,
+                 template_cache: ModelTemplateCache = None,
+                 pool_starts: int = None):
+        """
+        If incremental_model is True, one model is kept for the whole run,
+        every new board only adds its own variables and constraints
+        and the decisions sent to the machines are fixed,
+        see optimize_incremental.
+        Otherwise, a new model is built for every new board.
+
+        If a heuristic is given, the plan it finds for the intermediate
+        lists is given as an extra MIP start of every new model.
+        It cannot be used with incremental_model, the plan only
+        covers the items still in the intermediate lists.
+
+        If a portfolio (name -> Gurobi parameters, see Tools.portfolio)
+        is given, every new model is solved by all its configurations
+        in parallel, stopping once one reaches gap_target.
+        It cannot be used with machines with lazy rules,
+        nor with incremental_model, whose model is solved in place.
+        Otherwise, the tuned parameters of the pipeline are used
+        if it has a profile, see Tools.tuning.
+
+        If an early_stop policy is given, it is the callback of every
+        solve, its times are measured from the start of the step.
+
+        If dump_outputs is True, the outputs of every machine
+        are printed after every step, see print_outputs, what each
+        machine added to the model of every solve, see log_step,
+        and with a horizon the waste committed so far.
+
+        If a horizon (machine id -> number of inputs, see
+        Pipeline.set_horizon) is given, the models only look that far ahead:
+        the first machine gets new boards until its horizon is full,
+        and every step solves one model, of bounded size,
+        within time_per_step. The inputs processed in a step leave the
+        next models, and their waste is added to committed_waste.
+        It cannot be used with incremental_model, whose model keeps
+        all the inputs.
+
+        If a scheduler is given, it decides the time limit of every step
+        and how many of the arrived boards enter the pipeline,
+        which is then solved once, instead of every step using
+        time_per_step, see Tools.time_budget.
+
+        arrival_times are the seconds, since the start of process,
+        at which each input arrives and can enter the pipeline,
+        sorted. Without them, all inputs are there from the start.
+
+        If a checkpoint_path is given, the state of the run is written
+        there after every step, from a thread, see Tools.checkpoint.
+        A run restarted with restore continues from the last one.
+
+        If a template_cache is given, the model of every step is taken
+        from it, built only for structures it has not seen,
+        see Tools.model_cache. It cannot be used with incremental_model.
+
+        If pool_starts is given, the best pool_starts solutions of the
+        pool of every model, not only its incumbent, are the MIP starts
+        of the next one, see Tools.warm_start.pool_values.
+        """
+        if arrival_times is not None and len(arrival_times) != len(input_list):
+            raise ValueError(f"{len(arrival_times)} arrival times "
+                             f"for {len(input_list)} inputs")
+        if template_cache is not None and incremental_model:
+            raise ValueError("The incremental model is extended, "
+                             "it is never taken from a template cache")
+        if horizon is not None and incremental_model:
+            raise ValueError("The incremental model keeps every input, "
+                             "it cannot be limited to a horizon")
+        if heuristic is not None and incremental_model:
+            raise ValueError("The plan of the heuristic is for the intermediate "
+                             "lists, not for the whole incremental model")
+        if portfolio is not None and incremental_model:
+            raise ValueError("A portfolio solves copies of every new model, "
+                             "the incremental model is solved in place")
+        if portfolio is not None and pipeline.lazy_machines():
+            raise ValueError("A portfolio solves copies of the model in other "
+                             "processes, which cannot add lazy rules")
+        if pool_starts is not None and pool_starts < 1:
+            raise ValueError(f"At least one pool start expected, got {pool_starts}")
         self.pipeline = pipeline
         self.input_list = input_list
         self.waste_produced = 0
+        # Waste of the inputs already processed, with a horizon
+        self.committed_waste = 0
+        self.horizon = horizon
+        pipeline.set_horizon(horizon)
+        self.scheduler = scheduler
+        self.arrival_times = arrival_times
+        self.process_start_time = time()
+        self.checkpoint_path = checkpoint_path
+        self.template_cache = template_cache
+        self.pool_starts = pool_starts
+        self.checkpoint_writer = None
+        # Inputs which already entered the pipeline before a restore,
+        # and the incumbent to start the first model from
+        self.n_entered = 0
+        self.restored_start = None
+        # Waste of the inputs committed before a restore,
+        # which are not in the new live model
+        self.restored_waste = 0
+        self.incremental_model = incremental_model
+        self.heuristic = heuristic
+        self.portfolio = portfolio
+        self.gap_target = gap_target
+        self.portfolio_statistics = PortfolioStatistics()
+        self.early_stop = early_stop
+        self.dump_outputs = dump_outputs
+        self.step_start_time = time()
+        # Build report of the pipeline and runtime of every solve
+        self.step_reports = []
+        self.live_model = None
+        # Values by structural key of the best solutions of the live
+        # model, set as starts once it is extended
+        self.live_pool = None
 
     def process(self, time_per_step=5):
         """
         When time runs out, modifies the state of the machine
         and sends the current input to the next machine.
         """
-        remaining_input = self.input_list[:]
+        remaining_input = self.input_list[self.n_entered:]
         best_model = Model()
         machine_changes = self.pipeline.no_machine_changes
+        self.process_start_time = time()
+        if self.checkpoint_path is not None:
+            self.checkpoint_writer = CheckpointWriter(self.checkpoint_path)
         print(self.pipeline.intermediate_lists)
         # While there is some input left to process
         while len(remaining_input) > 0 or self.pipeline.empty() is False:
+            if self.pipeline.empty():
+                self.wait_for_arrival(len(remaining_input))
             step_start_time = time()
+            self.step_start_time = step_start_time
             # We have time_per_step seconds to decide
             # how to process the current input
             time_left = time_per_step - (time() - step_start_time)
-            while time_left > 0 and len(remaining_input) > 0:
+            new_input_added = False
+            admitted = []
+            decision = None
+            if self.scheduler is not None:
+                decision = self.scheduler.decide(self.pipeline,
+                                                 self.n_arrived(len(remaining_input)))
+                time_left = decision.time_limit
+                for _ in range(decision.boards):
+                    admitted.append(remaining_input.pop(0))
+                    self.pipeline.add_input(admitted[-1])
+            elif self.horizon is not None:
+                # The boards wait until the horizon has room for them,
+                # the model is solved once below
+                while (self.n_arrived(len(remaining_input)) > 0
+                       and not self.pipeline.horizon_full()):
+                    admitted.append(remaining_input.pop(0))
+                    self.pipeline.add_input(admitted[-1])
+            while (self.horizon is None and self.scheduler is None and time_left > 0
+                   and self.n_arrived(len(remaining_input)) > 0):
                 # Continue looking for further solutions
                 new_input = remaining_input.pop(0)
                 self.pipeline.add_input(new_input)
+                new_input_added = True
 
-                best_model, machines_decisions, machines_output, optimal_waste =\
-                    self.optimize_temporal(
-                        time_left,
-                        best_model=best_model,
-                        machine_changes=machine_changes)
+                if self.incremental_model:
+                    best_model, machines_decisions, machines_output, optimal_waste =\
+                        self.optimize_incremental(time_left, [new_input])
+                else:
+                    best_model, machines_decisions, machines_output, optimal_waste =\
+                        self.optimize_temporal(
+                            time_left,
+                            best_model=best_model,
+                            machine_changes=machine_changes)
 
                 time_left = time_per_step - (time() - step_start_time)
 
                 machine_changes = self.pipeline.no_machine_changes
                 print(f"Optimization finished with {time_left} seconds left.")
+            if not new_input_added:
+                # The decisions of the last step were fixed (or processed),
+                # the rest of the model is optimised again,
+                # with the inputs admitted for this step
+                if self.incremental_model:
+                    best_model, machines_decisions, machines_output, optimal_waste =\
+                        self.optimize_incremental(time_left, admitted)
+                else:
+                    best_model, machines_decisions, machines_output, optimal_waste =\
+                        self.optimize_temporal(
+                            time_left,
+                            best_model=best_model,
+                            machine_changes=machine_changes)
+                    machine_changes = self.pipeline.no_machine_changes
+            if decision is not None:
+                self.scheduler.record(
+                    decision, time() - step_start_time,
+                    best_model.MIPGap if best_model.SolCount > 0 else None)
+            if self.dump_outputs:
+                self.print_outputs(best_model, machines_output)
             # TODO take decisions from the same place as the output
             # extract_decisions(best_model)
-            self.waste_produced += optimal_waste
-            machine_changes = self.pipeline.machine_changes_per_step
-            self.pipeline.process_input(best_model, machines_output)
-            for machine_id, output_list in machines_output.items():
-                print(f"Machine {machine_id} produced output:")
-                for output in output_list:
-                    if isinstance(output, BoardVars):
-                        print(
-                            f" - Board {output.id}"
-                            f" length {output.length.X}")
-                    elif isinstance(output, PieceVars):
-                        print(
-                            f" - Piece {output.id}"
-                            f" length {output.length.X}"
-                            f" good {output.good.X}")
+            values = (solution_values(best_model)
+                      if self.checkpoint_writer is not None else None)
+            if self.incremental_model:
+                # The objective of the live model counts all waste so far
+                self.waste_produced = self.restored_waste + optimal_waste
+                self.pipeline.commit_decisions(best_model)
+            elif self.horizon is not None:
+                # The rest of the objective is about the look-ahead,
+                # which is decided again in the next steps
+                self.committed_waste += self.pipeline.committed_waste(best_model)
+                self.waste_produced = self.committed_waste
+                if self.dump_outputs:
+                    print(f"Committed waste: {self.committed_waste}, "
+                          f"objective of the step: {optimal_waste}")
+                machine_changes = self.pipeline.machine_changes_per_step
+                self.pipeline.process_input(best_model, machines_output)
+            else:
+                self.waste_produced += optimal_waste
+                machine_changes = self.pipeline.machine_changes_per_step
+                self.pipeline.process_input(best_model, machines_output)
+            if self.checkpoint_writer is not None:
+                self.checkpoint(values, len(self.input_list) - len(remaining_input))
+        if self.checkpoint_writer is not None:
+            self.checkpoint_writer.close()
         print(f"Total waste produced: {self.waste_produced}")
         return self.waste_produced
 
+    def checkpoint(self, values: dict, n_entered: int):
+        """
+        Submits the state after a step to the checkpoint writer,
+        values being the solution of the step by structural key.
+        """
+        if self.incremental_model:
+            # The next live model only has the inputs not committed yet
+            machine_changes = self.pipeline.committed
+            committed_waste = self.restored_waste + sum(
+                value for (machine_id, role, input_index, _, _), value in values.items()
+                if role == "waste_added" and input_index < machine_changes[machine_id][0])
+        else:
+            machine_changes = self.pipeline.machine_changes_per_step
+            committed_waste = self.committed_waste
+        self.checkpoint_writer.submit(checkpoint_state(
+            self.pipeline, values, machine_changes,
+            self.waste_produced, committed_waste, n_entered))
+
+    def restore(self, path):
+        """
+        Restores the state of the checkpoint at path, written by a run
+        with the same pipeline and inputs. The next call to process
+        continues that run, its first model is started from the
+        incumbent of the last step.
+        """
+        state = read_checkpoint(path)
+        if len(state["intermediate_lists"]) != len(self.pipeline.intermediate_lists):
+            raise ValueError(f"Checkpoint {path} has {len(state['intermediate_lists'])} "
+                             f"intermediate lists, the pipeline "
+                             f"{len(self.pipeline.intermediate_lists)}")
+        self.pipeline.intermediate_lists = state["intermediate_lists"]
+        self.waste_produced = state["waste_produced"]
+        self.committed_waste = state["committed_waste"]
+        self.restored_waste = state["committed_waste"] if self.incremental_model else 0
+        self.n_entered = state["n_entered"]
+        self.restored_start = (state["incumbent"], state["machine_changes"])
+        self.live_model = None
+
+    def start_from_checkpoint(self, model):
+        """
+        Sets the incumbent of the restored checkpoint, if any,
+        as start of the first model after a restore.
+        """
+        if self.restored_start is None:
+            return
+        values, machine_changes = self.restored_start
+        warm_start_from_values(model, values, machine_changes)
+        self.restored_start = None
+
+    def n_arrived(self, n_remaining: int) -> int:
+        """
+        Returns how many of the last n_remaining inputs
+        have arrived, all of them without arrival_times.
+        """
+        if self.arrival_times is None:
+            return n_remaining
+        elapsed = time() - self.process_start_time
+        first = len(self.input_list) - n_remaining
+        return sum(arrival <= elapsed for arrival in self.arrival_times[first:])
+
+    def wait_for_arrival(self, n_remaining: int):
+        """
+        Waits until the next of the last n_remaining inputs arrives.
+        """
+        if n_remaining == 0 or self.n_arrived(n_remaining) > 0:
+            return
+        next_arrival = self.arrival_times[len(self.input_list) - n_remaining]
+        sleep(max(next_arrival - (time() - self.process_start_time), 0))
+
+    def print_outputs(self, model, machines_output):
+        """
+        Prints the outputs of every machine in the solution of the model.
+        """
+        for machine_id, output_list in machines_output.items():
+            print(f"Machine {machine_id} produced output:")
+            if output_list and isinstance(output_list[0], BoardVars):
+                boards = BoardBatch.from_board_vars(model, output_list)
+                for output, length in zip(output_list, boards.lengths):
+                    print(f" - Board {output.id} length {length}")
+            elif output_list and isinstance(output_list[0], PieceVars):
+                pieces = PieceBatch.from_piece_vars(model, output_list)
+                for output, length, good in zip(output_list, pieces.lengths, pieces.good):
+                    print(f" - Piece {output.id} length {length} good {good}")
+
     def optimize_temporal(self,
                           remaining_time,
                           best_model=Model(),
                           machine_changes=None):
-        new_model = Model()
-
-        machines_decisions, machines_output =\
-            self.pipeline.impose_conditions(new_model)
+        has_start = best_model.SolCount > 0 or self.restored_start is not None
+        # The template can be the model of the last step,
+        # its solutions are read before it is reused
+        previous_pool = pool_values(best_model, self.pool_starts or 1)
+        if self.template_cache is None:
+            new_model = Model()
 
-        # initialise the values with the solution from previous model
-        warm_start(new_model, best_model, machine_changes)
+            machines_decisions, machines_output =\
+                self.pipeline.impose_conditions(new_model)
+        else:
+            new_model, machines_decisions, machines_output =\
+                self.template_cache.model(self.pipeline)
+        # initialise the values with the solutions from previous model
+        n_starts = warm_start_from_pool(new_model, previous_pool, machine_changes)
+        self.start_from_checkpoint(new_model)
+        if self.heuristic is not None:
+            plan = self.heuristic.plan(self.pipeline)
+            set_plan_as_start(new_model, self.pipeline, plan,
+                              start_number=max(n_starts, int(has_start)))
         # optimise with the remaining time
 
-        new_model.setParam('TimeLimit', remaining_time)
-        new_model.optimize()
+        if self.portfolio is not None:
+            result = solve_portfolio(new_model, remaining_time,
+                                     self.portfolio, self.gap_target)
+            self.portfolio_statistics.record(result)
+            print(f"Portfolio winner: {result.winner}, "
+                  f"win rates: {self.portfolio_statistics.win_rates()}")
+            runtime = max((run["runtime"] for run in result.runs.values()), default=0)
+        else:
+            runtime = None
+            new_model.setParam('TimeLimit', remaining_time)
+            self.solve(new_model)
+        self.log_step(new_model, runtime)
 
         # TODO in the future compare some metric
         # to decide whether to keep as best model
@@ -89,6 +395,77 @@ class IncrementalMachine():
 
         return best_model, machines_decisions, machines_output, optimal_waste
 
+    def optimize_incremental(self, remaining_time, new_input_list):
+        """
+        Extends the live model with new_input_list instead of
+        building a new model, so that only the variables and constraints
+        of the new inputs are added.
+
+        The solution is kept as start of the model after solving,
+        so that it is used again once the model is modified, or the best
+        pool_starts solutions of its pool, set once it is extended.
+        """
+        if self.live_model is None:
+            self.live_model = Model()
+            machines_decisions, machines_output =\
+                self.pipeline.impose_conditions(self.live_model)
+            self.start_from_checkpoint(self.live_model)
+        else:
+            machines_decisions, machines_output =\
+                self.pipeline.extend_conditions(self.live_model,
+                                                new_input_list)
+            if self.live_pool is not None:
+                warm_start_from_pool(self.live_model, self.live_pool, None)
+
+        self.live_model.setParam('TimeLimit', max(remaining_time, 0))
+        self.solve(self.live_model)
+        self.log_step(self.live_model)
+        optimal_waste = self.live_model.ObjVal
+        if self.pool_starts is None:
+            keep_solution_as_start(self.live_model)
+        else:
+            # Setting several starts updates the model, which would
+            # discard the solution the decisions are read from.
+            # Variables of the model can be removed once it is extended,
+            # the solutions are kept by structural key.
+            self.live_pool = pool_values(self.live_model, self.pool_starts)
+
+        return self.live_model, machines_decisions, machines_output, optimal_waste
+
+    def solve(self, model):
+        """
+        Optimises the model, under the early stop policy if there is one,
+        adding the lazy rules of the machines on every new incumbent,
+        with the tuned parameters of the pipeline if it has a profile.
+        """
+        load_profile(model, pipeline_shape(self.pipeline))
+        if self.pool_starts is not None:
+            model.setParam('PoolSolutions',
+                           max(model.Params.PoolSolutions, self.pool_starts))
+        callback = self.early_stop
+        if callback is not None:
+            self.early_stop.start(model, self.step_start_time)
+        lazy_machines = self.pipeline.lazy_machines()
+        if lazy_machines:
+            model.setParam('LazyConstraints', 1)
+            callback = lazy_callback(lazy_machines, callback)
+        if callback is None:
+            model.optimize()
+        else:
+            model.optimize(callback)
+
+    def log_step(self, model, runtime=None):
+        """
+        Keeps in step_reports what each machine added to the model
+        of the step, and how long Gurobi took to solve it,
+        model.Runtime if runtime is None. It is printed if dump_outputs.
+        """
+        report = {"build": dict(self.pipeline.build_report),
+                  "runtime": model.Runtime if runtime is None else runtime}
+        self.step_reports.append(report)
+        if self.dump_outputs:
+            print(format_build_report(report["build"], report["runtime"]))
+
     def optimize(self,
                  remaining_time,
                  best_model=Model(),
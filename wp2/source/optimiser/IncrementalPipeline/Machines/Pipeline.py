@@ -6,9 +6,14 @@ The object will initially take a list of the machines that create the pipeline.
 
 from IncrementalPipeline.Machines.GenericMachine import GenericMachine
 from typing import List
+from time import time
 from IncrementalPipeline.Tools.to_vars import to_vars
-from IncrementalPipeline.Objects.piece import create_piece_list_from_piece_vars
-from IncrementalPipeline.Objects.board import create_board_list_from_board_vars
+from IncrementalPipeline.Objects.piece import PieceVars, create_piece_list_from_piece_vars
+from IncrementalPipeline.Objects.board import BoardVars, create_board_list_from_board_vars
+from IncrementalPipeline.Tools.var_keys import get_var_keys, item_vars, fix_vars_to_solution
+from IncrementalPipeline.Tools.formulation import check_formulation
+from IncrementalPipeline.Tools.integer_lengths import check_length_unit, make_lengths_integer
+from IncrementalPipeline.Tools.model_size import model_size, size_delta
 
 
 class Pipeline(GenericMachine):
@@ -44,12 +49,23 @@ class Pipeline(GenericMachine):
                          output_type=machines[-1].output_type)
         self.decisions = dict()
         self.machines_output = dict()
+        # What each machine added to the last model, see record_build
+        self.build_report = dict()
 
         self.no_machine_changes = {
                     machine.id: (0, 0)
                     for machine in self.machines
                 }
         self.machine_changes_per_step = machine_changes_per_step
+        # Inputs and outputs of each machine already committed
+        # in the current model, see commit_decisions
+        self.committed = {machine.id: (0, 0) for machine in self.machines}
+        # Maximum number of inputs of each machine in a model,
+        # see set_horizon
+        self.horizon = None
+        # Unit of the lengths if they are integer variables,
+        # see set_length_unit
+        self.length_unit = None
 
         # One by one process the machines, adding their output
         # to the already existing intermediate lists
@@ -63,24 +79,203 @@ class Pipeline(GenericMachine):
         # simply modify intermediate_lists little by little
         # TODO move to_vars to the machines or find a way
         # of always transforming it when calling impose_conditions
+        self.build_report = dict()
+        size, start_time = model_size(model), time()
+        list_to_process = self.inputs_to_vars(model, 0, input_list)
+        self.committed = {machine.id: (0, 0) for machine in self.machines}
+        for index, machine in enumerate(self.machines):
+            decisions_list, output_list = \
+                machine.impose_conditions(model,
+                                          list_to_process)
+            self.decisions[machine.id] = decisions_list
+            self.machines_output[machine.id] = list(output_list)
+            size, start_time = self.record_build(model, machine, size, start_time)
+            if index < len(self.machines) - 1:
+                list_to_process = self.inputs_to_vars(model, index + 1, output_list)
+        if self.length_unit is not None:
+            make_lengths_integer(model, self.length_unit)
+
+        return self.decisions, self.machines_output
+
+    def inputs_to_vars(self, model, index: int, new_items: list) -> list:
+        """
+        Returns the variables of the inputs of the machine at index,
+        its intermediate list followed by new_items, up to its horizon.
+        The intermediate list is converted on its own,
+        so that a batch gets its variables from its arrays.
+        """
+        machine_id = self.machines[index].id
+        known_vars = to_vars(self.look_ahead(index, self.intermediate_lists[index]),
+                             model, machine_id)
+        new_items = self.look_ahead(index, known_vars + list(new_items))[len(known_vars):]
+        return known_vars + to_vars(new_items, model, machine_id,
+                                    start_index=len(known_vars))
+
+    def set_horizon(self, horizon: dict):
+        """
+        Limits the inputs of each machine (machine id -> number of inputs)
+        in the models built by impose_conditions to the first ones,
+        so that their size does not depend on how much is buffered.
+        Machines not in horizon see all their inputs, None removes the limits.
+
+        Each limit must cover the inputs the machine processes per step,
+        as their decisions are the ones sent to the machines.
+        """
+        if horizon is not None:
+            for machine in self.machines:
+                if machine.id not in horizon:
+                    continue
+                n_input_to_process = self.machine_changes_per_step[machine.id][0]
+                if horizon[machine.id] < n_input_to_process:
+                    raise ValueError(
+                        f"The horizon of machine {machine.id} ({horizon[machine.id]}) "
+                        f"is smaller than the {n_input_to_process} inputs "
+                        f"it processes per step")
+        self.horizon = horizon
+
+    def look_ahead(self, index: int, items: list) -> list:
+        """
+        Returns the first items, up to the horizon of the machine
+        at index. The items left out come after all of them,
+        so the decisions on the modelled ones do not depend on them.
+        """
+        if self.horizon is None or self.machines[index].id not in self.horizon:
+            return items
+        return items[:self.horizon[self.machines[index].id]]
+
+    def horizon_full(self) -> bool:
+        """
+        Returns True if the first machine already has
+        all the inputs its horizon allows.
+        """
+        first_id = self.machines[0].id
+        return (self.horizon is not None and first_id in self.horizon
+                and len(self.intermediate_lists[0]) >= self.horizon[first_id])
+
+    def committed_waste(self, model) -> float:
+        """
+        Returns the waste, in the solution of a model built by
+        impose_conditions, of the inputs that process_input sends
+        to the machines, which is final and leaves the next models.
+        """
+        committed_vars = [
+            var for (machine_id, role, input_index, _, _), var
+            in get_var_keys(model).items()
+            if role == "waste_added"
+            and input_index < self.machine_changes_per_step[machine_id][0]]
+        return sum(model.getAttr("X", committed_vars)) if committed_vars else 0
+
+    def extend_conditions(self, model, input_list: list) -> None:
+        """
+        Extends a model built by impose_conditions with new inputs
+        for the first machine, instead of imposing everything again.
+
+        Each machine only imposes the conditions of its new inputs,
+        which are the new outputs of the previous machine.
+        """
+        self.build_report = dict()
+        size, start_time = model_size(model), time()
         list_to_process = to_vars(
-            self.intermediate_lists[0] + input_list,
+            input_list,
             model,
-            self.machines[0].id)
+            self.machines[0].id,
+            start_index=self.machines[0].n_inputs)
         for index, machine in enumerate(self.machines):
             decisions_list, output_list = \
-                machine.impose_conditions(model,
+                machine.extend_conditions(model,
                                           list_to_process)
             self.decisions[machine.id] = decisions_list
-            self.machines_output[machine.id] = output_list
+            self.machines_output[machine.id].extend(output_list)
+            size, start_time = self.record_build(model, machine, size, start_time)
             if index < len(self.machines) - 1:
+                next_machine = self.machines[index + 1]
                 list_to_process = to_vars(
-                    self.intermediate_lists[index + 1] + output_list,
+                    output_list,
                     model,
-                    self.machines[index + 1].id)
+                    next_machine.id,
+                    start_index=next_machine.n_inputs)
+        if self.length_unit is not None:
+            make_lengths_integer(model, self.length_unit)
 
         return self.decisions, self.machines_output
 
+    def record_build(self, model, machine, size: dict, start_time: float):
+        """
+        Records in build_report the time the machine took to impose its
+        conditions, including the variables of its inputs, and what it
+        added to the model. Returns the new size and the current time.
+        """
+        new_size = model_size(model)
+        self.build_report[machine.id] = size_delta(size, new_size)
+        now = time()
+        self.build_report[machine.id]["time"] = now - start_time
+        return new_size, now
+
+    def commit_decisions(self, model):
+        """
+        Used instead of process_input when the same model is extended
+        from one step to the next.
+
+        Actualises the intermediate lists with the outputs
+        produced in this step, and fixes the variables of the inputs
+        and outputs each machine processed (machine_changes_per_step)
+        to their value in the current solution,
+        so that those decisions are never changed again.
+        """
+        outputs_to_process = dict()
+        variables_to_fix = []
+        for machine in self.machines:
+            n_input_to_process, n_output_to_process =\
+                self.machine_changes_per_step[machine.id]
+            committed_inputs, committed_outputs = self.committed[machine.id]
+            machine_output = self.machines_output[machine.id]
+            outputs_to_process[machine.id] = machine_output[committed_outputs:]
+
+            new_committed_inputs = min(committed_inputs + n_input_to_process,
+                                       machine.n_inputs)
+            new_committed_outputs = min(committed_outputs + n_output_to_process,
+                                        len(machine_output))
+            variables_to_fix.extend(item_vars(
+                model, machine.id, 'input',
+                range(committed_inputs, new_committed_inputs)))
+            variables_to_fix.extend(item_vars(
+                model, machine.id, 'output',
+                range(committed_outputs, new_committed_outputs)))
+            self.committed[machine.id] = (new_committed_inputs,
+                                          new_committed_outputs)
+            machine.commit(model, new_committed_inputs, new_committed_outputs)
+
+        self.process_input(model, outputs_to_process)
+        fix_vars_to_solution(model, variables_to_fix)
+
+    def set_formulation(self, formulation: str):
+        """
+        Selects the formulation (INDICATORS or BIG_M, see Tools.formulation)
+        used by every machine of the pipeline in the next models.
+        """
+        check_formulation(formulation)
+        self.formulation = formulation
+        for machine in self.machines:
+            machine.formulation = formulation
+
+    def set_length_unit(self, unit: int):
+        """
+        Makes the lengths and positions of the next models integer
+        multiples of unit (see Tools.integer_lengths), which must divide
+        every length of the configuration and of the inputs,
+        None for continuous lengths.
+        """
+        check_length_unit(unit)
+        self.length_unit = unit
+
+    def lazy_machines(self) -> list:
+        """
+        Returns the machines which leave rules out of the model,
+        to be added on every new incumbent, see Tools.lazy_constraints.
+        """
+        return [machine for machine in self.machines
+                if getattr(machine, "lazy", False)]
+
     def correctness(self):
         """
         Checks the correctness of the pipeline.
@@ -133,6 +328,10 @@ class Pipeline(GenericMachine):
         """
         Actualises the intermediate lists based on
         the decisions and machine changes.
+
+        The outputs sent to the next machine are read from the solution
+        of best_model with one getAttr call per attribute, and stay
+        in a PieceBatch or BoardBatch, without a Piece or Board per item.
         """
         for i, machine in enumerate(self.machines):
             machine_output = machine_output_list[machine.id]
@@ -147,21 +346,21 @@ class Pipeline(GenericMachine):
                 self.intermediate_lists[i][n_input_to_process:]
 
             # Add the output to the next intermediate list
-            if machine.output_type == 'PieceVars':
-                self.intermediate_lists[i + 1].extend(
-                    create_piece_list_from_piece_vars(
+            # as a batch, a list becomes a batch when one is added to it
+            if machine.output_type == PieceVars:
+                self.intermediate_lists[i + 1] = \
+                    self.intermediate_lists[i + 1] + create_piece_list_from_piece_vars(
                         best_model,
                         machine_output[:n_output_to_process])
-                )
-            elif machine.output_type == 'BoardVars':
-                self.intermediate_lists[i + 1].extend(
-                    create_board_list_from_board_vars(
+            elif machine.output_type == BoardVars:
+                self.intermediate_lists[i + 1] = \
+                    self.intermediate_lists[i + 1] + create_board_list_from_board_vars(
                         best_model,
                         machine_output[:n_output_to_process])
-                )
 
     def empty(self):
         """
-        Returns true if all intermediate lists are empty.
+        Returns true if all intermediate lists are empty,
+        except the last one, which has the outputs of the pipeline.
         """
-        return all(len(lst) == 0 for lst in self.intermediate_lists)
+        return all(len(lst) == 0 for lst in self.intermediate_lists[:-1])
@@ -1,20 +1,33 @@
 """Defines a reorder machine."""
 
 from IncrementalPipeline.Machines.GenericMachine import GenericMachine
-from gurobipy import GRB, quicksum
+from gurobipy import GRB
+from IncrementalPipeline.Tools.backends import quicksum
 from IncrementalPipeline.Objects.board import BoardVars, Board, create_board_var_list
 from IncrementalPipeline.Objects.piece import Piece, PieceVars, create_piece_var_list
+from IncrementalPipeline.Tools.var_keys import register_vars
+from IncrementalPipeline.Tools.formulation import INDICATORS, add_and
 
 
 class ReorderMachine(GenericMachine):
     """
     A machine that reorders a list of items of a given type.
+
+    If window is given (the capacity of the buffer of the machine),
+    an item can move at most window places, and only the assignments
+    of input i to the outputs j with |i - j| <= window are created.
     """
 
-    def __init__(self, id: str, input_type: type = None):
+    def __init__(self, id: str, input_type: type = None,
+                 formulation: str = INDICATORS,
+                 window: int = None):
         super().__init__(id=f"ReorderMachine{id}",
                          input_type=input_type,
-                         output_type=input_type)
+                         output_type=input_type,
+                         formulation=formulation)
+        if window is not None and window < 1:
+            raise ValueError(f"{self.id}: the window must be at least 1, got {window}")
+        self.window = window
 
     def output_length(self,
                       input_length: int,
@@ -29,14 +42,35 @@ class ReorderMachine(GenericMachine):
         """
         return input_length + existing_output_length
 
-    def impose_conditions(self, model, input_list: list) -> list:
+    def reset(self):
+        super().reset()
+        self.n = 0
+        self.input_list = []
+        self.output_list = []
+        self.swap_decisions = dict()
+        self.not_swap_decisions = dict()
+        self.reorder_vars = dict()
+        # Rows summing over all outputs of an input or all inputs of an output,
+        # they get new terms when the machine is extended
+        self.input_rows = []
+        self.output_rows = []
+
+    def extend_conditions(self, model, new_input_list: list) -> list:
         """
         Defines the possible reorderings of the input list.
+
+        Only the variables and constraints involving the new inputs
+        or the new outputs are added.
         """
+        if self.n_inputs > 0:
+            # Rows must exist in the model before changing their coefficients
+            model.update()
 
         # Create binary variable to indicate if input piece i goes to output j
         # If reorder_vars[i, j] is 1, then input piece i goes to output j
-        self.n = len(input_list)
+        self.n_old = self.n_inputs
+        self.input_list.extend(new_input_list)
+        self.n = len(self.input_list)
 
         self.define_swap_not_swap_decisions(model)
 
@@ -44,7 +78,7 @@ class ReorderMachine(GenericMachine):
 
         self.one_to_one_reordering(model)
 
-        self.generate_output_list(model, input_list)
+        new_output_list = self.generate_output_list(model, self.input_list)
         
         # Keep the last output in the "buffer" and add it to the objective function
         # with a penalisation coefficient (e.g. 0.3)
@@ -57,7 +91,30 @@ class ReorderMachine(GenericMachine):
         #     self.buffer_penalisation(model, self.output_list[-1])
         #     return self.swap_decisions, self.output_list[:-1]
 
-        return self.swap_decisions, self.output_list
+        self.n_inputs = self.n
+        return self.swap_decisions, new_output_list
+
+    def possible_outputs(self, i: int) -> range:
+        """
+        Returns the outputs input i can go to.
+        """
+        if self.window is None:
+            return range(self.n)
+        return range(max(i - self.window, 0), min(i + self.window + 1, self.n))
+
+    def possible_inputs(self, j: int) -> range:
+        """
+        Returns the inputs that can go to output j.
+        """
+        return self.possible_outputs(j)
+
+    def new_pairs(self):
+        """
+        Returns the pairs (i, j) of inputs and outputs
+        that were not in the model before the extension.
+        """
+        return [(i, j) for i in range(self.n) for j in self.possible_outputs(i)
+                if i >= self.n_old or j >= self.n_old]
     
     def buffer_penalisation(self, model, buffer_item):
         """
@@ -84,45 +141,59 @@ class ReorderMachine(GenericMachine):
         model.setObjective(model.getObjective() + buffer_penalisation, GRB.MINIMIZE)
 
     def generate_output_list(self, model, input_list: list) -> list:
-        self.output_list = []
         # Create a list of output objects based on the input type.
+        n_new = self.n - self.n_old
         if self.input_type == Board or self.input_type == BoardVars:
-            self.output_list = create_board_var_list(model, self.n, id_prefix=f"{self.id} output")
+            new_output_list = create_board_var_list(model, n_new, id_prefix=f"{self.id} output",
+                                                    start_index=self.n_old, machine_id=self.id)
         elif self.input_type == Piece or self.input_type == PieceVars:
-            self.output_list = create_piece_var_list(model, self.n, id_prefix=f"{self.id} output")
-
-        for j in range(self.n):
-            for i in range(self.n):
-                # If input piece i goes to output j,
-                # then output[j] = input_list[i]
-                # Use create_conditional_copy to impose this condition
-                self.output_list[j].conditional_equality(
-                    model,
-                    self.reorder_vars[i, j],
-                    1,
-                    input_list[i],
-                    name=f"{self.id} input[{i}] output[{j}]"
-                    )
-    
+            new_output_list = create_piece_var_list(model, n_new, id_prefix=f"{self.id} output",
+                                                    start_index=self.n_old, machine_id=self.id)
+        self.output_list.extend(new_output_list)
+
+        for i, j in self.new_pairs():
+            # If input piece i goes to output j,
+            # then output[j] = input_list[i]
+            # Use create_conditional_copy to impose this condition
+            self.output_list[j].conditional_equality(
+                model,
+                self.reorder_vars[i, j],
+                1,
+                input_list[i],
+                name=f"{self.id} input[{i}] output[{j}]",
+                formulation=self.formulation
+                )
+        return new_output_list
+
     def define_swap_not_swap_decisions(self, model):
-        self.swap_decisions = model.addVars(self.n - 1,
+        new_swaps = range(max(self.n_old - 1, 0), self.n - 1)
+        swap_decisions = model.addVars(new_swaps,
                                        vtype=GRB.BINARY,
                                        name=f"{self.id} swap_decisions")
-        self.not_swap_decisions = model.addVars(self.n - 1,
+        not_swap_decisions = model.addVars(new_swaps,
                                            vtype=GRB.BINARY,
                                            name=f"{self.id} not_swap_decisions")
+        register_vars(model, swap_decisions, self.id,
+                      "swap_decisions", ('input',))
+        register_vars(model, not_swap_decisions, self.id,
+                      "not_swap_decisions", ('input',))
+        self.swap_decisions.update(swap_decisions)
+        self.not_swap_decisions.update(not_swap_decisions)
 
         # Impose swap and not swap to be different
-        for i in range(self.n - 1):
+        for i in new_swaps:
             model.addConstr(
                 self.not_swap_decisions[i] == 1 - self.swap_decisions[i],
                 name=f"{self.id} not_swap_decisions_[{i}]_constraint"
             )
 
     def define_reorder_vars(self, model):
-        self.reorder_vars = model.addVars(self.n, self.n,
-                                          vtype=GRB.BINARY,
-                                          name=f"{self.id} reorder_vars")
+        reorder_vars = model.addVars(self.new_pairs(),
+                                     vtype=GRB.BINARY,
+                                     name=f"{self.id} reorder_vars")
+        register_vars(model, reorder_vars, self.id, "reorder_vars",
+                      ('input', 'output'))
+        self.reorder_vars.update(reorder_vars)
 
         # Define reordering decision variables
         # If reorder_decision[i] == 1,
@@ -130,7 +201,7 @@ class ReorderMachine(GenericMachine):
 
         # Move a piece backwards whenever swap_decision[i] == 1
         # if swap_decisions[i] == 1, then reorder_vars[i + 1, i] = 1
-        for i in range(self.n - 1):
+        for i in range(max(self.n_old - 1, 0), self.n - 1):
             model.addConstr(
                 self.swap_decisions[i] == self.reorder_vars[i + 1, i],
                 name=f"{self.id} one_backwards_[{i}]"
@@ -145,8 +216,14 @@ class ReorderMachine(GenericMachine):
         # swap_decision[i+r-1] == 1, (none if r == 0)
         # swap_decision[i+r] == 0. (out of range if i == n-r)
         # Then reorder_vars[i, i+r] = 1
+        # Those with i + r < n_old - 1 were already in the model
+        # With a window, only r <= window, a longer sequence of swaps
+        # leaves input i without output and is infeasible
         for i in range(self.n):
-            for r in range(self.n - i - 1):
+            max_r = self.n - i - 1
+            if self.window is not None:
+                max_r = min(max_r, self.window + 1)
+            for r in range(max(self.n_old - 1 - i, 0), max_r):
                 # Check if input i goes to output i + r
                 self.necessary_swaps = []
                 for k in range(r):
@@ -158,22 +235,32 @@ class ReorderMachine(GenericMachine):
                 if i + r < self.n - 1:
                     # next swap
                     self.necessary_swaps.append(self.not_swap_decisions[i + r])
-                model.addGenConstrAnd(
+                add_and(
+                    model,
                     self.reorder_vars[i, i + r],
                     self.necessary_swaps,
+                    formulation=self.formulation,
                     name=f"{self.id} force_reorder_vars_[{i}]_[{i + r}]"
                 )
 
     def one_to_one_reordering(self, model):
                 
         # Each input piece must go to exactly one output
-        for i in range(self.n):
-            model.addConstr(
-                quicksum(self.reorder_vars[i, j] for j in range(self.n)) == 1,
+        for i in range(self.n_old):
+            for j in self.possible_outputs(i):
+                if j >= self.n_old:
+                    model.chgCoeff(self.input_rows[i], self.reorder_vars[i, j], 1)
+        for i in range(self.n_old, self.n):
+            self.input_rows.append(model.addConstr(
+                quicksum(self.reorder_vars[i, j] for j in self.possible_outputs(i)) == 1,
                 name=f"{self.id} input_piece_[{i}]_goes_to_one_output"
-            )
-        for j in range(self.n):
-            model.addConstr(
-                quicksum(self.reorder_vars[i, j] for i in range(self.n)) == 1,
+            ))
+        for j in range(self.n_old):
+            for i in self.possible_inputs(j):
+                if i >= self.n_old:
+                    model.chgCoeff(self.output_rows[j], self.reorder_vars[i, j], 1)
+        for j in range(self.n_old, self.n):
+            self.output_rows.append(model.addConstr(
+                quicksum(self.reorder_vars[i, j] for i in self.possible_inputs(j)) == 1,
                 name=f"{self.id} output_piece_[{j}]_comes_from_one_input"
-            )
+            ))
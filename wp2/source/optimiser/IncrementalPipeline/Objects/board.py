@@ -1,6 +1,14 @@
 """Define a board of wood"""
+import numpy as np
 from gurobipy import GRB, Model
 from IncrementalPipeline.config_loader import get_config
+from IncrementalPipeline.Tools.fixable_vars import add_fixable_var, add_fixable_vars
+from IncrementalPipeline.Tools.formulation import (
+    INDICATORS,
+    board_difference_bounds,
+    add_conditional_constr
+)
+from IncrementalPipeline.Tools.var_keys import register_item
 
 from typing import List, Tuple
 
@@ -31,6 +39,115 @@ class Board:
         self.bad_parts = bad_parts
 
 
+def _part_offsets(counts) -> np.ndarray:
+    return np.concatenate(([0], np.cumsum(counts, dtype=int)))
+
+
+class BoardBatch:
+    """
+    Boards stored in arrays, as read from a solution:
+    - lengths: float array of the lengths
+    - curved_parts, bad_parts: (number of parts, 2) float arrays
+    with the start and end of the parts of all boards, one after another
+    - curved_counts, bad_counts: int arrays with the number of parts
+    of every board
+
+    Behaves as a read-only list of Board, slices are batches too.
+    """
+    def __init__(self, lengths, curved_parts, curved_counts, bad_parts, bad_counts):
+        self.lengths = np.asarray(lengths, dtype=float)
+        self.curved_parts = np.asarray(curved_parts, dtype=float).reshape(-1, 2)
+        self.curved_counts = np.asarray(curved_counts, dtype=int)
+        self.bad_parts = np.asarray(bad_parts, dtype=float).reshape(-1, 2)
+        self.bad_counts = np.asarray(bad_counts, dtype=int)
+        self.curved_offsets = _part_offsets(self.curved_counts)
+        self.bad_offsets = _part_offsets(self.bad_counts)
+
+    @classmethod
+    def from_board_vars(cls, model, board_vars_list: list) -> "BoardBatch":
+        """
+        Reads the boards of the solution of the model,
+        with one getAttr call per attribute.
+        """
+        def read_parts(attribute):
+            variables = [var
+                         for board_vars in board_vars_list
+                         for part in getattr(board_vars, attribute)
+                         for var in part]
+            values = model.getAttr("X", variables) if variables else []
+            counts = [len(getattr(board_vars, attribute))
+                      for board_vars in board_vars_list]
+            return values, counts
+
+        if not board_vars_list:
+            return cls([], [], [], [], [])
+        lengths = model.getAttr("X", [board_vars.length
+                                      for board_vars in board_vars_list])
+        return cls(lengths, *read_parts("curved_parts"), *read_parts("bad_parts"))
+
+    @classmethod
+    def from_boards(cls, boards: list) -> "BoardBatch":
+        """
+        The batch of a list of Board, a batch is returned as it is.
+        """
+        if isinstance(boards, BoardBatch):
+            return boards
+        curved = [board.curved_parts or [] for board in boards]
+        bad = [board.bad_parts or [] for board in boards]
+        return cls([board.length for board in boards],
+                   [part for parts in curved for part in parts],
+                   [len(parts) for parts in curved],
+                   [part for parts in bad for part in parts],
+                   [len(parts) for parts in bad])
+
+    def __add__(self, other):
+        """
+        Concatenates the batch with a batch or a list of Board,
+        without making a Board per row.
+        """
+        if not isinstance(other, (BoardBatch, list)):
+            return NotImplemented
+        other = BoardBatch.from_boards(other)
+        return BoardBatch(np.concatenate((self.lengths, other.lengths)),
+                          np.concatenate((self.curved_parts, other.curved_parts)),
+                          np.concatenate((self.curved_counts, other.curved_counts)),
+                          np.concatenate((self.bad_parts, other.bad_parts)),
+                          np.concatenate((self.bad_counts, other.bad_counts)))
+
+    def __radd__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return BoardBatch.from_boards(other) + self
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            indices = range(*index.indices(len(self)))
+
+            def rows(offsets):
+                return np.array([row for i in indices
+                                 for row in range(offsets[i], offsets[i + 1])],
+                                dtype=int)
+
+            return BoardBatch(self.lengths[index],
+                              self.curved_parts[rows(self.curved_offsets)],
+                              self.curved_counts[index],
+                              self.bad_parts[rows(self.bad_offsets)],
+                              self.bad_counts[index])
+        index = range(len(self))[index]
+        curved = self.curved_parts[self.curved_offsets[index]:self.curved_offsets[index + 1]]
+        bad = self.bad_parts[self.bad_offsets[index]:self.bad_offsets[index + 1]]
+        return Board(length=float(self.lengths[index]),
+                     curved_parts=[tuple(part) for part in curved.tolist()],
+                     bad_parts=[tuple(part) for part in bad.tolist()])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
 class BoardVars:
     """
     A class to hold the Gurobi variables for a board.
@@ -39,39 +156,60 @@ class BoardVars:
     and end of curved parts
     - bad_parts: List of Gurobi variables for the start
     and end of bad parts
+
+    If key = (machine_id, input_index, output_index) is given,
+    the variables are registered under that structural identity.
     """
-    def __init__(self, model, board: Board = None, id: str = ""):
-        self.length = model.addVar(
-            vtype=GRB.CONTINUOUS,
-            name=f"{id} board_length"
+    def __init__(self, model, board: Board = None, id: str = "",
+                 key: tuple = None):
+        if board is None:
+            n_curved_parts = max_n_curved_parts
+            n_bad_parts = max_n_bad_parts
+        else:
+            # A known board is a constant, its variables are fixed
+            # through their bounds and it only gets the parts it has
+            n_curved_parts = len(board.curved_parts or [])
+            n_bad_parts = len(board.bad_parts or [])
+        self.length = add_fixable_var(
+            model,
+            name=f"{id} board_length",
+            value=None if board is None else board.length
         )
         self.curved_parts = [
             (
-                model.addVar(
-                    vtype=GRB.CONTINUOUS,
-                    name=f"{id} curved_part_start-{i}"
+                add_fixable_var(
+                    model,
+                    name=f"{id} curved_part_start-{i}",
+                    value=None if board is None else board.curved_parts[i][0]
                     ),
-                model.addVar(
-                    vtype=GRB.CONTINUOUS,
-                    name=f"{id} curved_part_end-{i}"
+                add_fixable_var(
+                    model,
+                    name=f"{id} curved_part_end-{i}",
+                    value=None if board is None else board.curved_parts[i][1]
                     )
             )
-            for i in range(max_n_curved_parts)
+            for i in range(n_curved_parts)
         ]
         self.bad_parts = [
             (
-                model.addVar(
-                    vtype=GRB.CONTINUOUS,
-                    name=f"{id} bad_part_start-{i}"
+                add_fixable_var(
+                    model,
+                    name=f"{id} bad_part_start-{i}",
+                    value=None if board is None else board.bad_parts[i][0]
                     ),
-                model.addVar(
-                    vtype=GRB.CONTINUOUS,
-                    name=f"{id} bad_part_end-{i}"
+                add_fixable_var(
+                    model,
+                    name=f"{id} bad_part_end-{i}",
+                    value=None if board is None else board.bad_parts[i][1]
                 )
             )
-            for i in range(max_n_bad_parts)
+            for i in range(n_bad_parts)
         ]
         self.id = id
+        # The known board, if any
+        self.board = board
+        if key is not None:
+            self.register(model, key)
         # # Bad part starts shuold be less than their ends
         # for i in range(max_n_bad_parts):
         #     start_var, end_var = self.bad_parts[i]
@@ -84,78 +222,185 @@ class BoardVars:
         #         start_var <= end_var,
         #         name=f"{id} curved_part_start_end_constraint-{i}")
 
-        # If board is provided, set the initial values
-        if board is not None:
-            my_var = model.addVar(vtype=GRB.BINARY,
-                                  name=f"{id} board_activate")
-            model.addConstr(my_var == 1)
-            self.conditional_equality(model, my_var, 1, board)
+    @property
+    def board(self) -> Board:
+        """
+        The known board, if any. For a row (batch, index) of a BoardBatch,
+        the Board is only made when it is asked for.
+        """
+        if isinstance(self._board, tuple):
+            batch, index = self._board
+            return batch[index]
+        return self._board
+
+    @board.setter
+    def board(self, board):
+        self._board = board
+
+    @classmethod
+    def from_vars(cls, length, curved_parts, bad_parts, id: str = "",
+                  board=None):
+        """
+        A BoardVars over variables that are already in the model,
+        e.g. one row of the blocks made by create_board_vars.
+        board is the known Board or a row (batch, index) of a BoardBatch.
+        """
+        board_vars = cls.__new__(cls)
+        board_vars.length = length
+        board_vars.curved_parts = curved_parts
+        board_vars.bad_parts = bad_parts
+        board_vars.id = id
+        board_vars.board = board
+        return board_vars
+
+    def register(self, model, key: tuple):
+        """
+        Registers the variables of the board under the structural
+        identity key = (machine_id, input_index, output_index).
+        """
+        machine_id, input_index, output_index = key
+        role_vars = [("board_length", None, self.length)]
+        for i, (start_var, end_var) in enumerate(self.curved_parts):
+            role_vars.append(("curved_part_start", i, start_var))
+            role_vars.append(("curved_part_end", i, end_var))
+        for i, (start_var, end_var) in enumerate(self.bad_parts):
+            role_vars.append(("bad_part_start", i, start_var))
+            role_vars.append(("bad_part_end", i, end_var))
+        register_item(model, machine_id, input_index, output_index, role_vars)
 
     def conditional_equality(self,
                              model,
                              my_var,
                              value,
                              board: Board,
-                             name: str = ""):
+                             name: str = "",
+                             formulation: str = INDICATORS):
         """
         If my_var == 1, then the Gurobi variables
         will be equal to the board's attributes.
         """
-        model.addGenConstrIndicator(my_var, value, self.length == board.length)
+        def add_equality(var, other, equality_name):
+            add_conditional_constr(model, my_var, value, var - other, '==', 0,
+                                   bounds=board_difference_bounds,
+                                   formulation=formulation,
+                                   name=equality_name)
+
+        add_equality(self.length, board.length, f"{name}_length")
 
-        for i, curved_interval in enumerate(board.curved_parts):
+        for i, curved_interval in enumerate(board.curved_parts or []):
             start_var, end_var = self.curved_parts[i]
             start, end = curved_interval
-            model.addGenConstrIndicator(my_var,
-                                        value,
-                                        start_var == start,
-                                        name=f"{name}_curved_start_{i}")
-            model.addGenConstrIndicator(my_var,
-                                        value,
-                                        end_var == end,
-                                        name=f"{name}_curved_end_{i}")
-
-        for i, bad_interval in enumerate(board.bad_parts):
+            add_equality(start_var, start, f"{name}_curved_start_{i}")
+            add_equality(end_var, end, f"{name}_curved_end_{i}")
+
+        for i, bad_interval in enumerate(board.bad_parts or []):
             start_var, end_var = self.bad_parts[i]
             start, end = bad_interval
-            model.addGenConstrIndicator(my_var,
-                                        value,
-                                        start_var == start,
-                                        name=f"{name}_bad_start_{i}")
-            model.addGenConstrIndicator(my_var, value,
-                                        end_var == end,
-                                        name=f"{name}_bad_end_{i}")
+            add_equality(start_var, start, f"{name}_bad_start_{i}")
+            add_equality(end_var, end, f"{name}_bad_end_{i}")
+
+
+def _parts_of_boards(boards, attribute, n_parts):
+    """
+    Returns the number of parts of every board and the (number of parts, 2)
+    array of their start and end, None if no board is known.
+    Unknown boards (None) get n_parts parts.
+    """
+    counts = [n_parts if board is None else len(getattr(board, attribute) or [])
+              for board in boards]
+    values = None
+    if any(board is not None for board in boards):
+        values = np.full((sum(counts), 2), np.nan)
+        row = 0
+        for board, count in zip(boards, counts):
+            if board is not None and count > 0:
+                values[row:row + count] = getattr(board, attribute)
+            row += count
+    return counts, values
+
+
+def _add_parts_block(model, counts, values, name):
+    """
+    Adds the start and end variables of the parts of all boards
+    in two blocks, fixed to values if given,
+    and returns the list of (start, end) pairs of every board.
+    """
+    n_parts = int(sum(counts))
+    starts = add_fixable_vars(model, n_parts, name=f"{name}_start",
+                              values=None if values is None else values[:, 0]).tolist()
+    ends = add_fixable_vars(model, n_parts, name=f"{name}_end",
+                            values=None if values is None else values[:, 1]).tolist()
+    parts = []
+    row = 0
+    for count in counts:
+        parts.append(list(zip(starts[row:row + count], ends[row:row + count])))
+        row += count
+    return parts
+
+
+def create_board_vars(model: Model, ids: List[str], keys: List[tuple] = None,
+                      boards: List[Board] = None, name: str = "") -> List[BoardVars]:
+    """
+    Create one BoardVars per id, with one block of variables
+    per attribute instead of one variable at a time.
+    If boards are given (a list of Board, None for an unknown board,
+    or a BoardBatch), the variables of the known boards are fixed
+    to their attributes,
+    if keys are given, every BoardVars is registered under its key.
+    """
+    if isinstance(boards, BoardBatch):
+        lengths = boards.lengths
+        curved = boards.curved_counts.tolist(), boards.curved_parts
+        bad = boards.bad_counts.tolist(), boards.bad_parts
+        known_boards = [(boards, index) for index in range(len(boards))]
+    else:
+        if boards is None:
+            boards = [None] * len(ids)
+        lengths = None
+        if any(board is not None for board in boards):
+            lengths = [np.nan if board is None else board.length for board in boards]
+        curved = _parts_of_boards(boards, "curved_parts", max_n_curved_parts)
+        bad = _parts_of_boards(boards, "bad_parts", max_n_bad_parts)
+        known_boards = boards
+    length_vars = add_fixable_vars(model, len(ids), name=f"{name} board_length",
+                                   values=lengths).tolist()
+    curved_parts = _add_parts_block(model, *curved, f"{name} curved_part")
+    bad_parts = _add_parts_block(model, *bad, f"{name} bad_part")
+    board_vars = [BoardVars.from_vars(*attributes)
+                  for attributes in zip(length_vars, curved_parts, bad_parts,
+                                        ids, known_boards)]
+    if keys is not None:
+        for board_var, key in zip(board_vars, keys):
+            board_var.register(model, key)
+    return board_vars
 
 
 def create_board_var_list(
         model: Model,
         n,
         id_prefix: str,
-        start_index: int = 0
+        start_index: int = 0,
+        machine_id: str = None
         ) -> List[BoardVars]:
     """
     Create a list of BoardVars of length n.
+    If machine_id is given, they are registered as outputs of that machine.
     """
-    return [BoardVars(model, id=f"{id_prefix}-[{i}]")
-            for i in range(start_index, start_index + n)]
+    indices = range(start_index, start_index + n)
+    return create_board_vars(
+        model,
+        ids=[f"{id_prefix}-[{i}]" for i in indices],
+        keys=None if machine_id is None else [(machine_id, None, i) for i in indices],
+        name=id_prefix
+    )
 
 
 def create_board_list_from_board_vars(
         model: Model,
         board_vars_list: List[BoardVars]
-        ) -> List[Board]:
-    """
-    Create a list of Board objects from a list of BoardVars.
-    """
-    boards = []
-    for board_vars in board_vars_list:
-        curved_parts = [(board_vars.curved_parts[i][0].X,
-                         board_vars.curved_parts[i][1].X)
-                        for i in range(max_n_curved_parts)]
-        bad_parts = [(board_vars.bad_parts[i][0].X,
-                      board_vars.bad_parts[i][1].X)
-                     for i in range(max_n_bad_parts)]
-        boards.append(Board(length=board_vars.length.X,
-                            curved_parts=curved_parts,
-                            bad_parts=bad_parts))
-    return boards
+        ) -> BoardBatch:
+    """
+    Create a batch of Board objects from a list of BoardVars,
+    with the values of the solution of the model.
+    """
+    return BoardBatch.from_board_vars(model, board_vars_list)
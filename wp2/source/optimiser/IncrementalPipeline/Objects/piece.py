@@ -1,7 +1,15 @@
 """Define a piece of wood"""
+import numpy as np
 from gurobipy import GRB
 from gurobipy import Model
 from typing import List
+from IncrementalPipeline.Tools.fixable_vars import add_fixable_var, add_fixable_vars
+from IncrementalPipeline.Tools.formulation import (
+    INDICATORS,
+    board_difference_bounds,
+    add_conditional_constr
+)
+from IncrementalPipeline.Tools.var_keys import register_item
 
 class Piece:
     """
@@ -17,50 +25,190 @@ class Piece:
         self.id = id
 
 
+class PieceBatch:
+    """
+    Pieces of wood stored in arrays, as read from a solution:
+    - lengths: float array of the lengths
+    - good: bool array of the qualities
+    - ids: list of the ids
+
+    Behaves as a read-only list of Piece, slices are batches too.
+    """
+    def __init__(self, lengths, good, ids: List[str] = None):
+        self.lengths = np.asarray(lengths, dtype=float)
+        # Binaries are read as floats close to 0 or 1
+        self.good = np.asarray(good, dtype=float) > 0.5
+        self.ids = [""] * len(self.lengths) if ids is None else list(ids)
+
+    @classmethod
+    def from_piece_vars(cls, model: Model, piece_vars: list) -> "PieceBatch":
+        """
+        Reads the pieces of the solution of the model,
+        with one getAttr call per attribute.
+        """
+        if not piece_vars:
+            return cls([], [])
+        lengths = model.getAttr("X", [piece_var.length for piece_var in piece_vars])
+        good = model.getAttr("X", [piece_var.good for piece_var in piece_vars])
+        return cls(lengths, good, [piece_var.id for piece_var in piece_vars])
+
+    @classmethod
+    def from_pieces(cls, pieces: list) -> "PieceBatch":
+        """
+        The batch of a list of Piece, a batch is returned as it is.
+        """
+        if isinstance(pieces, PieceBatch):
+            return pieces
+        return cls([piece.length for piece in pieces],
+                   [piece.good for piece in pieces],
+                   [piece.id for piece in pieces])
+
+    def __add__(self, other):
+        """
+        Concatenates the batch with a batch or a list of Piece,
+        without making a Piece per row.
+        """
+        if not isinstance(other, (PieceBatch, list)):
+            return NotImplemented
+        other = PieceBatch.from_pieces(other)
+        return PieceBatch(np.concatenate((self.lengths, other.lengths)),
+                          np.concatenate((self.good, other.good)),
+                          self.ids + other.ids)
+
+    def __radd__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return PieceBatch.from_pieces(other) + self
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PieceBatch(self.lengths[index], self.good[index], self.ids[index])
+        return Piece(length=float(self.lengths[index]),
+                     good=bool(self.good[index]),
+                     id=self.ids[index])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
 class PieceVars:
     """
     A class to hold the Gurobi variables for a piece of wood.
     - length: Gurobi variable for the length of the piece
     - good: Gurobi binary variable indicating if the piece is good
+
+    If key = (machine_id, input_index, output_index) is given,
+    the variables are registered under that structural identity.
     """
     def __init__(self, model: Model,
                  piece: Piece = None,
-                 id: str = ""):
-        self.length = model.addVar(
-            vtype=GRB.CONTINUOUS,
-            name=f"{id} piece_length"
+                 id: str = "",
+                 key: tuple = None):
+        # A known piece is a constant, its variables are fixed
+        # through their bounds
+        self.length = add_fixable_var(
+            model,
+            name=f"{id} piece_length",
+            value=None if piece is None else piece.length
         )
-        self.good = model.addVar(
-            vtype=GRB.BINARY,
-            name=f"{id} piece_good"
+        self.good = add_fixable_var(
+            model,
+            name=f"{id} piece_good",
+            value=None if piece is None else int(piece.good),
+            vtype=GRB.BINARY
         )
         self.id = id
+        if key is not None:
+            self.register(model, key)
+
+    @classmethod
+    def from_vars(cls, length, good, id: str = ""):
+        """
+        A PieceVars over variables that are already in the model,
+        e.g. one row of the blocks made by create_piece_vars.
+        """
+        piece_vars = cls.__new__(cls)
+        piece_vars.length = length
+        piece_vars.good = good
+        piece_vars.id = id
+        return piece_vars
 
-        # If a piece object is provided, enforce conditional equality
-        if piece is not None:
-            my_var = model.addVar(vtype=GRB.BINARY, name=f"{id} piece_activate")
-            model.addConstr(my_var == 1)
-            self.conditional_equality(model, my_var, 1, piece)
+    def register(self, model: Model, key: tuple):
+        """
+        Registers the variables of the piece under the structural
+        identity key = (machine_id, input_index, output_index).
+        """
+        machine_id, input_index, output_index = key
+        register_item(model, machine_id, input_index, output_index,
+                      [("piece_length", None, self.length),
+                       ("piece_good", None, self.good)])
 
-    def conditional_equality(self, model: Model, my_var, value, piece: Piece, name: str = ""):
+    def conditional_equality(self, model: Model, my_var, value, piece: Piece, name: str = "",
+                             formulation: str = INDICATORS):
         """
         If my_var == 1, enforce that this piece's variables
         match the attributes of the given piece.
         """
         expression = self.length - piece.length
-        model.addGenConstrIndicator(my_var, value, expression == 0, name=f"{name}_length")
-        model.addGenConstrIndicator(my_var, value, self.good == piece.good, name=f"{name}_good")
+        add_conditional_constr(model, my_var, value, expression, '==', 0,
+                               bounds=board_difference_bounds,
+                               formulation=formulation,
+                               name=f"{name}_length")
+        add_conditional_constr(model, my_var, value, self.good - piece.good, '==', 0,
+                               bounds=(-1, 1),
+                               formulation=formulation,
+                               name=f"{name}_good")
+
+
+def create_piece_vars(model: Model, ids: List[str], keys: List[tuple] = None,
+                      pieces: List[Piece] = None, name: str = "") -> List[PieceVars]:
+    """
+    Create one PieceVars per id, with one block of variables
+    per attribute instead of one variable at a time.
+    If pieces are given (a list of Piece or a PieceBatch), the variables
+    are fixed to their attributes,
+    if keys are given, every PieceVars is registered under its key.
+    """
+    n = len(ids)
+    lengths, goods = None, None
+    if isinstance(pieces, PieceBatch):
+        lengths, goods = pieces.lengths, pieces.good.astype(int)
+    elif pieces is not None:
+        lengths = [piece.length for piece in pieces]
+        goods = [int(piece.good) for piece in pieces]
+    length_vars = add_fixable_vars(model, n, name=f"{name} piece_length",
+                                   values=lengths).tolist()
+    good_vars = add_fixable_vars(model, n, name=f"{name} piece_good",
+                                 values=goods, vtype=GRB.BINARY).tolist()
+    piece_vars = [PieceVars.from_vars(length, good, id)
+                  for length, good, id in zip(length_vars, good_vars, ids)]
+    if keys is not None:
+        for piece_var, key in zip(piece_vars, keys):
+            piece_var.register(model, key)
+    return piece_vars
 
 
-def create_piece_var_list(model: Model, n, id_prefix: str, start_index: int=0) -> List[PieceVars]:
+def create_piece_var_list(model: Model, n, id_prefix: str, start_index: int=0, machine_id: str = None) -> List[PieceVars]:
     """
     Create a list of PieceVars of length n.
+    If machine_id is given, they are registered as outputs of that machine.
     """
-    return [PieceVars(model, id=f"{id_prefix}[{i}]") for i in range(start_index, start_index + n)]
+    indices = range(start_index, start_index + n)
+    return create_piece_vars(
+        model,
+        ids=[f"{id_prefix}[{i}]" for i in indices],
+        keys=None if machine_id is None else [(machine_id, None, i) for i in indices],
+        name=id_prefix
+    )
 
 
-def create_piece_list_from_piece_vars(model: Model, piece_vars: List[PieceVars], start_index: int=0) -> List[Piece]:
+def create_piece_list_from_piece_vars(model: Model, piece_vars: List[PieceVars]) -> PieceBatch:
     """
-    Create a list of Piece objects from a list of PieceVars.
+    Create a batch of Piece objects from a list of PieceVars,
+    with the values of the solution of the model.
     """
-    return [Piece(length=piece_var.length.X, good=piece_var.good.X, id=f"{piece_var.id}") for piece_var in piece_vars]
\ No newline at end of file
+    return PieceBatch.from_piece_vars(model, piece_vars)
@@ -0,0 +1,51 @@
+"""
+Solvers the models of a pipeline can be built for.
+
+The machines build their models through the gurobipy Model interface,
+and sum their terms with quicksum of this module, so that the same
+machines build:
+- GUROBI: a gurobipy Model,
+- CP_SAT: a CpSatModel (see Tools.cp_sat_model), solved by the CP-SAT
+  solver of OR-Tools, without a Gurobi licence and with its parallel
+  workers (parameter Threads).
+"""
+
+from numbers import Number
+import gurobipy
+from IncrementalPipeline.Tools.cp_sat_model import CpExpr, CpSatModel
+
+GUROBI = "gurobi"
+CP_SAT = "cp-sat"
+BACKENDS = (GUROBI, CP_SAT)
+
+
+def check_backend(backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported backend: {backend}, "
+                         f"expected one of {BACKENDS}")
+
+
+def create_model(backend: str = GUROBI):
+    """
+    Returns an empty model of the backend.
+    """
+    check_backend(backend)
+    if backend == GUROBI:
+        return gurobipy.Model()
+    return CpSatModel()
+
+
+def quicksum(terms):
+    """
+    Returns the sum of the terms, as gurobipy.quicksum does
+    for the variables of a gurobipy model.
+    """
+    terms = list(terms)
+    # The terms are all of the same model, numbers aside
+    first = next((term for term in terms if not isinstance(term, Number)), None)
+    if not isinstance(first, CpExpr):
+        return gurobipy.quicksum(terms)
+    total = CpExpr(first.model)
+    for term in terms:
+        total.add(term)
+    return total
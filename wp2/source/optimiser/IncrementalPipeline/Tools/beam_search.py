@@ -0,0 +1,422 @@
+"""
+Gurobi free heuristic for a pipeline of machines.
+
+A beam search cuts the known boards of the pipeline one piece at a time,
+deciding for every piece whether the filtering machine keeps it,
+and checks the rules of the checking machine directly on the seams
+of the layers the kept pieces form. Reordering machines keep the order.
+
+The best plan found gives a feasible solution in milliseconds,
+it can be used as MIP start with set_plan_as_start.
+"""
+
+import numpy as np
+from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.ReorderingMachine import ReorderMachine
+from IncrementalPipeline.Objects.board import BoardVars
+from IncrementalPipeline.Tools.candidate_cuts import candidate_cut_positions
+from IncrementalPipeline.Tools.intervals_intersect import process_intersect_intervals
+from IncrementalPipeline.Tools.simple_computations import (
+    max_pieces_per_board,
+    max_pieces_per_layer,
+    min_piece_length,
+    layer_length,
+    min_consecutive_distance,
+    compute_forbidden_zones
+)
+from IncrementalPipeline.Tools.var_keys import get_var_keys
+
+# Tolerance when comparing lengths
+EPSILON = 1e-6
+
+
+class LayerRules:
+    """
+    The rules of the CheckingMachine on the pieces it receives,
+    applied one kept piece at a time.
+
+    A layer state is a tuple (seams, previous_seams, closed), seams are
+    the positions after each piece of the current layer, previous_seams
+    those of the layer below, and closed is True once a layer was left
+    incomplete, after which only empty pieces may come.
+    """
+
+    def __init__(self, check: bool = True):
+        self.check = check
+        self.zones = [tuple(zone) for zone in compute_forbidden_zones()]
+        # The same pieces are added to the same states many times
+        self.cache = dict()
+
+    def start(self) -> tuple:
+        return ((), None, False)
+
+    def add(self, state: tuple, length: float):
+        """
+        Returns the layer state after adding a piece of the given length,
+        or None if the piece breaks a rule.
+        """
+        if not self.check:
+            return state
+        key = (state, length)
+        if key not in self.cache:
+            self.cache[key] = self._add(state, length)
+        return self.cache[key]
+
+    def _add(self, state: tuple, length: float):
+        seams, previous_seams, closed = state
+        if len(seams) == max_pieces_per_layer:
+            if abs(seams[-1] - layer_length) > EPSILON:
+                closed = True
+            previous_seams, seams = seams, ()
+        if closed and length > EPSILON:
+            return None
+
+        seam = (seams[-1] if seams else 0) + length
+        if seam > layer_length + EPSILON:
+            return None
+        if any(start + EPSILON < seam < end - EPSILON for start, end in self.zones):
+            return None
+
+        # The last seam of a layer is compared with no other seam
+        if previous_seams is not None and len(seams) + 1 < max_pieces_per_layer:
+            seam_zero = seam < EPSILON
+            seam_full = abs(seam - layer_length) < EPSILON
+            for lower in previous_seams[:-1]:
+                if (abs(lower - seam) < min_consecutive_distance - EPSILON
+                        and not (seam_zero and lower < EPSILON)
+                        and not (seam_full and abs(lower - layer_length) < EPSILON)):
+                    return None
+        return (seams + (seam,), previous_seams, closed)
+
+    def stuck(self, state: tuple) -> bool:
+        """
+        Returns True if no more pieces can be kept, because a layer
+        was left incomplete or the current one can no longer be completed.
+        """
+        if not self.check:
+            return False
+        seams, _, closed = state
+        if closed or not seams:
+            return closed
+        missing = layer_length - seams[-1]
+        if missing < EPSILON:
+            return False
+        return missing < min_piece_length or len(seams) == max_pieces_per_layer
+
+    def needs_padding(self, state: tuple) -> bool:
+        """
+        Returns True if the current layer is complete but has free slots,
+        which must be filled by empty pieces before the next layer.
+        """
+        seams = state[0]
+        return (self.check and 0 < len(seams) < max_pieces_per_layer
+                and abs(seams[-1] - layer_length) < EPSILON)
+
+    def pad(self, state: tuple, n_pieces: int):
+        """
+        Returns the layer state after n_pieces empty pieces,
+        as the filtering machine fills its free outputs with them.
+        """
+        # After the current layer and two empty layers nothing changes
+        n_pieces = min(n_pieces, 3 * max_pieces_per_layer - len(state[0]))
+        for _ in range(n_pieces):
+            if state is None:
+                return None
+            state = self.add(state, 0)
+        return state
+
+
+class HeuristicPlan:
+    """
+    A solution of the pipeline found without a solver:
+    - cuts: the cut positions of every board
+    - keep: for every input of the filtering machine, whether it is kept
+    - waste: the total length of the dropped pieces
+    """
+
+    def __init__(self, cuts: list, keep: list, waste: float):
+        self.cuts = cuts
+        self.keep = keep
+        self.waste = waste
+
+
+class _State:
+    """
+    A partial plan in the beam, the current board is cut up to pos,
+    left is the length of wood still to be decided on.
+    """
+    __slots__ = ("waste", "left", "layers", "n_kept", "cuts", "keep", "pos", "board_cuts")
+
+    def __init__(self, waste, left, layers, n_kept, cuts, keep, pos=0, board_cuts=()):
+        self.waste = waste
+        self.left = left
+        self.layers = layers
+        self.n_kept = n_kept
+        self.cuts = cuts
+        self.keep = keep
+        self.pos = pos
+        self.board_cuts = board_cuts
+
+    def signature(self):
+        return (round(self.waste, 6), self.layers, self.pos, len(self.board_cuts))
+
+
+class BeamSearchPlanner:
+    """
+    Finds a plan for a pipeline made of one CuttingMachine,
+    ReorderMachines, one filtering machine and optionally
+    a CheckingMachine, in this order.
+
+    At most beam_width partial plans are kept after every decision,
+    those with the least waste and, among them, the furthest cut.
+    A plan that cannot keep more pieces is ranked with the waste
+    of all the wood still to come.
+    """
+
+    def __init__(self, beam_width: int = 10):
+        if beam_width < 1:
+            raise ValueError(f"The beam width must be at least 1, got {beam_width}")
+        self.beam_width = beam_width
+
+    def plan(self, pipeline):
+        """
+        Returns the best HeuristicPlan for the current
+        intermediate lists of the pipeline.
+        """
+        cutting_index, filtering_index, checking_index = self.machine_indices(pipeline)
+        lists = pipeline.intermediate_lists
+        boards = [board.board if isinstance(board, BoardVars) else board
+                  for board in lists[cutting_index]]
+        # Pieces already waiting reach the filtering machine first
+        waiting = [piece for index in range(filtering_index, cutting_index, -1)
+                   for piece in lists[index]]
+        checked = [] if checking_index is None else list(lists[checking_index])
+        self.rules = LayerRules(check=checking_index is not None)
+        self.n_slots = len(checked) + len(waiting) + len(boards) * max_pieces_per_board
+
+        layers = self.rules.start()
+        for piece in checked:
+            if layers is not None:
+                layers = self.rules.add(layers, piece.length)
+        if layers is None:
+            raise ValueError("The pieces waiting for the checking machine break its rules")
+
+        left = (sum(piece.length for piece in waiting)
+                + sum(board.length for board in boards))
+        beam = [_State(0, left, layers, len(checked), [], [])]
+        for piece in waiting:
+            beam = self.best(child for state in beam
+                             for child in self.decide_waiting(state, piece))
+        for board in boards:
+            beam = self.best(self.cut(beam, board))
+
+        beam = [state for state in beam if self.can_finish(state)]
+        if not beam:
+            return self.drop_all(boards, waiting)
+        best = beam[0]
+        return HeuristicPlan(best.cuts, best.keep, best.waste)
+
+    def machine_indices(self, pipeline):
+        """
+        Returns the positions of the cutting, filtering and checking
+        machines, the checking one is None if there is none.
+        """
+        machines = pipeline.machines
+        kinds = [CuttingMachine, ReorderMachine, FilteringMachine, CheckingMachine]
+        order = []
+        for machine in machines:
+            kind = next((k for k in kinds if isinstance(machine, k)), None)
+            if kind is None:
+                raise ValueError(f"{machine.id} is not supported by the beam search")
+            order.append(kinds.index(kind))
+        if (order != sorted(order) or order.count(0) != 1 or order.count(2) != 1
+                or order[0] != 0 or order.count(3) > 1):
+            raise ValueError("The beam search needs one cutting machine, "
+                             "reordering machines, one filtering machine "
+                             "and at most one checking machine, in this order")
+        checking_index = order.index(3) if 3 in order else None
+        return 0, order.index(2), checking_index
+
+    def best(self, states) -> list:
+        """
+        Keeps the beam_width best different states.
+        """
+        unique = dict()
+        for state in states:
+            signature = state.signature()
+            if signature not in unique:
+                unique[signature] = state
+        states = list(unique.values())
+        if not states:
+            return []
+        expected_waste = np.array([state.waste for state in states], dtype=float)
+        stuck = np.array([self.rules.stuck(state.layers) for state in states])
+        left = np.array([state.left for state in states], dtype=float)
+        expected_waste += np.where(stuck, left, 0)
+        position = np.array([state.pos for state in states], dtype=float)
+        order = np.lexsort((-position, expected_waste))[:self.beam_width]
+        return [states[index] for index in order]
+
+    def decide_waiting(self, state, piece):
+        """
+        A piece already cut is either kept or dropped.
+        """
+        left = state.left - piece.length
+        yield _State(state.waste + piece.length, left, state.layers, state.n_kept,
+                     state.cuts, state.keep + [False])
+        if piece.good:
+            layers = self.rules.add(state.layers, piece.length)
+            if layers is not None:
+                yield _State(state.waste, left, layers, state.n_kept + 1,
+                             state.cuts, state.keep + [True])
+
+    def cut(self, beam, board):
+        """
+        Returns the states after cutting the whole board, which can
+        still be completed into a plan that follows the rules.
+        The pieces of the board are decided one by one for the whole beam.
+        """
+        candidates = candidate_cut_positions(board)
+        frontier = [_State(state.waste, state.left, state.layers, state.n_kept,
+                           state.cuts, state.keep) for state in beam]
+        done = []
+        while frontier:
+            children = []
+            for partial in frontier:
+                for child in self.next_pieces(partial, board, candidates):
+                    if len(child.board_cuts) == max_pieces_per_board:
+                        if self.can_finish(child):
+                            done.append(child)
+                    else:
+                        children.append(child)
+            frontier = self.best(children)
+
+        finished = []
+        for child in done:
+            # The last piece was added as a cut at the end of the board
+            cuts = list(child.board_cuts[:-1])
+            finished.append(_State(child.waste, child.left, child.layers, child.n_kept,
+                                   child.cuts + [cuts], child.keep))
+        return finished
+
+    def can_finish(self, state) -> bool:
+        """
+        Whether the empty pieces the filtering machine puts
+        at the end of its output follow the rules,
+        if every piece still to come is dropped.
+        """
+        return self.rules.pad(state.layers, self.n_slots - state.n_kept) is not None
+
+    def next_pieces(self, state, board, candidates):
+        """
+        Yields the states after the next piece of the board,
+        which ends at a candidate position, at a position that
+        gives a useful seam, or at the end of the board.
+        """
+        remaining = max_pieces_per_board - len(state.board_cuts)
+        pos = state.pos
+        if pos >= board.length - EPSILON:
+            # The rest of the pieces are empty
+            yield self.empty_piece(state, keep=self.rules.needs_padding(state.layers))
+            return
+
+        if self.rules.needs_padding(state.layers) and remaining > 1:
+            if not process_intersect_intervals(pos, pos, board.bad_parts or []):
+                yield self.empty_piece(state, keep=True)
+
+        ends = [board.length] if remaining == 1 else self.piece_ends(state, board, candidates)
+        for end in ends:
+            length = end - pos
+            good = not (0 < length < min_piece_length
+                        or process_intersect_intervals(pos, end, board.bad_parts or []))
+            yield self.add_piece(state, end, length, None, False)
+            if good:
+                layers = self.rules.add(state.layers, length)
+                if layers is not None:
+                    yield self.add_piece(state, end, length, layers, True)
+
+    def piece_ends(self, state, board, candidates) -> list:
+        """
+        Returns the positions after pos where the next piece may end.
+        """
+        seams, previous_seams, closed = state.layers
+        ends = set(candidates)
+        ends.add(board.length)
+        if not closed:
+            if len(seams) == max_pieces_per_layer:
+                base, targets = 0, set(seams[:-1])
+            else:
+                base, targets = (seams[-1] if seams else 0), set(previous_seams[:-1] if previous_seams else ())
+            seam_targets = {base + min_piece_length,
+                            layer_length - min_piece_length,
+                            layer_length}
+            for target in targets:
+                seam_targets.update((target - min_consecutive_distance,
+                                     target + min_consecutive_distance))
+            for zone in self.rules.zones:
+                seam_targets.update(zone)
+            ends.update(state.pos + target - base for target in seam_targets
+                        if base + min_piece_length <= target <= layer_length)
+        return sorted(end for end in ends
+                      if state.pos + EPSILON < end <= board.length)
+
+    def add_piece(self, state, end, length, layers, keep):
+        left = state.left - length
+        if keep:
+            return _State(state.waste, left, layers, state.n_kept + 1, state.cuts,
+                          state.keep + [True], end, state.board_cuts + (end,))
+        return _State(state.waste + length, left, state.layers, state.n_kept, state.cuts,
+                      state.keep + [False], end, state.board_cuts + (end,))
+
+    def empty_piece(self, state, keep):
+        layers = self.rules.add(state.layers, 0) if keep else None
+        return self.add_piece(state, state.pos, 0, layers, layers is not None)
+
+    def drop_all(self, boards, waiting):
+        """
+        Plan used if the beam is empty, every piece is dropped.
+        """
+        cuts = [[board.length] * (max_pieces_per_board - 1) for board in boards]
+        n_pieces = len(waiting) + len(boards) * max_pieces_per_board
+        waste = (sum(piece.length for piece in waiting)
+                 + sum(board.length for board in boards))
+        return HeuristicPlan(cuts, [False] * n_pieces, waste)
+
+
+def set_plan_as_start(model, pipeline, plan: HeuristicPlan, start_number: int = None):
+    """
+    Sets the Start attribute of the cuts, the reordering and the filtering
+    variables of a model built by pipeline.impose_conditions to the plan,
+    Gurobi completes the rest of the solution.
+
+    If start_number is given, the plan is set as that MIP start,
+    and the other starts are kept.
+    """
+    model.update()
+    if start_number is not None:
+        model.NumStart = max(model.NumStart, start_number + 1)
+        # The start values already set are lost without an update
+        model.update()
+        model.Params.StartNumber = start_number
+    machines = {machine.id: machine for machine in pipeline.machines}
+    start_vars = []
+    start_values = []
+    for (machine_id, role, input_index, output_index, local_index), var in get_var_keys(model).items():
+        machine = machines.get(machine_id)
+        if isinstance(machine, CuttingMachine) and role == "cuts":
+            value = plan.cuts[input_index][local_index]
+        elif isinstance(machine, ReorderMachine) and role == "swap_decisions":
+            value = 0
+        elif isinstance(machine, ReorderMachine) and role == "not_swap_decisions":
+            value = 1
+        elif isinstance(machine, ReorderMachine) and role == "reorder_vars":
+            value = int(input_index == output_index)
+        elif isinstance(machine, FilteringMachine) and role == "keep":
+            value = int(plan.keep[input_index])
+        else:
+            continue
+        start_vars.append(var)
+        start_values.append(value)
+    model.setAttr("Start", start_vars, start_values)
@@ -0,0 +1,41 @@
+"""
+Candidate cut positions of a known board, used by the
+CuttingMachine when it chooses the cuts among a few positions.
+"""
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Tools.intervals_intersect import process_intersect_intervals
+from IncrementalPipeline.Tools.simple_computations import (
+    min_piece_length,
+    layer_length
+)
+
+
+def candidate_cut_positions(board: Board) -> list:
+    """
+    Returns the sorted positions worth cutting the board at:
+    its ends and the boundaries of its bad parts, and the positions
+    at the minimum piece length and at the layer length from them.
+    """
+    boundaries = {0, board.length}
+    for start, end in board.bad_parts or []:
+        boundaries.update((start, end))
+    positions = set(boundaries)
+    for boundary in boundaries:
+        for offset in (min_piece_length, layer_length):
+            positions.update((boundary - offset, boundary + offset))
+    return sorted(position for position in positions
+                  if 0 <= position <= board.length)
+
+
+def bad_segments(positions: list, bad_parts: list) -> list:
+    """
+    Returns the indices t of the segments between positions[t] and
+    positions[t + 1] that intersect a bad part.
+
+    As the boundaries of the bad parts are positions,
+    every segment is either completely bad or completely good.
+    """
+    return [t for t in range(len(positions) - 1)
+            if process_intersect_intervals(positions[t],
+                                           positions[t + 1],
+                                           bad_parts or [])]
@@ -0,0 +1,146 @@
+"""
+Checkpoints of an IncrementalMachine, to restart it where it stopped.
+
+A checkpoint is a gzipped json file with:
+- the intermediate lists of the pipeline, boards and pieces as plain values,
+- the inputs and outputs committed in the live model, see Pipeline.committed,
+- the waste produced so far and how many inputs entered the pipeline,
+- the last incumbent, the value of every variable by structural key
+  (see var_keys), with the machine changes that shift those keys
+  to the next model.
+
+The state is captured between two steps, which only reads the solution
+in bulk, and a CheckpointWriter writes it from a thread,
+so that the steps do not wait for the disk.
+"""
+
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Objects.piece import Piece
+
+CHECKPOINT_VERSION = 1
+
+
+def item_to_dict(item) -> dict:
+    if isinstance(item, Board):
+        return {"board": [item.length,
+                          [list(part) for part in item.curved_parts or []],
+                          [list(part) for part in item.bad_parts or []]]}
+    if isinstance(item, Piece):
+        return {"piece": [item.length, bool(item.good), item.id]}
+    raise ValueError(f"Cannot store {type(item).__name__} in a checkpoint, "
+                     f"only boards and pieces")
+
+
+def item_from_dict(data: dict):
+    if "board" in data:
+        length, curved_parts, bad_parts = data["board"]
+        return Board(length=length,
+                     curved_parts=[tuple(part) for part in curved_parts],
+                     bad_parts=[tuple(part) for part in bad_parts])
+    length, good, id = data["piece"]
+    return Piece(length=length, good=good, id=id)
+
+
+def checkpoint_state(pipeline, values: dict, machine_changes: dict,
+                     waste_produced: float, committed_waste: float,
+                     n_entered: int) -> dict:
+    """
+    Returns the state to store, values being the last incumbent by
+    structural key, and machine_changes the shift of its keys.
+    """
+    return {"version": CHECKPOINT_VERSION,
+            "intermediate_lists": [[item_to_dict(item) for item in items]
+                                   for items in pipeline.intermediate_lists],
+            "committed": {machine_id: list(counts)
+                          for machine_id, counts in pipeline.committed.items()},
+            "waste_produced": waste_produced,
+            "committed_waste": committed_waste,
+            "n_entered": n_entered,
+            "machine_changes": {machine_id: list(counts)
+                                for machine_id, counts in (machine_changes or dict()).items()},
+            "incumbent": [[*key, value] for key, value in values.items()]}
+
+
+def write_checkpoint(path: Path, state: dict):
+    """
+    Writes the state to path, replacing the previous checkpoint
+    only once the new one is complete.
+    """
+    path = Path(path)
+    temporary_path = path.with_name(path.name + ".tmp")
+    with gzip.open(temporary_path, "wt") as file:
+        json.dump(state, file, separators=(",", ":"))
+    os.replace(temporary_path, path)
+
+
+def read_checkpoint(path: Path) -> dict:
+    """
+    Reads a checkpoint written by write_checkpoint, with its lists
+    as boards and pieces, and its incumbent as key -> value.
+    """
+    with gzip.open(Path(path), "rt") as file:
+        state = json.load(file)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Checkpoint {path} has version {state.get('version')}, "
+                         f"expected {CHECKPOINT_VERSION}")
+    state["intermediate_lists"] = [[item_from_dict(data) for data in items]
+                                   for items in state["intermediate_lists"]]
+    state["committed"] = {machine_id: tuple(counts)
+                          for machine_id, counts in state["committed"].items()}
+    state["machine_changes"] = {machine_id: tuple(counts)
+                                for machine_id, counts in state["machine_changes"].items()}
+    state["incumbent"] = {tuple(row[:-1]): row[-1] for row in state["incumbent"]}
+    return state
+
+
+class CheckpointWriter:
+    """
+    Writes checkpoints to path from a thread. If a new state is
+    submitted before the last one is written, only the new one is.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.n_written = 0
+        self.error = None
+        self._pending = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, state: dict):
+        with self._condition:
+            self._pending = state
+            self._condition.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                state, self._pending = self._pending, None
+            try:
+                write_checkpoint(self.path, state)
+                self.n_written += 1
+            except Exception as error:
+                self.error = error
+
+    def close(self):
+        """
+        Writes the last state submitted, and raises the last
+        error of the writes if any.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,423 @@
+"""
+A model with the part of the gurobipy Model interface the machines use,
+solved by the CP-SAT solver of OR-Tools.
+
+The machines build it as a gurobipy model: variables, linear constraints
+written with the usual operators, indicator, AND and OR constraints and
+a linear objective. It is only translated to CP-SAT in optimize, so that
+its rows can still be changed (chgCoeff) or removed before, as the
+machines do when they extend a model, and its variables fixed (setAttr),
+as Pipeline.commit_decisions does.
+
+CP-SAT only has integer variables and coefficients:
+- continuous variables are integer ones, fine for the lengths and
+  positions of the machines with integer data (see Tools.integer_lengths),
+- variables without an upper bound get UNBOUNDED_VALUE,
+- a coefficient or constant which is not an integer raises a ValueError.
+Indicators become constraints with an enforcement literal.
+
+OR-Tools is only imported when such a model is created.
+"""
+
+from time import time
+from gurobipy import GRB
+from IncrementalPipeline.Tools.simple_computations import (
+    max_board_length,
+    layer_length
+)
+
+# Upper bound of the variables without one, the largest length
+# or position the machines model
+UNBOUNDED_VALUE = max(max_board_length, layer_length)
+
+# Gurobi parameters and the CP-SAT parameters they set
+PARAMETERS = {"TimeLimit": "max_time_in_seconds",
+              "Threads": "num_workers",
+              "MIPGap": "relative_gap_limit",
+              "Seed": "random_seed",
+              "OutputFlag": "log_search_progress"}
+
+# CP-SAT parameters of every model, the linear relaxation of all the
+# constraints gives the bounds the search needs, see
+# experiments/backend_benchmark.py
+DEFAULT_PARAMETERS = {"linearization_level": 2}
+
+
+def to_integer(value, name: str = "") -> int:
+    rounded = round(value)
+    if abs(value - rounded) > 1e-9:
+        raise ValueError(f"{name}: CP-SAT only accepts integer coefficients "
+                         f"and constants, got {value}")
+    return int(rounded)
+
+
+class CpExpr:
+    """
+    A linear expression, terms maps the index of a variable
+    to its coefficient.
+    """
+
+    def __init__(self, model, terms: dict = None, constant: float = 0):
+        self.model = model
+        self.terms = terms or dict()
+        self.constant = constant
+
+    def copy(self) -> "CpExpr":
+        return CpExpr(self.model, dict(self.terms), self.constant)
+
+    def add(self, other, multiplier: float = 1) -> "CpExpr":
+        """
+        Adds multiplier * other in place, other being an expression,
+        a variable or a number.
+        """
+        if isinstance(other, CpExpr):
+            for index, coefficient in other.terms.items():
+                self.terms[index] = self.terms.get(index, 0) + multiplier * coefficient
+            self.constant += multiplier * other.constant
+        else:
+            self.constant += multiplier * other
+        return self
+
+    def __add__(self, other):
+        return self.copy().add(other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self.copy().add(other, -1)
+
+    def __rsub__(self, other):
+        return (-self).add(other)
+
+    def __neg__(self):
+        return CpExpr(self.model, {index: -coefficient
+                                   for index, coefficient in self.terms.items()},
+                      -self.constant)
+
+    def __mul__(self, other):
+        if isinstance(other, CpExpr):
+            raise ValueError("CP-SAT models only have linear expressions")
+        return CpExpr(self.model, {index: coefficient * other
+                                   for index, coefficient in self.terms.items()},
+                      self.constant * other)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        return CpConstr(self - other, '==')
+
+    def __le__(self, other):
+        return CpConstr(self - other, '<=')
+
+    def __ge__(self, other):
+        return CpConstr(self - other, '>=')
+
+    __hash__ = None
+
+
+class CpVar(CpExpr):
+    """
+    A variable of a CpSatModel, its value in the solution is X.
+    """
+
+    def __init__(self, model, index: int):
+        super().__init__(model, {index: 1})
+        self.index = index
+
+    def copy(self) -> CpExpr:
+        return CpExpr(self.model, {self.index: 1})
+
+    def add(self, other, multiplier: float = 1):
+        return self.copy().add(other, multiplier)
+
+    @property
+    def VarName(self) -> str:
+        return self.model.var_names[self.index]
+
+    @property
+    def X(self) -> float:
+        return self.model.values[self.index]
+
+    def __hash__(self):
+        return hash((id(self.model), self.index))
+
+
+class CpConstr:
+    """
+    The linear constraint expr sense 0, sense being '<=', '>=' or '=='.
+    """
+
+    def __init__(self, expr: CpExpr, sense: str):
+        self.expr = expr
+        self.sense = sense
+        self.name = ""
+
+
+class CpGenConstr:
+    """
+    An indicator (binary == value => constr), AND or OR constraint,
+    gen_type being its GRB.GENCONSTR_ type.
+    """
+
+    def __init__(self, gen_type: int, binary: CpVar, value: int = None,
+                 constr: CpConstr = None, binaries: list = None, name: str = ""):
+        self.gen_type = gen_type
+        self.binary = binary
+        self.value = value
+        self.constr = constr
+        self.binaries = binaries
+        self.name = name
+
+
+def index_keys(indices: tuple) -> list:
+    """
+    Returns the keys of the variables of addVars, as gurobipy does:
+    an integer n stands for range(n), several indices for their product.
+    """
+    keys = [()]
+    for index in indices:
+        values = range(index) if isinstance(index, int) else list(index)
+        keys = [key + (value if isinstance(value, tuple) else (value,))
+                for key in keys for value in values]
+    return [key[0] if len(key) == 1 else key for key in keys]
+
+
+class CpSatModel:
+    """
+    A model built as a gurobipy Model and solved by CP-SAT,
+    see the module documentation for what it supports.
+    """
+
+    def __init__(self):
+        # Fails here, and not in optimize, if OR-Tools is not installed
+        from ortools.sat.python import cp_model  # noqa: F401
+        self.lower = []
+        self.upper = []
+        self.vtypes = []
+        self.var_names = []
+        self.constrs = []
+        self.gen_constrs = []
+        self.objective = CpExpr(self)
+        self.sense = GRB.MINIMIZE
+        # CP-SAT parameters
+        self.params = dict(DEFAULT_PARAMETERS)
+        self.values = None
+        self.Status = GRB.LOADED
+        self.SolCount = 0
+        self.ObjVal = None
+        self.ObjBound = None
+        self.Runtime = 0
+        self.NodeCount = 0
+
+    # Building
+
+    def addVar(self, lb: float = 0, ub: float = GRB.INFINITY,
+               vtype=GRB.CONTINUOUS, name: str = "") -> CpVar:
+        self.lower.append(lb)
+        self.upper.append(ub)
+        self.vtypes.append(vtype)
+        self.var_names.append(name)
+        return CpVar(self, len(self.lower) - 1)
+
+    def addVars(self, *indices, lb: float = 0, ub: float = GRB.INFINITY,
+                vtype=GRB.CONTINUOUS, name: str = "") -> dict:
+        return {key: self.addVar(lb=lb, ub=ub, vtype=vtype, name=f"{name}[{key}]")
+                for key in index_keys(indices)}
+
+    def addMVar(self, shape, lb=0, ub=GRB.INFINITY, vtype=GRB.CONTINUOUS,
+                name: str = ""):
+        """
+        Returns an array of variables, only one dimensional shapes.
+        """
+        import numpy as np
+        n = shape if isinstance(shape, int) else shape[0]
+        lower = np.broadcast_to(lb, (n,))
+        upper = np.broadcast_to(ub, (n,))
+        return np.array([self.addVar(lb=float(lower[i]), ub=float(upper[i]), vtype=vtype,
+                                     name=f"{name}[{i}]") for i in range(n)],
+                        dtype=object)
+
+    def addConstr(self, constr: CpConstr, name: str = "") -> CpConstr:
+        if not isinstance(constr, CpConstr):
+            raise ValueError(f"{name}: not a linear constraint of a CP-SAT model")
+        constr.name = name
+        self.constrs.append(constr)
+        return constr
+
+    def addConstrs(self, constrs, name: str = "") -> list:
+        return [self.addConstr(constr, name=name) for constr in constrs]
+
+    def addGenConstrIndicator(self, binvar, binval, lhs, sense=None, rhs=None,
+                              name: str = "") -> CpGenConstr:
+        constr = lhs if sense is None else CpConstr(lhs - rhs, sense)
+        gen_constr = CpGenConstr(GRB.GENCONSTR_INDICATOR, binvar, value=int(binval),
+                                 constr=constr, name=name)
+        self.gen_constrs.append(gen_constr)
+        return gen_constr
+
+    def addGenConstrAnd(self, resvar, vars, name: str = "") -> CpGenConstr:
+        gen_constr = CpGenConstr(GRB.GENCONSTR_AND, resvar, binaries=list(vars), name=name)
+        self.gen_constrs.append(gen_constr)
+        return gen_constr
+
+    def addGenConstrOr(self, resvar, vars, name: str = "") -> CpGenConstr:
+        gen_constr = CpGenConstr(GRB.GENCONSTR_OR, resvar, binaries=list(vars), name=name)
+        self.gen_constrs.append(gen_constr)
+        return gen_constr
+
+    def chgCoeff(self, constr: CpConstr, var: CpVar, value: float):
+        constr.expr.terms[var.index] = value
+
+    def remove(self, items):
+        """
+        Removes constraints, the variables stay without constraints.
+        """
+        if not isinstance(items, (list, tuple)):
+            items = [items]
+        removed = {id(item) for item in items}
+        self.constrs = [constr for constr in self.constrs if id(constr) not in removed]
+        self.gen_constrs = [gen_constr for gen_constr in self.gen_constrs
+                            if id(gen_constr) not in removed]
+
+    def setObjective(self, expr, sense=GRB.MINIMIZE):
+        self.objective = CpExpr(self).add(expr)
+        self.sense = sense
+
+    def getObjective(self) -> CpExpr:
+        return self.objective.copy()
+
+    def update(self):
+        pass
+
+    def setParam(self, name: str, value):
+        """
+        Sets a Gurobi parameter of PARAMETERS, or a CP-SAT parameter.
+        """
+        from ortools.sat.sat_parameters_pb2 import SatParameters
+        if name == "OutputFlag":
+            value = bool(value)
+        name = PARAMETERS.get(name, name)
+        if name not in SatParameters.DESCRIPTOR.fields_by_name:
+            raise ValueError(f"Parameter {name} is neither a CP-SAT parameter "
+                             f"nor one of {list(PARAMETERS)}")
+        self.params[name] = value
+
+    # Size, as read by Tools.model_size
+
+    @property
+    def NumVars(self) -> int:
+        return len(self.lower)
+
+    @property
+    def NumConstrs(self) -> int:
+        return len(self.constrs)
+
+    @property
+    def NumGenConstrs(self) -> int:
+        return len(self.gen_constrs)
+
+    @property
+    def NumNZs(self) -> int:
+        return sum(len(constr.expr.terms) for constr in self.constrs)
+
+    def getGenConstrs(self) -> list:
+        return list(self.gen_constrs)
+
+    def getAttr(self, attribute: str, items: list) -> list:
+        if attribute == "GenConstrType":
+            return [gen_constr.gen_type for gen_constr in items]
+        if attribute == "X":
+            return [self.values[var.index] for var in items]
+        if attribute in ("LB", "UB", "VType"):
+            values = {"LB": self.lower, "UB": self.upper, "VType": self.vtypes}[attribute]
+            return [values[var.index] for var in items]
+        raise ValueError(f"Attribute {attribute} is not available in a CP-SAT model")
+
+    def setAttr(self, attribute: str, items: list, values: list):
+        """
+        Sets the bounds or types of variables, e.g. to fix the ones
+        of the decisions committed by Pipeline.commit_decisions.
+        """
+        if attribute not in ("LB", "UB", "VType"):
+            raise ValueError(f"Attribute {attribute} cannot be set in a CP-SAT model")
+        attributes = {"LB": self.lower, "UB": self.upper, "VType": self.vtypes}[attribute]
+        for var, value in zip(items, values):
+            attributes[var.index] = value
+
+    # Solving
+
+    def cp_expression(self, cp_vars: list, expr: CpExpr, name: str):
+        from ortools.sat.python import cp_model
+        indices = [index for index, coefficient in expr.terms.items() if coefficient != 0]
+        return cp_model.LinearExpr.weighted_sum(
+            [cp_vars[index] for index in indices],
+            [to_integer(expr.terms[index], name) for index in indices]
+        ) + to_integer(expr.constant, name)
+
+    def add_cp_constr(self, cp, cp_vars: list, constr: CpConstr):
+        expression = self.cp_expression(cp_vars, constr.expr, constr.name)
+        if constr.sense == '==':
+            return cp.Add(expression == 0)
+        if constr.sense == '<=':
+            return cp.Add(expression <= 0)
+        return cp.Add(expression >= 0)
+
+    def build(self):
+        """
+        Returns the CP-SAT model and its variables.
+        """
+        from ortools.sat.python import cp_model
+        cp = cp_model.CpModel()
+        cp_vars = []
+        for index, (lower, upper) in enumerate(zip(self.lower, self.upper)):
+            if self.vtypes[index] == GRB.BINARY:
+                lower, upper = max(lower, 0), min(upper, 1)
+            elif upper >= GRB.INFINITY:
+                upper = UNBOUNDED_VALUE
+            cp_vars.append(cp.NewIntVar(to_integer(lower, self.var_names[index]),
+                                        to_integer(upper, self.var_names[index]),
+                                        self.var_names[index]))
+        for constr in self.constrs:
+            self.add_cp_constr(cp, cp_vars, constr)
+        for gen_constr in self.gen_constrs:
+            binary = cp_vars[gen_constr.binary.index]
+            if gen_constr.gen_type == GRB.GENCONSTR_INDICATOR:
+                literal = binary if gen_constr.value else binary.Not()
+                self.add_cp_constr(cp, cp_vars, gen_constr.constr).OnlyEnforceIf(literal)
+                continue
+            binaries = [cp_vars[var.index] for var in gen_constr.binaries]
+            if gen_constr.gen_type == GRB.GENCONSTR_AND:
+                cp.AddBoolAnd(binaries).OnlyEnforceIf(binary)
+                cp.AddBoolOr([binary] + [var.Not() for var in binaries])
+            else:
+                cp.AddBoolOr(binaries).OnlyEnforceIf(binary)
+                cp.AddBoolAnd([var.Not() for var in binaries]).OnlyEnforceIf(binary.Not())
+        objective = self.cp_expression(cp_vars, self.objective, "objective")
+        if self.sense == GRB.MINIMIZE:
+            cp.Minimize(objective)
+        else:
+            cp.Maximize(objective)
+        return cp, cp_vars
+
+    def optimize(self):
+        from ortools.sat.python import cp_model
+        start_time = time()
+        cp, cp_vars = self.build()
+        solver = cp_model.CpSolver()
+        for name, value in self.params.items():
+            setattr(solver.parameters, name, value)
+        status = solver.Solve(cp)
+        if status == cp_model.MODEL_INVALID:
+            raise ValueError(f"Invalid CP-SAT model: {cp.Validate()}")
+        self.Status = {cp_model.OPTIMAL: GRB.OPTIMAL,
+                       cp_model.INFEASIBLE: GRB.INFEASIBLE}.get(status, GRB.TIME_LIMIT)
+        self.SolCount = int(status in (cp_model.OPTIMAL, cp_model.FEASIBLE))
+        self.NodeCount = solver.NumBranches()
+        if self.SolCount:
+            self.values = [solver.Value(var) for var in cp_vars]
+            self.ObjVal = solver.ObjectiveValue()
+            self.ObjBound = solver.BestObjectiveBound()
+        self.Runtime = time() - start_time
+
+    def dispose(self):
+        pass
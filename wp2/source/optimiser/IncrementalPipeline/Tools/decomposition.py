@@ -0,0 +1,209 @@
+"""
+Sequential decomposition of a pipeline, instead of one model for all
+its machines.
+
+The master model only has the cutting machine, the first one of the
+pipeline, choosing its cuts among the candidate positions of the boards
+(see CuttingMachine candidate_cuts), so that the cuts of the boards are
+binary variables. Its objective theta is the waste of the pipeline,
+at least the length of the bad pieces, which the filtering
+machine has to drop.
+
+Every master solution gives concrete pieces, which the other machines
+process in a smaller model, the subproblem. Its result is sent back to
+the master as a cut on the binaries y of the cuts of the boards,
+S being the ones at 1 in the master solution:
+- infeasible: a no-good cut, sum(1 - y, S) + sum(y, not S) >= 1,
+- waste W: an optimality cut of the integer L-shaped method,
+  theta >= W * (1 - sum(1 - y, S) - sum(y, not S)),
+  W being the bound of the subproblem, so that the cut is valid
+  also if it was not solved to optimality, or not solved at all
+  in time, which never cuts off a cutting not proven infeasible.
+This stops once the master bound reaches the best waste found,
+or when the time or the iterations run out.
+"""
+
+from time import time
+from gurobipy import GRB, Model, quicksum
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Objects.board import BoardVars
+from IncrementalPipeline.Objects.piece import PieceBatch
+from IncrementalPipeline.Tools.candidate_cuts import candidate_cut_positions
+from IncrementalPipeline.Tools.simple_computations import max_board_length
+from IncrementalPipeline.Tools.var_keys import get_var_keys
+
+# Relative difference between bound and waste to stop at
+DECOMPOSITION_GAP = 1e-4
+
+
+class DecompositionResult:
+    """
+    Best waste found, with the pieces of the master solution that gave it,
+    the lower bound of the master, and how the decomposition went.
+    """
+
+    def __init__(self):
+        self.waste = None
+        self.pieces = None
+        self.bound = 0
+        self.iterations = 0
+        self.no_good_cuts = 0
+        self.optimality_cuts = 0
+        self.master_time = 0
+        self.subproblem_time = 0
+        self.runtime = 0
+        self.status = "time limit"
+
+    def __repr__(self):
+        return (f"DecompositionResult(waste={self.waste}, bound={self.bound}, "
+                f"iterations={self.iterations}, status={self.status!r})")
+
+
+def cut_binaries(model, machine_id: str) -> list:
+    """
+    Returns the binaries choosing the cuts of every board in the master.
+    """
+    return [var for key, var in get_var_keys(model).items()
+            if key[0] == machine_id and key[1] == "cut_before"]
+
+
+def distance_from(binaries: list, values: list):
+    """
+    Returns the number of binaries differing from the values,
+    as an expression.
+    """
+    return quicksum(1 - var if value > 0.5 else var
+                    for var, value in zip(binaries, values))
+
+
+def break_symmetry(master, cutting_machine, boards: list, pieces: list):
+    """
+    Puts the pieces of length 0 of every board after the others.
+
+    Pieces of length 0 are dropped without waste, so moving them
+    does not change the pieces the other machines get, but every place
+    they can take would be another master solution to cut off.
+    Pieces of positive length are at least the smallest distance
+    between two candidate positions of their board.
+    """
+    n_pieces = cutting_machine.max_pieces_per_board
+    for board_index, board in enumerate(boards):
+        known_board = board.board if isinstance(board, BoardVars) else board
+        positions = candidate_cut_positions(known_board)
+        min_distance = min(end - start for start, end in zip(positions, positions[1:]))
+        board_pieces = pieces[board_index * n_pieces:(board_index + 1) * n_pieces]
+        positive = master.addVars(n_pieces, vtype=GRB.BINARY,
+                                  name=f"board_{board_index}_positive")
+        master.addConstrs((piece.length <= known_board.length * positive[k]
+                           for k, piece in enumerate(board_pieces)),
+                          name=f"board_{board_index}_zero_length")
+        master.addConstrs((piece.length >= min_distance * positive[k]
+                           for k, piece in enumerate(board_pieces)),
+                          name=f"board_{board_index}_positive_length")
+        master.addConstrs((positive[k] >= positive[k + 1] for k in range(n_pieces - 1)),
+                          name=f"board_{board_index}_zero_length_last")
+
+
+def build_master(pipeline: Pipeline):
+    """
+    Returns the master model of the pipeline, its theta variable,
+    the binaries of the cuts and the pieces it outputs.
+    """
+    cutting_machine = pipeline.machines[0]
+    if not isinstance(cutting_machine, CuttingMachine) or not cutting_machine.candidate_cuts:
+        raise ValueError("The decomposition needs a cutting machine with candidate "
+                         "cuts as first machine, its cuts are binary variables")
+    master = Model()
+    master_pipeline = Pipeline(f"{pipeline.id}-master", [cutting_machine],
+                               intermediate_lists=[pipeline.intermediate_lists[0], []])
+    _, machines_output = master_pipeline.impose_conditions(master)
+    pieces = machines_output[cutting_machine.id]
+
+    # The bad pieces are waste whatever the other machines do
+    bad_waste = master.addVars(len(pieces), lb=0, name="bad_waste")
+    master.addConstrs((bad_waste[k] >= piece.length - max_board_length * piece.good
+                       for k, piece in enumerate(pieces)), name="bad_waste")
+    theta = master.addVar(lb=0, name="theta")
+    master.addConstr(theta >= bad_waste.sum(), name="theta_bad_waste")
+    master.setObjective(theta, GRB.MINIMIZE)
+    break_symmetry(master, cutting_machine, pipeline.intermediate_lists[0], pieces)
+    return master, theta, cut_binaries(master, cutting_machine.id), pieces
+
+
+def solve_subproblem(pipeline: Pipeline, pieces, time_limit: float):
+    """
+    Returns the model of the machines after the cutting machine
+    for the pieces, solved within time_limit.
+    """
+    lists = pipeline.intermediate_lists
+    subproblem_pipeline = Pipeline(f"{pipeline.id}-subproblem", pipeline.machines[1:],
+                                   intermediate_lists=[lists[1] + pieces] + lists[2:])
+    subproblem = Model()
+    subproblem.setParam('OutputFlag', 0)
+    subproblem_pipeline.impose_conditions(subproblem)
+    subproblem.setParam('TimeLimit', max(time_limit, 0))
+    subproblem.optimize()
+    return subproblem
+
+
+def solve_decomposed(pipeline: Pipeline, time_limit: float,
+                     max_iterations: int = 100,
+                     gap: float = DECOMPOSITION_GAP) -> DecompositionResult:
+    """
+    Solves the pipeline, for its current intermediate lists,
+    by the decomposition of this module within time_limit seconds.
+    """
+    start_time = time()
+    result = DecompositionResult()
+    master, theta, binaries, piece_vars = build_master(pipeline)
+    master.setParam('OutputFlag', 0)
+
+    while result.iterations < max_iterations:
+        time_left = time_limit - (time() - start_time)
+        if time_left <= 0:
+            break
+        result.iterations += 1
+        master.setParam('TimeLimit', time_left)
+        master.optimize()
+        result.master_time += master.Runtime
+        if master.Status == GRB.INFEASIBLE:
+            result.status = "infeasible" if result.waste is None else "optimal"
+            break
+        if master.SolCount == 0:
+            break
+        result.bound = max(result.bound, master.ObjBound)
+        if result.waste is not None and result.bound >= result.waste - gap * max(result.waste, 1):
+            result.status = "optimal"
+            break
+
+        values = master.getAttr("X", binaries)
+        pieces = PieceBatch.from_piece_vars(master, piece_vars)
+        subproblem = solve_subproblem(pipeline, pieces,
+                                      time_limit - (time() - start_time))
+        result.subproblem_time += subproblem.Runtime
+        distance = distance_from(binaries, values)
+        if subproblem.Status == GRB.INFEASIBLE:
+            master.addConstr(distance >= 1, name=f"no_good_{result.iterations}")
+            result.no_good_cuts += 1
+        else:
+            if subproblem.SolCount > 0 and (result.waste is None
+                                            or subproblem.ObjVal < result.waste):
+                result.waste = subproblem.ObjVal
+                result.pieces = pieces
+            # Without an answer in time, that cutting was not proven
+            # infeasible, the bound of the subproblem still holds for it
+            # (-inf if it did not get one, the waste is never negative)
+            subproblem_bound = max(subproblem.ObjBound, 0)
+            master.addConstr(theta >= subproblem_bound * (1 - distance),
+                             name=f"optimality_{result.iterations}")
+            result.optimality_cuts += 1
+        subproblem.dispose()
+    else:
+        result.status = "iteration limit"
+
+    if result.waste is not None and result.bound >= result.waste - gap * max(result.waste, 1):
+        result.status = "optimal"
+    result.runtime = time() - start_time
+    master.dispose()
+    return result
@@ -1,40 +1,175 @@
+"""
+Early stop policies for the solves of the pipeline models.
+
+A policy is given as callback to model.optimize, and stops the solve
+when its condition holds. Its state is kept per model, so the same
+policy can be used by several solves, in sequence or concurrently,
+and is dropped with the model.
+Every solve records its trajectory, the incumbent and the bound
+over time, see EarlyStopPolicy.trajectory.
+"""
+
+import threading
+import weakref
+from time import time
 from gurobipy import GRB
 
 IMPROVEMENT_THRESHOLD = 0.0001  # 0.01%
-MAX_NO_IMPROVE = 1000           # Max allowed checks without improvement
 
-# Use global variables or attach to model for tracking state
-last_obj = [None]      # Use list for mutability in closure
-no_improve_count = [0]
 
+class _Run:
+    """
+    State of one solve under a policy.
+    """
 
-def stopping_callback(model, where):
-    if where == GRB.Callback.MIP:
-        current_obj = model.cbGet(GRB.Callback.MIP_OBJBST)
+    def __init__(self, start_time: float):
+        self.start_time = start_time
+        self.best = None
+        self.last_improvement = start_time
+        self.trajectory = []
+        self.reason = None
 
-        if current_obj == GRB.INFINITY:
-            return  # No feasible solution yet
 
-        if last_obj[0] is None:
-            last_obj[0] = current_obj
-            return
+class EarlyStopPolicy:
+    """
+    Base policy, it never stops a solve but records its trajectory.
+
+    An incumbent improves when it is better than the last one by more
+    than improvement_threshold, relatively.
+    """
 
-        rel_diff = abs(current_obj - last_obj[0]) / max(abs(last_obj[0]), 1e-8)
+    def __init__(self, improvement_threshold: float = IMPROVEMENT_THRESHOLD):
+        self.improvement_threshold = improvement_threshold
+        self._lock = threading.Lock()
+        # Model -> _Run, the runs of models which no longer exist
+        # are dropped, and never reused by a new model
+        self._runs = weakref.WeakKeyDictionary()
 
-        if rel_diff < IMPROVEMENT_THRESHOLD:
-            no_improve_count[0] += 1
-        else:
-            no_improve_count[0] = 0  # Reset if we see improvement
-            last_obj[0] = current_obj
+    def start(self, model, step_start: float = None):
+        """
+        Starts a new solve of the model, the times of the policy are
+        measured from step_start, by default now.
+        """
+        with self._lock:
+            self._runs[model] = _Run(time() if step_start is None else step_start)
 
-        if no_improve_count[0] >= MAX_NO_IMPROVE:
-            print("Stopping: No improvement after 1000 checks.")
-            model.terminate()
+    def _run(self, model) -> _Run:
+        with self._lock:
+            if model not in self._runs:
+                self._runs[model] = _Run(time())
+            return self._runs[model]
 
-        # Optional: Also stop based on small relative gap between obj and bound
+    def __call__(self, model, where):
+        if where != GRB.Callback.MIP:
+            return
+        incumbent = model.cbGet(GRB.Callback.MIP_OBJBST)
         bound = model.cbGet(GRB.Callback.MIP_OBJBND)
-        if (abs(current_obj) > 1e-6 and
-            (abs(current_obj - bound) / abs(current_obj) <
-             IMPROVEMENT_THRESHOLD)):
-            print("Stopping: Relative gap below 0.01%.")
-            model.terminate()
+        now = time()
+        run = self._run(model)
+        with self._lock:
+            if not run.trajectory or run.trajectory[-1][1:] != (incumbent, bound):
+                run.trajectory.append((now - run.start_time, incumbent, bound))
+            if incumbent < GRB.INFINITY:
+                if (run.best is None or run.best - incumbent
+                        > self.improvement_threshold * max(abs(run.best), 1e-8)):
+                    run.best = incumbent
+                    run.last_improvement = now
+            reason = self.check(run, now, incumbent, bound)
+            if reason is None or run.reason is not None:
+                return
+            run.reason = reason
+        print(f"Stopping: {reason}")
+        model.terminate()
+
+    def check(self, run: _Run, now: float, incumbent: float, bound: float):
+        """
+        Returns why the solve must stop, or None to continue.
+        """
+        return None
+
+    def trajectory(self, model) -> list:
+        """
+        Returns the (seconds since start, incumbent, bound) of the
+        last solve of the model, the incumbent is GRB.INFINITY
+        before the first solution.
+        """
+        return list(self._run(model).trajectory)
+
+    def stop_reason(self, model):
+        """
+        Returns why the last solve of the model was stopped,
+        or None if the policy did not stop it.
+        """
+        return self._run(model).reason
+
+
+class GapTarget(EarlyStopPolicy):
+    """
+    Stops once the relative gap between incumbent and bound is below gap.
+    """
+
+    def __init__(self, gap: float = IMPROVEMENT_THRESHOLD, **kwargs):
+        super().__init__(**kwargs)
+        self.gap = gap
+
+    def check(self, run, now, incumbent, bound):
+        if incumbent == GRB.INFINITY:
+            return None
+        if abs(incumbent - bound) <= self.gap * max(abs(incumbent), 1e-6):
+            return f"relative gap below {self.gap}."
+        return None
+
+
+class StallWindow(EarlyStopPolicy):
+    """
+    Stops once the incumbent has not improved for window seconds.
+    """
+
+    def __init__(self, window: float, **kwargs):
+        super().__init__(**kwargs)
+        self.window = window
+
+    def check(self, run, now, incumbent, bound):
+        if run.best is not None and now - run.last_improvement >= self.window:
+            return f"no improvement in {self.window} seconds."
+        return None
+
+
+class StepDeadline(EarlyStopPolicy):
+    """
+    Stops once seconds have passed since the start of the step,
+    as soon as there is a solution.
+    """
+
+    def __init__(self, seconds: float, **kwargs):
+        super().__init__(**kwargs)
+        self.seconds = seconds
+
+    def check(self, run, now, incumbent, bound):
+        if incumbent < GRB.INFINITY and now - run.start_time >= self.seconds:
+            return f"{self.seconds} seconds of the step used."
+        return None
+
+
+class AnyPolicy(EarlyStopPolicy):
+    """
+    Stops as soon as one of the policies would stop.
+    """
+
+    def __init__(self, *policies: EarlyStopPolicy, **kwargs):
+        super().__init__(**kwargs)
+        self.policies = policies
+
+    def check(self, run, now, incumbent, bound):
+        for policy in self.policies:
+            reason = policy.check(run, now, incumbent, bound)
+            if reason is not None:
+                return reason
+        return None
+
+
+def default_policy() -> EarlyStopPolicy:
+    """
+    Stops at a relative gap of 0.01% or after 10 seconds without improvement.
+    """
+    return AnyPolicy(GapTarget(IMPROVEMENT_THRESHOLD), StallWindow(10))
@@ -0,0 +1,36 @@
+"""Variables that can be fixed to a known value through their bounds."""
+import numpy as np
+from gurobipy import GRB, Model
+
+
+def add_fixable_var(model: Model,
+                    name: str,
+                    value: float = None,
+                    vtype=GRB.CONTINUOUS):
+    """
+    Adds a variable to the model, if value is given
+    the variable is fixed to it through its bounds.
+    """
+    if value is None:
+        return model.addVar(vtype=vtype, name=name)
+    return model.addVar(lb=value, ub=value, vtype=vtype, name=name)
+
+
+def add_fixable_vars(model: Model,
+                     shape,
+                     name: str,
+                     values=None,
+                     vtype=GRB.CONTINUOUS):
+    """
+    Adds a block of variables to the model with a single call,
+    returned as an MVar of the given shape.
+    If values is given (an array of that shape, NaN for unknown values),
+    the variables with a known value are fixed to it through their bounds.
+    """
+    if values is None:
+        return model.addMVar(shape, vtype=vtype, name=name)
+    values = np.asarray(values, dtype=float)
+    known = ~np.isnan(values)
+    lb = np.where(known, values, 0.0)
+    ub = np.where(known, values, GRB.INFINITY)
+    return model.addMVar(shape, lb=lb, ub=ub, vtype=vtype, name=name)
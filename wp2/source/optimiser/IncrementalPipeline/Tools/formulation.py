@@ -0,0 +1,147 @@
+"""
+Formulations of the logical constraints used by the machines.
+
+Two formulations are available:
+- INDICATORS: general constraints (addGenConstrIndicator, And, Or),
+  reformulated internally by Gurobi.
+- BIG_M: explicit linear rows, the big M of each row is computed
+  from the bounds of its expression, which come from the configuration
+  (BoardMaxLength for lengths and positions on a board,
+  BeamLength for lengths in a layer).
+
+Every function returns the list of constraints added to the model.
+"""
+
+from numbers import Number
+from gurobipy import LinExpr
+from IncrementalPipeline.Tools.backends import quicksum
+from IncrementalPipeline.Tools.simple_computations import (
+    max_board_length,
+    layer_length
+)
+
+INDICATORS = "indicators"
+BIG_M = "big_m"
+FORMULATIONS = (INDICATORS, BIG_M)
+
+# Bounds of the lengths and positions on a board
+board_bounds = (0, max_board_length)
+# Bounds of the difference of two lengths or positions on a board
+board_difference_bounds = (-max_board_length, max_board_length)
+# Bounds of a length within a layer
+layer_bounds = (0, layer_length)
+
+
+def check_formulation(formulation: str):
+    if formulation not in FORMULATIONS:
+        raise ValueError(f"Unsupported formulation: {formulation}, "
+                         f"expected one of {FORMULATIONS}")
+
+
+def constant_value(expr):
+    """
+    Returns the value of expr if it has no variables, else None.
+    """
+    if isinstance(expr, Number):
+        return expr
+    if isinstance(expr, LinExpr) and expr.size() == 0:
+        return expr.getConstant()
+    return None
+
+
+def add_conditional_constr(model,
+                           binary,
+                           value: int,
+                           expr,
+                           sense: str,
+                           rhs,
+                           bounds: tuple = None,
+                           formulation: str = INDICATORS,
+                           name: str = "") -> list:
+    """
+    If binary == value, then expr sense rhs,
+    sense is one of '<=', '>=', '=='.
+
+    bounds = (lower, upper) are bounds of expr over every feasible
+    solution, they are needed by the BIG_M formulation.
+    """
+    check_formulation(formulation)
+    if sense not in ('<=', '>=', '=='):
+        raise ValueError(f"Unsupported sense: {sense}")
+    constant = constant_value(expr)
+    if constant is not None and isinstance(rhs, Number):
+        # E.g. an empty sum, whether the constraint holds is known
+        holds = {'<=': constant <= rhs, '>=': constant >= rhs, '==': constant == rhs}[sense]
+        return [] if holds else [model.addConstr(binary == 1 - value, name=name)]
+
+    if formulation == INDICATORS:
+        if sense == '<=':
+            constr = expr <= rhs
+        elif sense == '>=':
+            constr = expr >= rhs
+        else:
+            constr = expr == rhs
+        return [model.addGenConstrIndicator(binary, value, constr, name=name)]
+
+    if bounds is None:
+        raise ValueError(f"{name}: the big M formulation needs bounds")
+    return [model.addConstr(row, name=f"{name}_{suffix}")
+            for suffix, row in big_m_rows(binary, value, expr, sense, rhs, bounds)]
+
+
+def big_m_rows(binary, value: int, expr, sense: str, rhs, bounds: tuple) -> list:
+    """
+    Returns the rows (suffix, constraint) of the big M formulation of
+    binary == value => expr sense rhs, without adding them to a model.
+    """
+    lower, upper = bounds
+    # 0 when the condition holds, 1 when it does not
+    relaxed = 1 - binary if value else binary
+    rows = []
+    if sense in ('<=', '=='):
+        big_m = upper - rhs
+        # If big_m <= 0 the bounds already imply the constraint
+        if big_m > 0:
+            rows.append(("upper", expr - rhs <= big_m * relaxed))
+    if sense in ('>=', '=='):
+        big_m = rhs - lower
+        if big_m > 0:
+            rows.append(("lower", expr - rhs >= -big_m * relaxed))
+    return rows
+
+
+def add_and(model,
+            res,
+            binaries: list,
+            formulation: str = INDICATORS,
+            name: str = "") -> list:
+    """
+    res = binaries[0] AND binaries[1] AND ...
+    """
+    check_formulation(formulation)
+    if formulation == INDICATORS:
+        return [model.addGenConstrAnd(res, binaries, name=name)]
+    added = [model.addConstr(res <= binary, name=f"{name}_{i}")
+             for i, binary in enumerate(binaries)]
+    added.append(model.addConstr(
+        res >= quicksum(binaries) - (len(binaries) - 1),
+        name=f"{name}_all"))
+    return added
+
+
+def add_or(model,
+           res,
+           binaries: list,
+           formulation: str = INDICATORS,
+           name: str = "") -> list:
+    """
+    res = binaries[0] OR binaries[1] OR ...
+    """
+    check_formulation(formulation)
+    if formulation == INDICATORS:
+        return [model.addGenConstrOr(res, binaries, name=name)]
+    added = [model.addConstr(res >= binary, name=f"{name}_{i}")
+             for i, binary in enumerate(binaries)]
+    added.append(model.addConstr(res <= quicksum(binaries),
+                                 name=f"{name}_any"))
+    return added
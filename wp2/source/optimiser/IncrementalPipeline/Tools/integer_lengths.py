@@ -0,0 +1,107 @@
+"""
+Lengths and positions as integer variables.
+
+The configuration and the boards of the problem data generator only
+have integer lengths, while the models have continuous length
+variables. With a length unit (see length_unit), every length and
+position on a board is a multiple of it: its variable becomes an
+integer multiple of the unit within [0, BoardMaxLength], see
+Pipeline.set_length_unit.
+
+For a unit of 1 the variables themselves become integer, otherwise
+each one is linked to an integer count of units, which presolve
+substitutes, so that the model is solved on the rescaled lengths.
+"""
+
+from math import gcd
+from gurobipy import GRB
+from IncrementalPipeline.config_loader import get_config
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.simple_computations import max_board_length
+from IncrementalPipeline.Tools.var_keys import get_var_keys
+
+# Roles of the registered variables that are lengths or positions on a board
+LENGTH_ROLES = ("board_length", "curved_part_start", "curved_part_end",
+                "bad_part_start", "bad_part_end", "piece_length", "cuts")
+
+# Lengths of the beam configuration the models use
+CONFIG_LENGTHS = ("BeamLength", "BeamSkipStart", "BeamSkipEnd",
+                  "MinLengthOfBoardInLayer", "BoardMaxLength",
+                  "GapToBoardAbutInConsecutiveLayers", "MaxShiftCurvedCut")
+
+
+def item_lengths(item) -> list:
+    if isinstance(item, Board):
+        return ([item.length]
+                + [value for part in item.curved_parts or [] for value in part]
+                + [value for part in item.bad_parts or [] for value in part])
+    if isinstance(item, Piece):
+        return [item.length]
+    raise ValueError(f"Only boards and pieces have lengths, got {type(item).__name__}")
+
+
+def length_unit(items: list, config: dict = None):
+    """
+    Returns the largest unit of which the lengths of the configuration
+    and of the items (boards or pieces) are multiples,
+    or None if one of them is not an integer.
+
+    The items must be all the ones that enter the models,
+    also the ones not known yet when a model is built.
+    """
+    if config is None:
+        config = get_config()
+    beam_configuration = config["BeamConfiguration"]
+    lengths = [beam_configuration[key] for key in CONFIG_LENGTHS]
+    for zone in beam_configuration["StaticForbiddenZones"]:
+        lengths.extend((zone["Begin"], zone["End"]))
+    for item in items:
+        lengths.extend(item_lengths(item))
+    unit = 0
+    for length in lengths:
+        if length != int(length):
+            return None
+        unit = gcd(unit, int(length))
+    return unit or None
+
+
+def check_length_unit(unit):
+    if unit is not None and (unit != int(unit) or unit < 1):
+        raise ValueError(f"The length unit must be a positive integer, got {unit}")
+
+
+def make_lengths_integer(model, unit: int = 1) -> int:
+    """
+    Makes the registered lengths and positions of the model that
+    are not integer yet integer multiples of unit, within
+    [0, BoardMaxLength] if not fixed. Returns how many were changed.
+    """
+    check_length_unit(unit)
+    model.update()
+    done = getattr(model, "_integer_lengths", None)
+    if done is None:
+        done = set()
+        model._integer_lengths = done
+    variables = dict()
+    for key, var in get_var_keys(model).items():
+        if key[1] in LENGTH_ROLES and var.index not in done:
+            # The same variables are registered as outputs and inputs
+            variables[var.index] = var
+    if not variables:
+        return 0
+    variables = list(variables.values())
+    upper = [min(bound, max_board_length)
+             for bound in model.getAttr("UB", variables)]
+    model.setAttr("UB", variables, upper)
+    if unit == 1:
+        model.setAttr("VType", variables, [GRB.INTEGER] * len(variables))
+    else:
+        # The known values are fixed by the bounds of the lengths only,
+        # so that they can be changed, see Tools.model_cache
+        units = model.addVars(len(variables), vtype=GRB.INTEGER,
+                              ub=max_board_length // unit, name="length_units")
+        model.addConstrs((var == unit * units[i] for i, var in enumerate(variables)),
+                         name="length_unit")
+    done.update(var.index for var in variables)
+    return len(variables)
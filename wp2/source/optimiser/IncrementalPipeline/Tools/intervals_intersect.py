@@ -5,8 +5,16 @@
 # if this binary variable is 1 (intersects) then endbadpart > startpiece and startbadpart < endpiece
 from gurobipy import Model, GRB
 from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Tools.formulation import (
+    INDICATORS,
+    board_difference_bounds,
+    add_conditional_constr,
+    add_and,
+    add_or
+)
 
-def intersect_intervals(model: Model, start_cut:int, end_cut, bad_intervals, name_prefix: str = ""):
+def intersect_intervals(model: Model, start_cut:int, end_cut, bad_intervals, name_prefix: str = "",
+                        formulation: str = INDICATORS):
     """
     Adds constraints to the model to ensure that no piece intersects with any bad part of the board.
 
@@ -16,6 +24,8 @@ def intersect_intervals(model: Model, start_cut:int, end_cut, bad_intervals, nam
     This is not a big issue here as the 'bad' option here is
     to have an intersection with a bad part of the board.
     In the sense that it is what makes the objective function grow.
+
+    formulation is INDICATORS or BIG_M, see Tools.formulation.
     """
     # create a list of binary variables for each bad interval
     # that indicates whether the piece intersects with the bad part
@@ -30,33 +40,43 @@ def intersect_intervals(model: Model, start_cut:int, end_cut, bad_intervals, nam
 
         # If the start of the bad part cannot possibly overlap with the end of the piece,
         # then the start of the bad part must be greater than or equal to the end of the piece
-        model.addGenConstrIndicator(
+        add_conditional_constr(
+            model,
             start_possibly_overlaps,
             0,
-            start_bad_interval >= end_cut,
+            start_bad_interval - end_cut, '>=', 0,
+            bounds=board_difference_bounds,
+            formulation=formulation,
             name=f"{name_prefix} intersect_bad_part_{i}_start_overlaps"
         )
         # If end cannot possibly overlap with the start of the bad part,
         # then the start of the piece must be greater than or equal to the end of the bad part
-        model.addGenConstrIndicator(
+        add_conditional_constr(
+            model,
             end_possibly_overlaps,
             0,
-            start_cut >= end_bad_interval,
+            start_cut - end_bad_interval, '>=', 0,
+            bounds=board_difference_bounds,
+            formulation=formulation,
             name=f"{name_prefix} intersect_bad_part_{i}_end_overlaps"
         )
         # Only if both overlap possibilities are preserved, the intervals intersect
-        model.addGenConstrAnd(
+        add_and(
+            model,
             intersect,
             [end_possibly_overlaps, start_possibly_overlaps],
+            formulation=formulation,
             name=f"{name_prefix} intersect_bad_part_{i}_indicator"
         )
         possible_intersections.append(intersect)
     
     # Add a variable to check if any intersection occurs
     any_intersection = model.addVar(vtype=GRB.BINARY, name=f"{name_prefix} any_intersection")
-    model.addGenConstrOr(
+    add_or(
+        model,
         any_intersection,
         possible_intersections,
+        formulation=formulation,
         name=f"{name_prefix} any_intersection_indicator"
     )
 
@@ -0,0 +1,122 @@
+"""
+Rules left out of the model and only added, with Gurobi lazy constraints,
+when a new incumbent violates them.
+
+A machine with lazy rules has a separate(model) method, called on every
+new incumbent (MIPSOL callback), which adds with model.cbLazy the big M
+rows of the rules it violates, see lazy_callback.
+The binaries of the rules are in the model from the start,
+as no variable can be added inside a callback.
+"""
+
+from gurobipy import GRB, LinExpr, quicksum
+from IncrementalPipeline.Tools.formulation import big_m_rows
+
+# Violations smaller than this are ignored
+LAZY_TOLERANCE = 1e-6
+
+
+def expression_value(expr, values: dict) -> float:
+    """
+    Returns the value of a linear expression,
+    values being a dictionary variable -> value.
+    """
+    return expr.getConstant() + sum(expr.getCoeff(i) * values[expr.getVar(i)]
+                                    for i in range(expr.size()))
+
+
+class LazyDisjunction:
+    """
+    The rule (C1) OR (C2) OR ..., each condition being (expr, sense, rhs)
+    with expr a linear expression with the given bounds,
+    and one binary per condition.
+    """
+
+    def __init__(self, conditions: list, bounds: list, binaries: list, name: str = ""):
+        # A single variable is also an expression
+        self.conditions = [(LinExpr(expr), sense, rhs)
+                           for expr, sense, rhs in conditions]
+        self.bounds = bounds
+        self.binaries = binaries
+        self.name = name
+        self._variables = None
+
+    def variables(self) -> list:
+        """
+        Returns the variables of the conditions.
+        """
+        if self._variables is None:
+            self._variables = [expr.getVar(i)
+                               for expr, _, _ in self.conditions
+                               for i in range(expr.size())]
+        return self._variables
+
+    def holds(self, values: dict) -> bool:
+        """
+        Returns whether any condition holds for the given values.
+        """
+        for expr, sense, rhs in self.conditions:
+            value = expression_value(expr, values)
+            if sense == '<=' and value <= rhs + LAZY_TOLERANCE:
+                return True
+            if sense == '>=' and value >= rhs - LAZY_TOLERANCE:
+                return True
+            if sense == '==' and abs(value - rhs) <= LAZY_TOLERANCE:
+                return True
+        return False
+
+    def rows(self) -> list:
+        """
+        Returns the big M rows of the rule.
+        """
+        rows = [row
+                for binary, (expr, sense, rhs), bounds
+                in zip(self.binaries, self.conditions, self.bounds)
+                for _, row in big_m_rows(binary, True, expr, sense, rhs, bounds)]
+        rows.append(quicksum(self.binaries) >= 1)
+        return rows
+
+
+def add_lazy_disjunction(model, conditions: list, bounds: list,
+                         name_prefix: str = "lazy_or") -> LazyDisjunction:
+    """
+    Adds the binaries of the rule (C1) OR (C2) OR ... to the model,
+    its rows are only added once an incumbent violates it.
+    """
+    binaries = model.addVars(len(conditions), vtype=GRB.BINARY,
+                             name=f"{name_prefix}_indicator")
+    return LazyDisjunction(conditions, bounds,
+                           [binaries[i] for i in range(len(conditions))],
+                           name=name_prefix)
+
+
+def separate(model, rules: list) -> int:
+    """
+    Inside a MIPSOL callback, adds the rows of the rules
+    violated by the new incumbent, and returns how many there are.
+    """
+    # Variables have a hash once they are in the model
+    variables = list({var: None for rule in rules for var in rule.variables()})
+    if not variables:
+        return 0
+    values = dict(zip(variables, model.cbGetSolution(variables)))
+    violated = [rule for rule in rules if not rule.holds(values)]
+    for rule in violated:
+        for row in rule.rows():
+            model.cbLazy(row)
+    return len(violated)
+
+
+def lazy_callback(machines: list, callback=None):
+    """
+    Returns a callback adding the lazy rules of the machines violated by
+    every new incumbent, which then calls callback (e.g. an early stop
+    policy) if given. The model needs LazyConstraints=1.
+    """
+    def separate_and_call(model, where):
+        if where == GRB.Callback.MIPSOL:
+            for machine in machines:
+                machine.separate(model)
+        if callback is not None:
+            callback(model, where)
+    return separate_and_call
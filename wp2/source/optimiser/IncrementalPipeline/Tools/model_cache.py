@@ -0,0 +1,176 @@
+"""
+Models of a pipeline kept as templates, to be reused with new data.
+
+The boards and pieces known when a model is built only enter it
+through the bounds of their variables (see Tools.fixable_vars),
+everything else depends on the shape of the pipeline, the config,
+how many items each machine gets and how many parts each board has.
+So a model built once for that structure is reused for any other data
+with the same structure: the bounds of the known items are updated,
+and the solution and the starts of the last solve are discarded.
+
+ModelTemplateCache keeps the templates by structure, and evicts the
+least recently used ones once their estimated size is above a cap.
+"""
+
+from collections import OrderedDict
+from time import time
+from gurobipy import Model
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.model_size import SIZE_KEYS
+from IncrementalPipeline.Tools.tuning import pipeline_shape
+from IncrementalPipeline.Tools.var_keys import get_var_keys
+
+# Rough memory of a model: per variable or constraint, and per nonzero
+BYTES_PER_ROW = 200
+BYTES_PER_NONZERO = 16
+
+
+def item_data(item) -> list:
+    """
+    Returns the (role, local index, value) of the variables
+    of a known board or piece, see BoardVars.register and PieceVars.register.
+    """
+    if isinstance(item, Board):
+        data = [("board_length", None, item.length)]
+        for i, (start, end) in enumerate(item.curved_parts or []):
+            data.extend([("curved_part_start", i, start), ("curved_part_end", i, end)])
+        for i, (start, end) in enumerate(item.bad_parts or []):
+            data.extend([("bad_part_start", i, start), ("bad_part_end", i, end)])
+        return data
+    if isinstance(item, Piece):
+        return [("piece_length", None, item.length), ("piece_good", None, int(item.good))]
+    raise ValueError(f"Only boards and pieces can be data of a template, "
+                     f"got {type(item).__name__}")
+
+
+def item_structure(item):
+    """
+    Returns what of a known item the structure of a model depends on.
+    """
+    if isinstance(item, Board):
+        return (len(item.curved_parts or []), len(item.bad_parts or []))
+    return ()
+
+
+def model_bytes(model) -> int:
+    model.update()
+    return (BYTES_PER_ROW * (model.NumVars + model.NumConstrs + model.NumGenConstrs)
+            + BYTES_PER_NONZERO * model.NumNZs)
+
+
+class ModelTemplate:
+    """
+    A model built by impose_conditions, with what it returned.
+    """
+
+    def __init__(self, model, decisions: dict, machines_output: dict):
+        self.model = model
+        self.decisions = decisions
+        self.machines_output = machines_output
+        self.size = model_bytes(model)
+
+
+class ModelTemplateCache:
+    """
+    Templates by structure, at most max_bytes of them (estimated).
+
+    Only for pipelines without lazy machines, whose rules are kept
+    by the machines for the last model they built.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.templates = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, pipeline) -> tuple:
+        """
+        Returns the structure of the model of the pipeline
+        for its current intermediate lists.
+        """
+        lists = []
+        for index, machine in enumerate(pipeline.machines):
+            items = pipeline.look_ahead(index, pipeline.intermediate_lists[index])
+            if getattr(machine, "candidate_cuts", False):
+                # The candidate positions come from the data
+                lists.append(tuple(tuple(item_data(item)) for item in items))
+            else:
+                lists.append(tuple(item_structure(item) for item in items))
+        return (pipeline_shape(pipeline), tuple(lists))
+
+    def model(self, pipeline):
+        """
+        Returns a model of the pipeline for its current intermediate
+        lists, with the decisions and outputs of the machines,
+        as impose_conditions does.
+        """
+        if pipeline.lazy_machines():
+            raise ValueError("Lazy machines keep the rules of the last model "
+                             "they built, their models cannot be reused")
+        start_time = time()
+        key = self.key(pipeline)
+        template = self.templates.get(key)
+        if template is None:
+            self.misses += 1
+            model = Model()
+            decisions, machines_output = pipeline.impose_conditions(model)
+            template = ModelTemplate(model, dict(decisions), dict(machines_output))
+            self.templates[key] = template
+            self.size += template.size
+            self.evict(keep=key)
+            return model, template.decisions, template.machines_output
+        self.hits += 1
+        self.templates.move_to_end(key)
+        self.set_data(template.model, pipeline)
+        pipeline.decisions = dict(template.decisions)
+        pipeline.machines_output = dict(template.machines_output)
+        pipeline.committed = {machine.id: (0, 0) for machine in pipeline.machines}
+        # Nothing was added to the model
+        pipeline.build_report = {"ModelTemplateCache": dict.fromkeys(SIZE_KEYS, 0)}
+        pipeline.build_report["ModelTemplateCache"]["time"] = time() - start_time
+        return template.model, template.decisions, template.machines_output
+
+    def set_data(self, model, pipeline):
+        """
+        Fixes the variables of the known items of the template
+        to the current intermediate lists, and discards the solution
+        and the starts of its last solve.
+        """
+        if model.SolCount > 0:
+            # Also if the data did not change
+            model.reset(0)
+        model.NumStart = 0
+        model.update()
+        model.Params.StartNumber = 0
+        var_keys = get_var_keys(model)
+        variables = []
+        values = []
+        for index, machine in enumerate(pipeline.machines):
+            items = pipeline.look_ahead(index, pipeline.intermediate_lists[index])
+            for input_index, item in enumerate(items):
+                for role, local_index, value in item_data(item):
+                    variables.append(var_keys[(machine.id, role, input_index,
+                                               None, local_index)])
+                    values.append(value)
+        model.setAttr("LB", variables, values)
+        model.setAttr("UB", variables, values)
+
+    def evict(self, keep=None):
+        """
+        Disposes of the least recently used templates
+        until the cache is within max_bytes, except keep.
+        """
+        for key in list(self.templates):
+            if self.size <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            template = self.templates.pop(key)
+            self.size -= template.size
+            self.evictions += 1
+            template.model.dispose()
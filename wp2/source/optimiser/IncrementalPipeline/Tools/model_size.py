@@ -0,0 +1,58 @@
+"""
+Size of a model while it is built, to know how much
+every machine of a pipeline adds to it, see Pipeline.build_report.
+"""
+
+from gurobipy import GRB
+
+# General constraints counted on their own
+GENCONSTR_TYPES = {
+    GRB.GENCONSTR_INDICATOR: "indicators",
+    GRB.GENCONSTR_AND: "and",
+    GRB.GENCONSTR_OR: "or",
+}
+
+SIZE_KEYS = (["vars", "constrs", "genconstrs"]
+             + list(GENCONSTR_TYPES.values()) + ["nonzeros"])
+
+
+def model_size(model) -> dict:
+    """
+    Returns the number of variables, linear constraints,
+    general constraints of each type and nonzeros of the model.
+    """
+    model.update()
+    size = {"vars": model.NumVars,
+            "constrs": model.NumConstrs,
+            "genconstrs": model.NumGenConstrs,
+            "nonzeros": model.NumNZs}
+    size.update({name: 0 for name in GENCONSTR_TYPES.values()})
+    if size["genconstrs"] > 0:
+        genconstr_types = model.getAttr("GenConstrType", model.getGenConstrs())
+        for genconstr_type in genconstr_types:
+            name = GENCONSTR_TYPES.get(genconstr_type)
+            if name is not None:
+                size[name] += 1
+    return size
+
+
+def size_delta(before: dict, after: dict) -> dict:
+    """
+    Returns what was added to the model between two sizes.
+    """
+    return {key: after[key] - before[key] for key in SIZE_KEYS}
+
+
+def format_build_report(build_report: dict, runtime: float = None) -> str:
+    """
+    Returns the build report of a pipeline as a table, one row per machine,
+    followed by the runtime of the solve if given.
+    """
+    lines = [f"{'machine':>28} {'time [s]':>9} "
+             + " ".join(f"{key:>10}" for key in SIZE_KEYS)]
+    for machine_id, row in build_report.items():
+        lines.append(f"{machine_id:>28} {row['time']:>9.3f} "
+                     + " ".join(f"{row[key]:>10}" for key in SIZE_KEYS))
+    if runtime is not None:
+        lines.append(f"{'solve':>28} {runtime:>9.3f}")
+    return "\n".join(lines)
@@ -1,7 +1,13 @@
 from gurobipy import GRB
+from IncrementalPipeline.Tools.backends import quicksum
+from IncrementalPipeline.Tools.formulation import (
+    INDICATORS,
+    add_conditional_constr
+)
 
 
-def add_or_constraints(model, constraints, name_prefix="or_constraints"):
+def add_or_constraints(model, constraints, name_prefix="or_constraints",
+                       formulation=INDICATORS, bounds=None):
     """
     Adds a constraint of the form: (C1) OR (C2) OR ... OR (Cn)
 
@@ -10,27 +16,36 @@ def add_or_constraints(model, constraints, name_prefix="or_constraints"):
     - constraints: list of tuples [(expr, sense, rhs), ...]
       where `sense` is one of '<=', '>=', '=='
     - name_prefix: base name for the binary vars and constraints
+    - formulation: INDICATORS or BIG_M, see Tools.formulation
+    - bounds: list with the bounds (lower, upper) of each expr,
+      needed by the BIG_M formulation
+
+    Returns the list of variables and constraints added to the model,
+    so that they can be removed later.
     """
+    if bounds is None:
+        bounds = [None] * len(constraints)
     binary_vars = []
+    added = []
 
-    for idx, (expr, sense, rhs) in enumerate(constraints):
+    for idx, ((expr, sense, rhs), expr_bounds) in enumerate(zip(constraints, bounds)):
         indicator = model.addVar(vtype=GRB.BINARY, name=f"{name_prefix}_indicator{idx}")
         binary_vars.append(indicator)
+        added.extend(add_conditional_constr(model, indicator, True,
+                                            expr, sense, rhs,
+                                            bounds=expr_bounds,
+                                            formulation=formulation,
+                                            name=f"{name_prefix}_cond{idx}"))
 
-        if sense == '<=':
-            model.addGenConstrIndicator(indicator, True, expr <= rhs,
-                                        name=f"{name_prefix}_cond{idx}")
-        elif sense == '>=':
-            model.addGenConstrIndicator(indicator, True, expr >= rhs,
-                                        name=f"{name_prefix}_cond{idx}")
-        elif sense == '==':
-            model.addGenConstrIndicator(indicator, True, expr == rhs,
-                                        name=f"{name_prefix}_cond{idx}")
-        else:
-            raise ValueError(f"Unsupported sense: {sense}")
+    if formulation == INDICATORS:
+        res = model.addVar(vtype=GRB.BINARY, name=f"{name_prefix}_res_or")
+        added.append(model.addConstr(
+            res == 1, name=f"{name_prefix}_or_True"
+        ))
+        added.append(model.addGenConstrOr(res, binary_vars, name=f"{name_prefix}_or_logic"))
+        return added + binary_vars + [res]
 
-    res = model.addVar(vtype=GRB.BINARY, name=f"{name_prefix}_res_or")
-    model.addConstr(
-        res == 1, name=f"{name_prefix}_or_True"
-    )
-    model.addGenConstrOr(res, binary_vars, name=f"{name_prefix}_or_logic")
+    # The OR always holds, there is no need for a result variable
+    added.append(model.addConstr(quicksum(binary_vars) >= 1,
+                                 name=f"{name_prefix}_or_True"))
+    return added + binary_vars
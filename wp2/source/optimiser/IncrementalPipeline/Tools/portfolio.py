@@ -0,0 +1,210 @@
+"""
+Portfolio of differently tuned solves of the same model.
+
+The model is written to a file with generic names, and every
+configuration solves it in its own process with its own parameters
+(Seed, MIPFocus, Heuristics, Threads, ...).
+The processes share the best objective found so far, and all of them
+stop as soon as one reaches the gap target against it.
+The best solution is loaded back into the original model.
+"""
+
+import json
+import math
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from time import time
+from gurobipy import Env, GRB, read
+
+# One thread per solve, so that the solves do not compete for the cores
+DEFAULT_PORTFOLIO = {
+    "default": {"Seed": 0, "Threads": 1},
+    "feasibility": {"Seed": 1, "MIPFocus": 1, "Heuristics": 0.5, "Threads": 1},
+    "optimality": {"Seed": 2, "MIPFocus": 2, "Threads": 1},
+    "bound": {"Seed": 3, "MIPFocus": 3, "Heuristics": 0, "Threads": 1},
+}
+
+# Seconds between two looks at the shared state from a solve
+SHARED_STATE_PERIOD = 0.1
+
+
+class PortfolioResult:
+    """
+    Result of solve_portfolio:
+    - winner: name of the configuration with the best solution, or None
+    - objective: its objective value
+    - values: its value of every variable, in the order of model.getVars()
+    - runs: for every configuration, a dictionary with its status,
+      objective, bound and runtime
+    """
+
+    def __init__(self, winner, objective, values, runs):
+        self.winner = winner
+        self.objective = objective
+        self.values = values
+        self.runs = runs
+
+
+class PortfolioStatistics:
+    """
+    Counts how often every configuration of a portfolio wins,
+    so that the configurations which never win can be pruned.
+
+    If log_path is given, every result is appended to it as one json line.
+    """
+
+    def __init__(self, log_path: str = None):
+        self.log_path = log_path
+        self.wins = dict()
+        self.runs = 0
+
+    def record(self, result: PortfolioResult, step: int = None):
+        self.runs += 1
+        if result.winner is not None:
+            self.wins[result.winner] = self.wins.get(result.winner, 0) + 1
+        if self.log_path is not None:
+            with open(self.log_path, "a") as log_file:
+                log_file.write(json.dumps({"step": step,
+                                           "winner": result.winner,
+                                           "objective": result.objective,
+                                           "runs": result.runs}) + "\n")
+
+    def win_rates(self) -> dict:
+        """
+        Returns the share of the portfolio runs won by each configuration.
+        """
+        return {name: wins / self.runs for name, wins in self.wins.items()}
+
+    def prune(self, portfolio: dict, min_win_rate: float) -> dict:
+        """
+        Returns the configurations of the portfolio that won at least
+        min_win_rate of the runs, the best one is always kept.
+        """
+        win_rates = self.win_rates()
+        kept = {name: parameters for name, parameters in portfolio.items()
+                if win_rates.get(name, 0) >= min_win_rate}
+        if not kept and win_rates:
+            best = max(win_rates, key=win_rates.get)
+            kept = {best: portfolio[best]}
+        return kept or dict(portfolio)
+
+
+def _shared_callback(model, where):
+    """
+    Publishes the solutions of the solve and stops it when
+    the gap against the best solution of any solve is small enough,
+    or when another solve already reached it.
+    """
+    if where == GRB.Callback.MIPSOL:
+        objective = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+        with model._lock:
+            if objective < model._best.value:
+                model._best.value = objective
+    elif where == GRB.Callback.MIP:
+        now = time()
+        if now - model._last_look < SHARED_STATE_PERIOD:
+            return
+        model._last_look = now
+        if model._stop.is_set():
+            model.terminate()
+            return
+        if model._gap_target is None:
+            return
+        best = model._best.value
+        bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+        if best < GRB.INFINITY and best - bound <= model._gap_target * max(abs(best), 1e-6):
+            model._stop.set()
+            model.terminate()
+
+
+def _solve_configuration(path, name, parameters, start_values,
+                         deadline, gap_target, best, lock, stop):
+    """
+    Solves the model in the file with the given parameters until
+    the deadline, runs in a process of the pool.
+    """
+    with Env(params={"OutputFlag": 0}) as env:
+        model = read(path, env)
+        model.setParam('TimeLimit', max(deadline - time(), 0))
+        for parameter, value in parameters.items():
+            model.setParam(parameter, value)
+        if start_values is not None:
+            model.setAttr("Start", model.getVars(), start_values)
+        model._best, model._lock, model._stop = best, lock, stop
+        model._gap_target = gap_target
+        model._last_look = 0
+        model.optimize(_shared_callback)
+        if model.Status == GRB.OPTIMAL:
+            stop.set()
+
+        run = {"status": model.Status,
+               "objective": model.ObjVal if model.SolCount > 0 else None,
+               "bound": model.ObjBound if model.SolCount > 0 else None,
+               "runtime": model.Runtime}
+        values = model.getAttr("X", model.getVars()) if model.SolCount > 0 else None
+        model.dispose()
+    return name, run, values
+
+
+def solve_portfolio(model, time_limit: float, portfolio: dict = None,
+                    gap_target: float = None) -> PortfolioResult:
+    """
+    Solves the minimisation model with every configuration of the portfolio
+    in parallel, for at most time_limit seconds including the start of
+    the processes, the Start values of the model are given to all of them.
+    All solves stop once one of them is optimal or reaches the gap target.
+
+    The best solution is loaded into the model, see load_solution.
+    """
+    deadline = time() + time_limit
+    if portfolio is None:
+        portfolio = DEFAULT_PORTFOLIO
+    model.update()
+    variables = model.getVars()
+    start_values = model.getAttr("Start", variables)
+    if all(value == GRB.UNDEFINED for value in start_values):
+        start_values = None
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Generic names, the names of the machines are not unique
+        path = os.path.join(directory, "step.rew")
+        model.write(path)
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager:
+            best = manager.Value('d', math.inf)
+            lock = manager.Lock()
+            stop = manager.Event()
+            with ProcessPoolExecutor(max_workers=len(portfolio),
+                                     mp_context=context) as pool:
+                futures = [pool.submit(_solve_configuration, path, name,
+                                       parameters, start_values, deadline,
+                                       gap_target, best, lock, stop)
+                           for name, parameters in portfolio.items()]
+                outcomes = [future.result() for future in futures]
+
+    runs = {name: run for name, run, _ in outcomes}
+    solved = [(run["objective"], run["runtime"], name, values)
+              for name, run, values in outcomes if values is not None]
+    if not solved:
+        return PortfolioResult(None, None, None, runs)
+    objective, _, winner, values = min(solved, key=lambda solution: solution[:2])
+    load_solution(model, values)
+    return PortfolioResult(winner, objective, values, runs)
+
+
+def load_solution(model, values: list):
+    """
+    Makes values the solution of the model, so that it can be read
+    through the X attribute as if the model was solved.
+
+    The model is solved again with values as start,
+    stopping at the first solution.
+    """
+    variables = model.getVars()
+    model.setAttr("Start", variables, values)
+    solution_limit = model.Params.SolutionLimit
+    model.setParam('SolutionLimit', 1)
+    model.optimize()
+    model.setParam('SolutionLimit', solution_limit)
@@ -0,0 +1,143 @@
+"""
+Time budget of the steps of IncrementalMachine.
+
+Instead of the same time_per_step for every step, a TimeBudgetScheduler
+decides before each step how long its solve may take and how many
+of the boards waiting to enter the pipeline it admits, from:
+- the arrival rate of the boards, measured over the run,
+- the boards waiting, which grow when the steps are too slow,
+- the boards already in the pipeline, the steps of work left before
+  the machines run out of inputs and wait for a decision,
+- the gap of the last solves, whether more time would still pay off.
+Every decision is kept with the time it used and the gap reached.
+"""
+
+from time import time
+
+
+class StepDecision:
+    """
+    Time granted and boards admitted for one step, with what was
+    observed to take the decision and, once recorded, what was used.
+    """
+
+    def __init__(self, time_limit: float, boards: int, waiting: int,
+                 buffered_steps: float, arrival_rate: float):
+        self.time_limit = time_limit
+        self.boards = boards
+        self.waiting = waiting
+        self.buffered_steps = buffered_steps
+        self.arrival_rate = arrival_rate
+        self.time_used = None
+        self.gap = None
+
+    def __repr__(self):
+        return (f"StepDecision(time_limit={self.time_limit:.2f}, boards={self.boards}, "
+                f"waiting={self.waiting}, time_used={self.time_used}, gap={self.gap})")
+
+
+class TimeBudgetScheduler:
+    """
+    Decides the time limit, between min_time and max_time, and the
+    boards admitted, so that the first machine keeps up to look_ahead
+    boards (or its horizon if smaller), of every step.
+
+    The time of a step is what the first machine can spend per input at
+    the arrival rate, smoothed by smoothing. It is cut down to min_time
+    when the pipeline has less than a step of work left, scaled down when
+    more than look_ahead boards are waiting, halved when the last solve
+    reached target_gap in less than half its time, and increased by half
+    when the last one used all of it above target_gap without boards
+    waiting.
+    """
+
+    def __init__(self, min_time: float = 1, max_time: float = 30,
+                 look_ahead: int = 2, target_gap: float = 0.01,
+                 smoothing: float = 0.5):
+        if not 0 < min_time <= max_time:
+            raise ValueError(f"The time limits must satisfy 0 < min_time <= max_time, "
+                             f"got {min_time} and {max_time}")
+        if look_ahead < 1:
+            raise ValueError(f"The look-ahead must be at least 1 board, got {look_ahead}")
+        self.min_time = min_time
+        self.max_time = max_time
+        self.look_ahead = look_ahead
+        self.target_gap = target_gap
+        self.smoothing = smoothing
+        self.decisions = []
+        self.arrival_rate = None
+        self._arrived = 0
+        self._admitted = 0
+        self._last_observation = None
+
+    def observe_arrivals(self, waiting: int, now: float = None):
+        """
+        Updates the arrival rate (boards per second) with the boards
+        which arrived since the last observation.
+        """
+        now = time() if now is None else now
+        arrived = self._admitted + waiting
+        if self._last_observation is not None and now > self._last_observation:
+            rate = (arrived - self._arrived) / (now - self._last_observation)
+            self.arrival_rate = (rate if self.arrival_rate is None else
+                                 self.smoothing * rate
+                                 + (1 - self.smoothing) * self.arrival_rate)
+        self._arrived = arrived
+        self._last_observation = now
+
+    def decide(self, pipeline, waiting: int, now: float = None) -> StepDecision:
+        """
+        Returns the decision of the next step of the pipeline,
+        waiting boards having arrived but not entered it yet.
+        """
+        self.observe_arrivals(waiting, now)
+        first_machine = pipeline.machines[0]
+        per_step = max(pipeline.machine_changes_per_step[first_machine.id][0], 1)
+        buffered_steps = len(pipeline.intermediate_lists[0]) / per_step
+
+        if self.arrival_rate:
+            time_limit = per_step / self.arrival_rate
+        else:
+            time_limit = self.max_time
+        last = self.decisions[-1] if self.decisions else None
+        if buffered_steps < 1:
+            # The machines wait for this decision
+            time_limit = self.min_time
+        elif waiting > self.look_ahead:
+            time_limit *= self.look_ahead / waiting
+        elif last is not None and last.gap is not None:
+            if last.gap <= self.target_gap and last.time_used < last.time_limit / 2:
+                time_limit = min(time_limit, last.time_limit / 2)
+            elif last.gap > self.target_gap and last.time_used >= last.time_limit:
+                time_limit = max(time_limit, 1.5 * last.time_limit)
+        time_limit = min(max(time_limit, self.min_time), self.max_time)
+
+        look_ahead = self.look_ahead
+        if pipeline.horizon is not None and first_machine.id in pipeline.horizon:
+            look_ahead = min(look_ahead, pipeline.horizon[first_machine.id])
+        boards = min(waiting, max(look_ahead - len(pipeline.intermediate_lists[0]), 0))
+        decision = StepDecision(time_limit, boards, waiting, buffered_steps,
+                                self.arrival_rate)
+        self._admitted += boards
+        self.decisions.append(decision)
+        return decision
+
+    def record(self, decision: StepDecision, time_used: float, gap: float = None):
+        """
+        Keeps the time the step used and the gap it reached,
+        None if it found no solution.
+        """
+        decision.time_used = time_used
+        decision.gap = gap
+
+    def summary(self) -> dict:
+        """
+        Returns the time granted and used over all the recorded decisions.
+        """
+        recorded = [decision for decision in self.decisions
+                    if decision.time_used is not None]
+        return {"steps": len(recorded),
+                "granted": sum(decision.time_limit for decision in recorded),
+                "used": sum(decision.time_used for decision in recorded),
+                "overruns": sum(decision.time_used > decision.time_limit
+                                for decision in recorded)}
@@ -1,16 +1,18 @@
 """Will convert a list of Board or Piece objects to a list of BoardVars or PieceVars objects."""
 
-from IncrementalPipeline.Objects.board import Board, BoardVars
-from IncrementalPipeline.Objects.piece import Piece, PieceVars
+from IncrementalPipeline.Objects.board import Board, BoardBatch, BoardVars, create_board_vars
+from IncrementalPipeline.Objects.piece import Piece, PieceBatch, PieceVars, create_piece_vars
 
-def to_vars(input_list: list, model, starting_machine_name: str) -> list:
+def to_vars(input_list: list, model, starting_machine_name: str, start_index: int = 0) -> list:
     """
     Converts a list of Board or Piece objects to a list of BoardVars or PieceVars objects.
 
     Args:
-        input_list (list): List of Board or Piece objects.
+        input_list (list): List of Board or Piece objects,
+            or a BoardBatch or PieceBatch.
         model: Gurobi model to which the variables will be added.
         starting_machine_name (str): Name of the starting machine for variable naming.
+        start_index (int): Input index of the first element in the machine.
 
     Returns:
         list: List of BoardVars or PieceVars objects.
@@ -18,11 +20,74 @@ def to_vars(input_list: list, model, starting_machine_name: str) -> list:
     if not input_list:
         return []
 
+    if isinstance(input_list, (BoardBatch, PieceBatch)):
+        # Items read from a solution get their variables in one block
+        # from the arrays of the batch
+        create_vars, item_name = ((create_board_vars, "board")
+                                  if isinstance(input_list, BoardBatch)
+                                  else (create_piece_vars, "piece"))
+        indices = range(start_index, start_index + len(input_list))
+        return create_vars(
+            model,
+            [f"{starting_machine_name} {item_name} [{i}]" for i in indices],
+            [(starting_machine_name, i, None) for i in indices],
+            input_list,
+            name=f"{starting_machine_name} {item_name}"
+        )
+
     if isinstance(input_list[0], Board) or isinstance(input_list[0], BoardVars):
-        return [BoardVars(model, board=board, id=f"{starting_machine_name} board [{i}]")
-                for i, board in enumerate(input_list)]
+        var_class, create_vars, item_name = BoardVars, create_board_vars, "board"
     elif isinstance(input_list[0], Piece) or isinstance(input_list[0], PieceVars):
-        return [PieceVars(model, piece=piece, id=f"{starting_machine_name} piece [{i}]")
-                for i, piece in enumerate(input_list)]
+        var_class, create_vars, item_name = PieceVars, create_piece_vars, "piece"
     else:
-        raise TypeError("Input list must contain either Board or Piece objects.")
\ No newline at end of file
+        raise TypeError("Input list must contain either Board or Piece objects.")
+
+    # Outputs of a previous machine are used as they are,
+    # the known items get their variables in one block
+    vars_list = list(input_list)
+    known_indices = []
+    for i, item in enumerate(input_list, start=start_index):
+        key = (starting_machine_name, i, None)
+        if isinstance(item, var_class):
+            item.register(model, key)
+        else:
+            known_indices.append(i)
+    if known_indices:
+        known_vars = create_vars(
+            model,
+            [f"{starting_machine_name} {item_name} [{i}]" for i in known_indices],
+            [(starting_machine_name, i, None) for i in known_indices],
+            [input_list[i - start_index] for i in known_indices],
+            name=f"{starting_machine_name} {item_name}"
+        )
+        for i, item_vars in zip(known_indices, known_vars):
+            vars_list[i - start_index] = item_vars
+    return vars_list
+
+
+def to_board_vars(board, model, starting_machine_name: str, index: int) -> BoardVars:
+    """
+    A known Board becomes a BoardVars with fixed variables,
+    a BoardVars (output of a previous machine) is used as it is,
+    and only registered as input of the machine.
+    """
+    key = (starting_machine_name, index, None)
+    if isinstance(board, BoardVars):
+        board.register(model, key)
+        return board
+    return BoardVars(model, board=board, id=f"{starting_machine_name} board [{index}]",
+                     key=key)
+
+
+def to_piece_vars(piece, model, starting_machine_name: str, index: int) -> PieceVars:
+    """
+    A known Piece becomes a PieceVars with fixed variables,
+    a PieceVars (output of a previous machine) is used as it is,
+    and only registered as input of the machine.
+    """
+    key = (starting_machine_name, index, None)
+    if isinstance(piece, PieceVars):
+        piece.register(model, key)
+        return piece
+    return PieceVars(model, piece=piece, id=f"{starting_machine_name} piece [{index}]",
+                     key=key)
\ No newline at end of file
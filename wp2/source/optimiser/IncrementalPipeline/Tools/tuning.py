@@ -0,0 +1,196 @@
+"""
+Gurobi parameters tuned for the shape of a pipeline.
+
+Offline, see experiments/tune_parameters.py:
+- representative step models are exported with their MIP start,
+  see export_step_model,
+- Gurobi's tuning tool is run over them, see tune_models,
+- the best parameters are stored as a .prm profile named after
+  the shape of the pipeline, see pipeline_shape and save_profile.
+
+At runtime, load_profile reads the profile of the pipeline into
+every model, the defaults are kept if the pipeline has no profile.
+"""
+
+import hashlib
+import json
+import tempfile
+from pathlib import Path
+from gurobipy import GRB, read
+
+PROFILE_DIRECTORY = Path(__file__).parent.parent / "configs" / "tuned_profiles"
+
+# Parameters that are decided by the caller, never stored in a profile
+UNTUNED_PARAMETERS = ("TimeLimit", "OutputFlag", "LogFile", "LogToConsole",
+                      "LazyConstraints", "SolutionLimit")
+
+
+def shape_key(description: dict) -> str:
+    """
+    Returns a short key identifying the description of a model shape.
+    """
+    text = json.dumps(description, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def pipeline_description(pipeline, config: dict = None) -> dict:
+    """
+    Returns what the models of a pipeline depend on: its machines,
+    how they are formulated, the beam configuration,
+    and the unit of the lengths if they are integer.
+    """
+    if config is None:
+        from IncrementalPipeline.config_loader import get_config
+        config = get_config()
+    machines = [{"type": type(machine).__name__,
+                 "id": machine.id,
+                 "formulation": machine.formulation,
+                 "lazy": getattr(machine, "lazy", False),
+                 "window": getattr(machine, "window", None)}
+                for machine in pipeline.machines]
+    description = {"machines": machines,
+                   "configuration": config["BeamConfiguration"]}
+    if getattr(pipeline, "length_unit", None) is not None:
+        description["length_unit"] = pipeline.length_unit
+    return description
+
+
+def pipeline_shape(pipeline, config: dict = None) -> str:
+    """
+    Returns the key of the profile of a pipeline.
+    """
+    return shape_key(pipeline_description(pipeline, config))
+
+
+def profile_path(shape: str, directory: Path = None) -> Path:
+    return Path(directory or PROFILE_DIRECTORY) / f"{shape}.prm"
+
+
+def load_profile(model, shape: str, directory: Path = None) -> bool:
+    """
+    Reads the profile of the shape into the model parameters,
+    returns False and keeps the current parameters if there is none.
+    """
+    path = profile_path(shape, directory)
+    if not path.exists():
+        return False
+    model.read(str(path))
+    return True
+
+
+def save_profile(parameters: dict, shape: str, description: dict = None,
+                 directory: Path = None) -> Path:
+    """
+    Stores the parameters (name -> value) as the profile of the shape,
+    with its description next to it.
+    """
+    path = profile_path(shape, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = ["# Tuned Gurobi parameters, see Tools/tuning.py"]
+    lines.extend(f"{name} {value}" for name, value in parameters.items())
+    path.write_text("\n".join(lines) + "\n")
+    if description is not None:
+        path.with_suffix(".json").write_text(json.dumps(description, indent=1,
+                                                        default=str))
+    return path
+
+
+def export_step_model(model, directory: Path, name: str) -> Path:
+    """
+    Writes the model as name.mps, and its MIP start as name.mst
+    if it has one, returns the path of the model.
+
+    The names of the variables are made generic first,
+    as the names given by the machines are not unique.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    model.update()
+    starts = model.getAttr("Start", model.getVars())
+    rewritten_path = directory / f"{name}.rew"
+    model.write(str(rewritten_path))
+    exported = read(str(rewritten_path))
+    rewritten_path.unlink()
+    path = directory / f"{name}.mps"
+    exported.write(str(path))
+    if any(start != GRB.UNDEFINED for start in starts):
+        exported.setAttr("Start", exported.getVars(), starts)
+        exported.update()
+        exported.write(str(directory / f"{name}.mst"))
+    exported.dispose()
+    return path
+
+
+def read_step_model(path: Path):
+    """
+    Reads a model written by export_step_model, with its MIP start.
+    """
+    path = Path(path)
+    model = read(str(path))
+    start_path = path.with_suffix(".mst")
+    if start_path.exists():
+        model.read(str(start_path))
+    return model
+
+
+def tune_models(paths: list, tune_time_limit: float, time_limit: float,
+                parameters: dict = None) -> tuple:
+    """
+    Runs Gurobi's tuning tool on every model, for tune_time_limit seconds
+    each, with time_limit seconds per solve, and then solves all the models
+    with the best parameters found for each one.
+
+    Returns the parameters (name -> value) with the smallest total runtime
+    over all the models, counting time_limit for a solve without solution,
+    and for every candidate, the defaults included,
+    its parameters and total runtime.
+    """
+    candidates = {"default": dict()}
+    for path in paths:
+        model = read_step_model(path)
+        model.setParam('OutputFlag', 0)
+        model.setParam('TuneOutput', 0)
+        model.setParam('TuneTimeLimit', tune_time_limit)
+        model.setParam('TimeLimit', time_limit)
+        for name, value in (parameters or dict()).items():
+            model.setParam(name, value)
+        model.tune()
+        if model.TuneResultCount > 0:
+            model.getTuneResult(0)
+            candidates[Path(path).stem] = changed_parameters(model)
+        model.dispose()
+
+    totals = dict()
+    for candidate, candidate_parameters in candidates.items():
+        totals[candidate] = 0
+        for path in paths:
+            model = read_step_model(path)
+            model.setParam('OutputFlag', 0)
+            model.setParam('TimeLimit', time_limit)
+            for name, value in {**(parameters or dict()), **candidate_parameters}.items():
+                model.setParam(name, value)
+            model.optimize()
+            totals[candidate] += model.Runtime if model.SolCount > 0 else time_limit
+            model.dispose()
+    best = min(totals, key=totals.get)
+    return candidates[best], {candidate: (candidates[candidate], total)
+                              for candidate, total in totals.items()}
+
+
+def changed_parameters(model) -> dict:
+    """
+    Returns the parameters of the model which differ from the defaults,
+    except UNTUNED_PARAMETERS and the parameters of the tuning itself.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "parameters.prm"
+        model.write(str(path))
+        lines = path.read_text().splitlines()
+    changed = dict()
+    for line in lines:
+        fields = line.split()
+        if (len(fields) == 2 and not line.startswith("#")
+                and not fields[0].startswith("Tune")
+                and fields[0] not in UNTUNED_PARAMETERS):
+            changed[fields[0]] = fields[1]
+    return changed
@@ -0,0 +1,161 @@
+"""
+Structural identities for the variables of a pipeline model.
+
+Variables are registered when they are created under a key
+(machine_id, role, input_index, output_index, local_index), e.g.
+("CuttingMachine", "cuts", 2, None, 5) is the sixth cut of the third board
+that entered the cutting machine.
+
+When a machine processes n inputs and m outputs between two steps,
+the same variable in the next model has its input index shifted by n
+and its output index shifted by m, see shift_key.
+
+Variables are also indexed by the item they belong to,
+(machine_id, 'input' or 'output', index), see item_vars.
+"""
+
+from gurobipy import Model, GRB
+
+
+def get_var_keys(model: Model) -> dict:
+    """
+    Returns the dictionary key -> variable attached to the model,
+    creating it if the model does not have one yet.
+    """
+    var_keys = getattr(model, "_var_keys", None)
+    if var_keys is None:
+        var_keys = dict()
+        model._var_keys = var_keys
+    return var_keys
+
+
+def get_item_vars(model: Model) -> dict:
+    """
+    Returns the dictionary (machine_id, side, index) -> list of variables
+    attached to the model, creating it if the model does not have one yet.
+    """
+    item_vars = getattr(model, "_item_vars", None)
+    if item_vars is None:
+        item_vars = dict()
+        model._item_vars = item_vars
+    return item_vars
+
+
+def _add_key(model: Model, key: tuple, var):
+    get_var_keys(model)[key] = var
+    item_vars = get_item_vars(model)
+    machine_id, _, input_index, output_index, _ = key
+    if input_index is not None:
+        item_vars.setdefault((machine_id, 'input', input_index), []).append(var)
+    if output_index is not None:
+        item_vars.setdefault((machine_id, 'output', output_index), []).append(var)
+
+
+def register_var(model: Model,
+                 var,
+                 machine_id: str,
+                 role: str,
+                 input_index: int = None,
+                 output_index: int = None,
+                 local_index: int = None):
+    """
+    Registers var in the model under its structural key.
+    """
+    _add_key(model, (machine_id, role, input_index, output_index, local_index), var)
+
+
+def register_item(model: Model,
+                  machine_id: str,
+                  input_index: int,
+                  output_index: int,
+                  role_vars: list):
+    """
+    Registers all the variables of one item (a board or a piece) at once,
+    role_vars being a list of (role, local_index, var).
+    """
+    var_keys = get_var_keys(model)
+    for role, local_index, var in role_vars:
+        var_keys[(machine_id, role, input_index, output_index, local_index)] = var
+    variables = [var for _, _, var in role_vars]
+    item_vars = get_item_vars(model)
+    if input_index is not None:
+        item_vars.setdefault((machine_id, 'input', input_index), []).extend(variables)
+    if output_index is not None:
+        item_vars.setdefault((machine_id, 'output', output_index), []).extend(variables)
+
+
+def register_vars(model: Model,
+                  variables,
+                  machine_id: str,
+                  role: str,
+                  index_roles: tuple,
+                  input_index: int = None,
+                  output_index: int = None):
+    """
+    Registers every variable of a tupledict (as returned by model.addVars).
+
+    index_roles tells what each position of the tupledict keys means,
+    one of 'input', 'output' or 'local',
+    e.g. ('input', 'output') for reorder_vars[i, j].
+    input_index and output_index are used for the positions
+    not given by the tupledict, e.g. the board of the cuts.
+    """
+    for index, var in variables.items():
+        if not isinstance(index, tuple):
+            index = (index,)
+        indices = {'input': input_index,
+                   'output': output_index,
+                   'local': None}
+        for index_role, value in zip(index_roles, index):
+            indices[index_role] = value
+        key = (machine_id, role,
+               indices['input'], indices['output'], indices['local'])
+        _add_key(model, key, var)
+
+
+def shift_key(key: tuple, machine_changes: dict = None):
+    """
+    Returns the key the variable has after the machines processed
+    the inputs and outputs given in machine_changes,
+    or None if the variable refers to an item that left the machine.
+    """
+    if not machine_changes or key[0] not in machine_changes:
+        return key
+    machine_id, role, input_index, output_index, local_index = key
+    n_inputs, n_outputs = machine_changes[machine_id]
+    if input_index is not None:
+        input_index -= n_inputs
+        if input_index < 0:
+            return None
+    if output_index is not None:
+        output_index -= n_outputs
+        if output_index < 0:
+            return None
+    return (machine_id, role, input_index, output_index, local_index)
+
+
+def item_vars(model: Model, machine_id: str, side: str, indices) -> list:
+    """
+    Returns the registered variables of the given inputs or outputs
+    (side is 'input' or 'output') of a machine.
+    """
+    all_item_vars = get_item_vars(model)
+    variables = []
+    for index in indices:
+        variables.extend(all_item_vars.get((machine_id, side, index), []))
+    return variables
+
+
+def fix_vars_to_solution(model: Model, variables: list):
+    """
+    Fixes the variables to their value in the current solution of the model,
+    integer variables are rounded.
+    """
+    if not variables:
+        return
+    values = model.getAttr("X", variables)
+    vtypes = model.getAttr("VType", variables)
+    values = [round(value) if vtype != GRB.CONTINUOUS else value
+              for value, vtype in zip(values, vtypes)]
+    model.setAttr("LB", variables, values)
+    model.setAttr("UB", variables, values)
@@ -3,9 +3,112 @@ This module provides functionality to warm start a new model
 with the parameters of a previous model.
 """
 from IncrementalPipeline.Tools.rewrite_variables_names import rewrite_variable_name
+from IncrementalPipeline.Tools.var_keys import get_var_keys, shift_key
 
 
 def warm_start(new_model, previous_model, machine_changes=None):
+    """
+    Sets the Start attribute of the variables of new_model
+    to the solution of previous_model.
+
+    Variables are matched through their structural keys (see var_keys),
+    shifted by machine_changes, in a single pass over the previous model.
+    Values are read and written in bulk.
+    """
+    warm_start_from_values(new_model, solution_values(previous_model),
+                           machine_changes)
+
+
+def solution_values(model) -> dict:
+    """
+    Returns the value of every registered variable in the solution
+    of the model by structural key, empty if it has no solution.
+    """
+    keys = get_var_keys(model)
+    if not keys or model.SolCount == 0:
+        return dict()
+    key_list = list(keys)
+    values = model.getAttr("X", [keys[key] for key in key_list])
+    return dict(zip(key_list, values))
+
+
+def warm_start_from_values(new_model, values: dict, machine_changes=None):
+    """
+    Sets the Start attribute of the variables of new_model to the values
+    (structural key -> value), keys shifted by machine_changes.
+    """
+    if not values:
+        return
+    new_model.update()
+    new_keys = get_var_keys(new_model)
+
+    start_vars = []
+    start_values = []
+    for key, value in values.items():
+        new_var = new_keys.get(shift_key(key, machine_changes))
+        if new_var is not None:
+            start_vars.append(new_var)
+            start_values.append(value)
+    new_model.setAttr("Start", start_vars, start_values)
+
+
+def pool_values(model, max_solutions: int) -> list:
+    """
+    Returns the values by structural key of the best max_solutions
+    solutions of the pool of the model, the best one first.
+    """
+    keys = get_var_keys(model)
+    if not keys or model.SolCount == 0:
+        return []
+    key_list = list(keys)
+    variables = [keys[key] for key in key_list]
+    pool = []
+    for solution_number in range(min(model.SolCount, max_solutions)):
+        model.Params.SolutionNumber = solution_number
+        pool.append(dict(zip(key_list, model.getAttr("Xn", variables))))
+    return pool
+
+
+def warm_start_from_pool(new_model, pool: list, machine_changes=None) -> int:
+    """
+    Sets every solution of the pool (see pool_values) as one MIP start
+    of new_model, keys shifted by machine_changes.
+    Returns the number of starts set.
+    """
+    if not pool:
+        return 0
+    new_model.update()
+    new_model.NumStart = len(pool)
+    new_model.update()
+    for start_number, values in enumerate(pool):
+        new_model.Params.StartNumber = start_number
+        warm_start_from_values(new_model, values, machine_changes)
+        # Each start is stored under the StartNumber it was set with
+        new_model.update()
+    new_model.Params.StartNumber = 0
+    return len(pool)
+
+
+def keep_solution_as_start(model):
+    """
+    Sets the Start attribute of every variable to its value in
+    the current solution, so that it is still used as start
+    after the model is modified.
+    """
+    if model.SolCount == 0:
+        return
+    variables = model.getVars()
+    model.setAttr("Start", variables, model.getAttr("X", variables))
+
+
+def warm_start_by_name(new_model, previous_model, machine_changes=None):
+    """
+    Warm starts matching variables by their names,
+    rewritten with rewrite_variable_name.
+
+    This was the original approach, it is quadratic in the model size,
+    and is kept to compare against warm_start.
+    """
     previous_vars = previous_model.getVars()
     new_model.update()
     new_vars = new_model.getVars()
@@ -7,6 +7,8 @@ from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
 from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
 from IncrementalPipeline.Tools.simple_computations import max_pieces_per_board
 
+# Places an item can move in a reordering machine, the capacity of its buffer
+reorder_window = 3
 
 machine_changes_per_step = dict()
 checking_machine = CheckingMachine(
@@ -25,7 +27,8 @@ machine_changes_per_step[reordering_machine0_board.id] = (1, 1)
 
 reordering_machine1 = ReorderMachine(
     id="1",
-    input_type=PieceVars
+    input_type=PieceVars,
+    window=reorder_window
 )
 machine_changes_per_step[reordering_machine1.id] = (
     max_pieces_per_board,
@@ -34,7 +37,8 @@ machine_changes_per_step[reordering_machine1.id] = (
 
 reordering_machine2 = ReorderMachine(
     id="2",
-    input_type=PieceVars
+    input_type=PieceVars,
+    window=reorder_window
 )
 machine_changes_per_step[reordering_machine2.id] = (
     max_pieces_per_board,
@@ -43,7 +47,8 @@ machine_changes_per_step[reordering_machine2.id] = (
 
 reordering_machine3 = ReorderMachine(
     id="3",
-    input_type=PieceVars
+    input_type=PieceVars,
+    window=reorder_window
 )
 machine_changes_per_step[reordering_machine3.id] = (
     max_pieces_per_board,
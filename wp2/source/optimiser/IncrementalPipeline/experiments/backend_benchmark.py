@@ -0,0 +1,79 @@
+"""
+Benchmark of the backends the pipeline models can be built for.
+
+The same instances of the problem data generator are built with the
+default pipeline for Gurobi and for CP-SAT (see Tools.backends),
+comparing build time, solve time, status, objective value and bound.
+
+Run from wp2/source/optimiser:
+    python -m IncrementalPipeline.experiments.backend_benchmark --boards 3
+"""
+
+import argparse
+from time import time
+from gurobipy import GRB
+from IncrementalPipeline.configs.default_pipeline import pipeline
+from IncrementalPipeline.experiments.create_list_boards import (
+    run_problem_data_generator
+)
+from IncrementalPipeline.Tools.backends import BACKENDS, create_model
+from IncrementalPipeline.Tools.simple_computations import max_board_length
+
+STATUS_NAMES = {GRB.OPTIMAL: "optimal", GRB.INFEASIBLE: "infeasible",
+                GRB.TIME_LIMIT: "time limit"}
+
+
+def solve_with_backend(input_list, backend: str, time_limit: float, threads: int):
+    """
+    Returns the build time, solve time, status, objective value and bound
+    of the default pipeline built for the backend.
+    """
+    model = create_model(backend)
+    model.setParam('OutputFlag', 0)
+    model.setParam('TimeLimit', time_limit)
+    if threads:
+        model.setParam('Threads', threads)
+    pipeline.intermediate_lists[0] = input_list
+    start_time = time()
+    pipeline.impose_conditions(model)
+    build_time = time() - start_time
+
+    start_time = time()
+    model.optimize()
+    solve_time = time() - start_time
+
+    objective = model.ObjVal if model.SolCount > 0 else None
+    bound = model.ObjBound if model.SolCount > 0 else None
+    status = STATUS_NAMES.get(model.Status, str(model.Status))
+    model.dispose()
+    return build_time, solve_time, status, objective, bound
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--boards", type=int, default=3,
+                        help="largest number of boards")
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--threads", type=int, default=0,
+                        help="threads or workers of both solvers, 0 for their default")
+    # Read by config_loader
+    parser.add_argument("--config")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    print(f"{'boards':>6} {'seed':>4} {'backend':>7} {'build [s]':>9} "
+          f"{'solve [s]':>9} {'status':>10} {'objective':>10} {'bound':>8}")
+    for n_boards in range(1, arguments.boards + 1):
+        for random_seed in range(arguments.seeds):
+            input_list = run_problem_data_generator(n_boards,
+                                                    random_seed=random_seed,
+                                                    board_length=max_board_length)
+            for backend in BACKENDS:
+                build_time, solve_time, status, objective, bound = solve_with_backend(
+                    input_list, backend, arguments.time_limit, arguments.threads)
+                print(f"{n_boards:>6} {random_seed:>4} {backend:>7} {build_time:>9.3f} "
+                      f"{solve_time:>9.2f} {status:>10} {str(objective):>10} "
+                      f"{str(bound):>8}")
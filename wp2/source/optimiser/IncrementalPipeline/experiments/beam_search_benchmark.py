@@ -0,0 +1,62 @@
+"""
+Benchmark of the beam search heuristic.
+
+For growing numbers of boards, the plan of the beam search is found
+with several beam widths, and given as MIP start to the model of
+the default pipeline, comparing its waste with the one of the solver.
+"""
+
+from time import time
+from gurobipy import Model, GRB
+from IncrementalPipeline.configs.default_pipeline import pipeline
+from IncrementalPipeline.experiments.create_list_boards import (
+    run_problem_data_generator
+)
+from IncrementalPipeline.Tools.beam_search import BeamSearchPlanner, set_plan_as_start
+
+
+def time_beam_search(input_list, beam_width):
+    """
+    Returns the plan found for the boards and the time it took.
+    """
+    pipeline.intermediate_lists[0] = input_list
+    start_time = time()
+    plan = BeamSearchPlanner(beam_width=beam_width).plan(pipeline)
+    return plan, time() - start_time
+
+
+def solve_from_plan(input_list, plan, time_limit=60):
+    """
+    Returns the waste of the first solution and the final waste
+    of the default pipeline started from the plan.
+    """
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    model.setParam('TimeLimit', time_limit)
+    pipeline.intermediate_lists[0] = input_list
+    pipeline.impose_conditions(model)
+    set_plan_as_start(model, pipeline, plan)
+    model._first_waste = None
+    model.optimize(first_solution_callback)
+    objective = model.ObjVal if model.SolCount > 0 else None
+    return model._first_waste, objective
+
+
+def first_solution_callback(model, where):
+    """
+    Keeps the objective of the first solution in model._first_waste.
+    """
+    if where == GRB.Callback.MIPSOL and model._first_waste is None:
+        model._first_waste = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+
+
+if __name__ == "__main__":
+    print(f"{'boards':>6} {'width':>5} {'time [s]':>9} {'waste':>8} "
+          f"{'first':>8} {'solver':>8}")
+    for n_boards in [1, 2, 5, 10]:
+        input_list = run_problem_data_generator(n_boards)
+        for beam_width in [1, 5, 10, 20]:
+            plan, plan_time = time_beam_search(input_list, beam_width)
+            first_waste, objective = solve_from_plan(input_list, plan)
+            print(f"{n_boards:>6} {beam_width:>5} {plan_time:>9.3f} "
+                  f"{plan.waste:>8.1f} {str(first_waste):>8} {str(objective):>8}")
@@ -0,0 +1,225 @@
+"""
+Reproducible benchmark of the default pipeline.
+
+run: for fixed seeds and numbers of boards, the instances of the problem
+data generator are built and solved cold, and warm started from the
+solution with one board less. Build and solve times, the model statistics
+and the objective are written to a json file.
+With --configs, every config file is run in its own process,
+as the config is read once per process.
+
+compare: compares two result files and reports the regressions,
+the exit code is 1 if there is any.
+
+Run from wp2/source/optimiser:
+    python -m IncrementalPipeline.experiments.benchmark run --output new.json
+    python -m IncrementalPipeline.experiments.benchmark compare old.json new.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from gurobipy import GRB, gurobi
+
+DEFAULT_BOARDS = [2, 3, 4]
+DEFAULT_SEEDS = [0, 1, 2]
+
+# Metrics compared by compare
+TIME_METRICS = ["build_time", "solve_time"]
+SIZE_METRICS = ["vars", "constrs", "genconstrs", "nonzeros"]
+
+
+def model_statistics(model) -> dict:
+    return {"vars": model.NumVars,
+            "constrs": model.NumConstrs,
+            "genconstrs": model.NumGenConstrs,
+            "nonzeros": model.NumNZs}
+
+
+def solve_statistics(model) -> dict:
+    has_solution = model.SolCount > 0
+    return {"status": model.Status,
+            "objective": model.ObjVal if has_solution else None,
+            "bound": model.ObjBound if has_solution else None,
+            "gap": model.MIPGap if has_solution else None}
+
+
+def run_instance(n_boards, seed, time_limit, config_name):
+    """
+    Returns the cold and the warm started results of one instance.
+    """
+    # Imported here so that compare does not load the config
+    from IncrementalPipeline.experiments.create_list_boards import (
+        run_problem_data_generator
+    )
+    from IncrementalPipeline.experiments.time_solution import (
+        build_model,
+        solve_model
+    )
+    from IncrementalPipeline.Tools.simple_computations import max_board_length
+
+    input_list = run_problem_data_generator(n_boards, random_seed=seed,
+                                            board_length=max_board_length)
+    results = []
+    previous_model = None
+    for mode in ["cold", "warm"]:
+        if mode == "warm":
+            previous_model, _ = build_model(input_list[:-1])
+            previous_model.setParam('OutputFlag', 0)
+            previous_model.setParam('TimeLimit', time_limit)
+            solve_model(previous_model)
+        model, build_time = build_model(input_list, previous_model)
+        model.setParam('OutputFlag', 0)
+        model.setParam('TimeLimit', time_limit)
+        solve_time = solve_model(model)
+        result = {"config": config_name, "boards": n_boards, "seed": seed,
+                  "mode": mode, "build_time": build_time,
+                  "solve_time": solve_time}
+        result.update(model_statistics(model))
+        result.update(solve_statistics(model))
+        results.append(result)
+        print(f"{config_name:>10} {n_boards:>6} {seed:>4} {mode:>4} "
+              f"{build_time:>9.3f} {solve_time:>9.2f} {model.NumVars:>7} "
+              f"{str(result['objective']):>10}", flush=True)
+    return results
+
+
+def run_current_config(args) -> list:
+    from IncrementalPipeline.config_loader import get_config
+    config_name = args.config_name or Path(args.config or "current").stem
+    get_config()
+    print(f"{'config':>10} {'boards':>6} {'seed':>4} {'mode':>4} "
+          f"{'build [s]':>9} {'solve [s]':>9} {'vars':>7} {'objective':>10}")
+    results = []
+    for n_boards in args.boards:
+        for seed in args.seeds:
+            results.extend(run_instance(n_boards, seed, args.time_limit,
+                                        config_name))
+    return results
+
+
+def run_configs(args) -> list:
+    """
+    Runs the benchmark of every config in its own process.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for index, config in enumerate(args.configs):
+            output = Path(directory) / f"{index}.json"
+            subprocess.run([sys.executable, "-m", "IncrementalPipeline.experiments.benchmark",
+                            "run", "--config", config, "--output", str(output),
+                            "--boards", *map(str, args.boards),
+                            "--seeds", *map(str, args.seeds),
+                            "--time-limit", str(args.time_limit)],
+                           check=True)
+            results.extend(json.loads(output.read_text())["results"])
+    return results
+
+
+def metadata(args) -> dict:
+    commit = subprocess.run(["git", "rev-parse", "HEAD"],
+                            capture_output=True, text=True).stdout.strip()
+    return {"date": datetime.now(timezone.utc).isoformat(),
+            "commit": commit or None,
+            "gurobi": ".".join(map(str, gurobi.version())),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "time_limit": args.time_limit,
+            "boards": args.boards,
+            "seeds": args.seeds}
+
+
+def run(args):
+    results = run_configs(args) if args.configs else run_current_config(args)
+    Path(args.output).write_text(json.dumps({"metadata": metadata(args),
+                                             "results": results}, indent=1))
+
+
+def compare_results(old: list, new: list, time_tolerance: float = 0.2,
+                    min_seconds: float = 0.5) -> list:
+    """
+    Returns the regressions of the new results with respect to the old ones,
+    as (instance, metric, old value, new value).
+
+    Times are a regression if they grow more than time_tolerance relatively
+    and more than min_seconds, the model size if it grows at all,
+    the objective if it is worse, and the status if a solution is lost.
+    """
+    def key(result):
+        return (result["config"], result["boards"], result["seed"], result["mode"])
+
+    old_results = {key(result): result for result in old}
+    regressions = []
+    for result in new:
+        instance = key(result)
+        previous = old_results.get(instance)
+        if previous is None:
+            continue
+        for metric in TIME_METRICS:
+            increase = result[metric] - previous[metric]
+            if increase > min_seconds and increase > time_tolerance * previous[metric]:
+                regressions.append((instance, metric, previous[metric], result[metric]))
+        for metric in SIZE_METRICS:
+            if result[metric] > previous[metric]:
+                regressions.append((instance, metric, previous[metric], result[metric]))
+        if previous["objective"] is not None:
+            if result["objective"] is None:
+                regressions.append((instance, "objective", previous["objective"], None))
+            elif result["objective"] > previous["objective"] + 1e-6:
+                regressions.append((instance, "objective",
+                                    previous["objective"], result["objective"]))
+        if previous["status"] == GRB.OPTIMAL and result["status"] != GRB.OPTIMAL:
+            regressions.append((instance, "status", previous["status"], result["status"]))
+    return regressions
+
+
+def compare(args):
+    old = json.loads(Path(args.old).read_text())["results"]
+    new = json.loads(Path(args.new).read_text())["results"]
+    regressions = compare_results(old, new, args.time_tolerance, args.min_seconds)
+    print(f"{'total':>10} {'old':>12} {'new':>12}")
+    for metric in TIME_METRICS + SIZE_METRICS:
+        old_total = sum(result[metric] for result in old)
+        new_total = sum(result[metric] for result in new)
+        print(f"{metric:>10} {old_total:>12.2f} {new_total:>12.2f}")
+    for (config, n_boards, seed, mode), metric, old_value, new_value in regressions:
+        print(f"REGRESSION {config} boards={n_boards} seed={seed} {mode} "
+              f"{metric}: {old_value} -> {new_value}")
+    print(f"{len(regressions)} regressions")
+    return 1 if regressions else 0
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--output", required=True)
+    run_parser.add_argument("--boards", type=int, nargs="+", default=DEFAULT_BOARDS)
+    run_parser.add_argument("--seeds", type=int, nargs="+", default=DEFAULT_SEEDS)
+    run_parser.add_argument("--time-limit", type=float, default=60)
+    run_parser.add_argument("--configs", nargs="+",
+                            help="config files, each one run in its own process")
+    # Read by config_loader
+    run_parser.add_argument("--config")
+    run_parser.add_argument("--config-name")
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--time-tolerance", type=float, default=0.2)
+    compare_parser.add_argument("--min-seconds", type=float, default=0.5)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    if arguments.command == "run":
+        run(arguments)
+    else:
+        sys.exit(compare(arguments))
@@ -1,4 +1,5 @@
 import subprocess
+import sys
 import json
 from pathlib import Path
 from IncrementalPipeline.Translator.config2boards import (
@@ -9,9 +10,14 @@ from IncrementalPipeline.Translator.config2boards import (
 def run_problem_data_generator(n_boards: int,
                                d: float = 0.5,
                                b: float = 0.5,
-                               random_seed: int = 0):
+                               random_seed: int = 0,
+                               board_length: int = None):
     """
     Run the problem data generator script and return the generated data.
+
+    The script runs with the python of the venv if there is one,
+    else with the current python. board_length is the length of the
+    boards, the default of the generator if None.
     """
     # Path to the current file
     current_dir = Path(__file__).resolve().parent
@@ -29,6 +35,8 @@ def run_problem_data_generator(n_boards: int,
 
     # Path to venv python
     venv_python = source_dir.parent.parent / "venv" / "Scripts" / "python.exe"
+    if not venv_python.exists():
+        venv_python = Path(sys.executable)
 
     cmd = [
         str(venv_python),
@@ -38,6 +46,8 @@ def run_problem_data_generator(n_boards: int,
         "-b", str(b),
         "-random-seed", str(random_seed)
     ]
+    if board_length is not None:
+        cmd.extend(["--boardlength", str(board_length)])
     # Run the script and capture its output
     result = subprocess.run(cmd, capture_output=True, text=True)
 
@@ -0,0 +1,89 @@
+"""
+Benchmark of the sequential decomposition against the monolithic model.
+
+Boards of the problem data generator are cut and processed by the
+machines of the default pipeline, the cutting machine choosing among
+candidate cuts, once with one model for the whole pipeline and once
+with the decomposition of Tools.decomposition, comparing the wall time,
+the waste and, for the decomposition, its bound and iterations.
+
+Run from wp2/source/optimiser:
+    python -m IncrementalPipeline.experiments.decomposition_benchmark --boards 3
+"""
+
+import argparse
+from time import time
+from gurobipy import Model
+from IncrementalPipeline.configs.default_pipeline import reorder_window
+from IncrementalPipeline.experiments.create_list_boards import (
+    run_problem_data_generator
+)
+from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Machines.ReorderingMachine import ReorderMachine
+from IncrementalPipeline.Objects.piece import PieceVars
+from IncrementalPipeline.Tools.decomposition import solve_decomposed
+from IncrementalPipeline.Tools.simple_computations import max_board_length
+
+
+def candidate_cuts_pipeline(input_list) -> Pipeline:
+    """
+    Returns the machines of the default pipeline, cutting the input
+    list at candidate positions.
+    """
+    pipeline = Pipeline("decomposition_benchmark", [
+        CuttingMachine(id="decomposition", candidate_cuts=True),
+        ReorderMachine(id="decomposition", input_type=PieceVars, window=reorder_window),
+        FilteringMachine(id="decomposition"),
+        CheckingMachine(id="decomposition")])
+    pipeline.intermediate_lists[0] = list(input_list)
+    return pipeline
+
+
+def solve_monolithic(input_list, time_limit: float):
+    """
+    Returns the wall time and the waste of one model for the whole pipeline.
+    """
+    start_time = time()
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    model.setParam('TimeLimit', time_limit)
+    candidate_cuts_pipeline(input_list).impose_conditions(model)
+    model.optimize()
+    waste = model.ObjVal if model.SolCount > 0 else None
+    model.dispose()
+    return time() - start_time, waste
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--boards", type=int, default=3,
+                        help="largest number of boards")
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--time-limit", type=float, default=60)
+    # Read by config_loader
+    parser.add_argument("--config")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    print(f"{'boards':>6} {'seed':>4} {'monolithic [s]':>14} {'waste':>8} "
+          f"{'decomposed [s]':>14} {'waste':>8} {'bound':>8} {'iterations':>10} "
+          f"{'cuts':>5}")
+    for n_boards in range(1, arguments.boards + 1):
+        for random_seed in range(arguments.seeds):
+            input_list = run_problem_data_generator(n_boards,
+                                                    random_seed=random_seed,
+                                                    board_length=max_board_length)
+            monolithic_time, monolithic_waste = solve_monolithic(input_list,
+                                                                 arguments.time_limit)
+            result = solve_decomposed(candidate_cuts_pipeline(input_list),
+                                      arguments.time_limit)
+            print(f"{n_boards:>6} {random_seed:>4} {monolithic_time:>14.2f} "
+                  f"{str(monolithic_waste):>8} {result.runtime:>14.2f} "
+                  f"{str(result.waste):>8} {result.bound:>8.1f} "
+                  f"{result.iterations:>10} "
+                  f"{result.no_good_cuts + result.optimality_cuts:>5}")
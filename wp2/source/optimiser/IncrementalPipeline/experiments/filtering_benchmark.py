@@ -0,0 +1,69 @@
+"""
+Scaling benchmark of the filtering formulations.
+
+For growing numbers of pieces, the FilteringMachine and the
+CompactFilteringMachine (without and with max_shift) are built and solved,
+comparing model size, build time and solve time.
+"""
+
+import random
+from time import time
+from gurobipy import Model
+from IncrementalPipeline.Machines.CompactFilteringMachine import CompactFilteringMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.simple_computations import (
+    max_board_length,
+    max_pieces_per_board
+)
+from IncrementalPipeline.Tools.to_vars import to_vars
+
+
+def random_pieces(n_pieces, random_seed=0):
+    """
+    Returns n_pieces pieces, a third of them empty and a fifth of them bad.
+    """
+    rng = random.Random(random_seed)
+    pieces = []
+    for _ in range(n_pieces):
+        length = 0 if rng.random() < 1 / 3 else rng.randint(1, max_board_length)
+        pieces.append(Piece(length=length, good=rng.random() >= 1 / 5))
+    return pieces
+
+
+def time_filtering(machine, input_list, time_limit=60):
+    """
+    Returns the model size, build time and solve time of the machine.
+    """
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    model.setParam('TimeLimit', time_limit)
+    vars_input = to_vars(input_list, model, machine.id)
+    start_time = time()
+    machine.impose_conditions(model, vars_input)
+    model.update()
+    build_time = time() - start_time
+
+    start_time = time()
+    model.optimize()
+    solve_time = time() - start_time
+    return (model.NumVars, model.NumConstrs, model.NumGenConstrs,
+            build_time, solve_time)
+
+
+if __name__ == "__main__":
+    machines = {
+        "filtering": lambda: FilteringMachine(id="benchmark"),
+        "compact": lambda: CompactFilteringMachine(id="benchmark"),
+        "compact shift": lambda: CompactFilteringMachine(
+            id="benchmark", max_shift=max_pieces_per_board),
+    }
+    print(f"{'pieces':>6} {'machine':>13} {'vars':>8} {'constrs':>8} "
+          f"{'genconstrs':>10} {'build [s]':>9} {'solve [s]':>9}")
+    for n_boards in [1, 2, 3, 5, 10]:
+        input_list = random_pieces(n_boards * max_pieces_per_board)
+        for name, create_machine in machines.items():
+            n_vars, n_constrs, n_genconstrs, build_time, solve_time = \
+                time_filtering(create_machine(), input_list)
+            print(f"{len(input_list):>6} {name:>13} {n_vars:>8} {n_constrs:>8} "
+                  f"{n_genconstrs:>10} {build_time:>9.3f} {solve_time:>9.3f}")
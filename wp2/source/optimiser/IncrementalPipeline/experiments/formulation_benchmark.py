@@ -0,0 +1,64 @@
+"""
+Benchmark of the formulations of the logical constraints.
+
+The same instances are solved with the default pipeline once with
+indicator constraints and once with big M rows,
+comparing root bound, node count and wall time.
+"""
+
+from time import time
+from gurobipy import Model, GRB
+from IncrementalPipeline.configs.default_pipeline import pipeline
+from IncrementalPipeline.experiments.create_list_boards import (
+    run_problem_data_generator
+)
+from IncrementalPipeline.Tools.formulation import FORMULATIONS
+
+
+def root_bound_callback(model, where):
+    """
+    Keeps the last bound seen at the root node in model._root_bound.
+    """
+    if where == GRB.Callback.MIPNODE:
+        if model.cbGet(GRB.Callback.MIPNODE_NODCNT) == 0:
+            model._root_bound = model.cbGet(GRB.Callback.MIPNODE_OBJBND)
+
+
+def solve_with_formulation(input_list, formulation, time_limit=60):
+    """
+    Returns the root bound, node count, wall time and objective value
+    of the default pipeline built with the given formulation.
+    """
+    pipeline.set_formulation(formulation)
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    model.setParam('TimeLimit', time_limit)
+    pipeline.intermediate_lists[0] = input_list
+    pipeline.impose_conditions(model)
+    model._root_bound = None
+
+    start_time = time()
+    model.optimize(root_bound_callback)
+    wall_time = time() - start_time
+
+    objective = model.ObjVal if model.SolCount > 0 else None
+    return model._root_bound, model.NodeCount, wall_time, objective
+
+
+if __name__ == "__main__":
+    results = dict()
+    for n_boards in range(1, 5):
+        for random_seed in range(3):
+            input_list = run_problem_data_generator(n_boards,
+                                                    random_seed=random_seed)
+            for formulation in FORMULATIONS:
+                results[n_boards, random_seed, formulation] = \
+                    solve_with_formulation(input_list, formulation)
+
+    print(f"{'boards':>6} {'seed':>4} {'formulation':>11} {'root bound':>10} "
+          f"{'nodes':>8} {'time [s]':>9} {'objective':>10}")
+    for (n_boards, random_seed, formulation), result in results.items():
+        root_bound, node_count, wall_time, objective = result
+        print(f"{n_boards:>6} {random_seed:>4} {formulation:>11} "
+              f"{str(root_bound):>10} {node_count:>8.0f} {wall_time:>9.2f} "
+              f"{str(objective):>10}")
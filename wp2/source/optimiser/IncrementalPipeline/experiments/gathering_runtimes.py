@@ -7,9 +7,12 @@ from IncrementalPipeline.experiments.time_solution import (
     time_solution,
     time_solution_after_warm_start
 )
+from IncrementalPipeline.Tools.model_cache import ModelTemplateCache
 
 
 if __name__ == "__main__":
+    # Runs with the same number of boards and parts reuse their model
+    cache = ModelTemplateCache()
     timings = dict()
     warm_start_timings = dict()
     for i in range(2, 7):
@@ -22,9 +25,9 @@ if __name__ == "__main__":
             print(f"Testing input size: {i}",
                   "type of input:",
                   type(input_list))
-            _, total_time = time_solution(input_list)
+            _, total_time = time_solution(input_list, cache=cache)
             timings[i].append(total_time)
-            time_taken = time_solution_after_warm_start(input_list)
+            time_taken = time_solution_after_warm_start(input_list, cache=cache)
             warm_start_timings[i].append(time_taken)
             print(f"Input size: {i}, Time taken: {total_time:.2f} seconds")
             print(f"Time taken after warm start: {time_taken:.2f} seconds")
@@ -32,6 +35,7 @@ if __name__ == "__main__":
         print(timings[i])
         print("Timings with warm start:")
         print(warm_start_timings[i])
+    print(f"Model templates: {cache.hits} hits, {cache.misses} misses")
     print("Average timings without warm start:")
     for size, times in timings.items():
         print(f"Size {size}: {sum(times) / len(times)} seconds")
@@ -0,0 +1,68 @@
+"""
+Benchmark of integer lengths against continuous lengths.
+
+The same instances are solved with the default pipeline once with
+continuous length variables and once with integer multiples of the
+unit of their data (see Tools.integer_lengths),
+comparing node count, wall time and objective value.
+
+Run from wp2/source/optimiser:
+    python -m IncrementalPipeline.experiments.integer_lengths_benchmark --boards 3
+"""
+
+import argparse
+from time import time
+from gurobipy import Model
+from IncrementalPipeline.configs.default_pipeline import pipeline
+from IncrementalPipeline.experiments.create_list_boards import (
+    run_problem_data_generator
+)
+from IncrementalPipeline.Tools.integer_lengths import length_unit
+from IncrementalPipeline.Tools.simple_computations import max_board_length
+
+
+def solve_with_unit(input_list, unit, time_limit: float):
+    """
+    Returns the node count, wall time and objective value of the default
+    pipeline with lengths multiple of unit, continuous if unit is None.
+    """
+    pipeline.set_length_unit(unit)
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    model.setParam('TimeLimit', time_limit)
+    pipeline.intermediate_lists[0] = input_list
+    pipeline.impose_conditions(model)
+
+    start_time = time()
+    model.optimize()
+    wall_time = time() - start_time
+
+    objective = model.ObjVal if model.SolCount > 0 else None
+    return model.NodeCount, wall_time, objective
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--boards", type=int, default=3,
+                        help="largest number of boards")
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--time-limit", type=float, default=60)
+    # Read by config_loader
+    parser.add_argument("--config")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    print(f"{'boards':>6} {'seed':>4} {'unit':>4} {'nodes':>8} "
+          f"{'time [s]':>9} {'objective':>10}")
+    for n_boards in range(1, arguments.boards + 1):
+        for random_seed in range(arguments.seeds):
+            input_list = run_problem_data_generator(n_boards,
+                                                    random_seed=random_seed,
+                                                    board_length=max_board_length)
+            for unit in (None, length_unit(input_list)):
+                node_count, wall_time, objective = solve_with_unit(
+                    input_list, unit, arguments.time_limit)
+                print(f"{n_boards:>6} {random_seed:>4} {str(unit):>4} "
+                      f"{node_count:>8.0f} {wall_time:>9.2f} {str(objective):>10}")
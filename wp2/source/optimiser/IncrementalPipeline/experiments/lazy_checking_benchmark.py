@@ -0,0 +1,73 @@
+"""
+Benchmark of the lazy rules of the checking machine.
+
+The same instances are solved with the default pipeline once with
+all the rules of the checking machine in the model (eager),
+and once with the rules on cuts too close and in forbidden zones
+only added when an incumbent violates them (lazy),
+comparing build time, model size, wall time and objective value.
+"""
+
+from time import time
+from gurobipy import Model
+from IncrementalPipeline.configs.default_pipeline import pipeline
+from IncrementalPipeline.experiments.create_list_boards import (
+    run_problem_data_generator
+)
+from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
+from IncrementalPipeline.Tools.lazy_constraints import lazy_callback
+
+
+def checking_machines():
+    return [machine for machine in pipeline.machines
+            if isinstance(machine, CheckingMachine)]
+
+
+def solve_checking(input_list, lazy, time_limit=60):
+    """
+    Returns the build time, the size of the model, the wall time,
+    the objective value and the number of lazy rules added
+    of the default pipeline with eager or lazy checking machines.
+    """
+    for machine in checking_machines():
+        machine.lazy = lazy
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    model.setParam('TimeLimit', time_limit)
+    start_time = time()
+    pipeline.intermediate_lists[0] = input_list
+    pipeline.impose_conditions(model)
+    model.update()
+    build_time = time() - start_time
+
+    start_time = time()
+    if lazy:
+        model.setParam('LazyConstraints', 1)
+        model.optimize(lazy_callback(pipeline.lazy_machines()))
+    else:
+        model.optimize()
+    wall_time = time() - start_time
+
+    objective = model.ObjVal if model.SolCount > 0 else None
+    separated = sum(machine.n_separated for machine in checking_machines())
+    return (build_time, model.NumVars, model.NumConstrs, model.NumGenConstrs,
+            wall_time, objective, separated)
+
+
+if __name__ == "__main__":
+    print(f"{'boards':>6} {'seed':>4} {'mode':>5} {'build [s]':>9} {'vars':>7} "
+          f"{'constrs':>7} {'general':>7} {'time [s]':>9} {'objective':>10} "
+          f"{'separated':>9}")
+    for n_boards in range(1, 5):
+        for random_seed in range(3):
+            input_list = run_problem_data_generator(n_boards,
+                                                    random_seed=random_seed)
+            for lazy in [False, True]:
+                (build_time, n_vars, n_constrs, n_genconstrs,
+                 wall_time, objective, separated) = \
+                    solve_checking(input_list, lazy)
+                print(f"{n_boards:>6} {random_seed:>4} "
+                      f"{'lazy' if lazy else 'eager':>5} {build_time:>9.3f} "
+                      f"{n_vars:>7} {n_constrs:>7} {n_genconstrs:>7} "
+                      f"{wall_time:>9.2f} {str(objective):>10} {separated:>9}",
+                      flush=True)
@@ -0,0 +1,122 @@
+"""
+Benchmark of the warm start from the solution pool.
+
+For several numbers of boards, the model with n boards is solved,
+and the model with n + 1 boards is started once from its incumbent only
+and once from the best solutions of its pool (see
+Tools.warm_start.pool_values), comparing the time to the first incumbent
+and to the first good one, within --tolerance of the best objective
+found by either run.
+
+Run from wp2/source/optimiser:
+    python -m IncrementalPipeline.experiments.pool_warm_start_benchmark --boards 3
+"""
+
+import argparse
+from gurobipy import GRB
+from IncrementalPipeline.configs.default_pipeline import pipeline
+from IncrementalPipeline.experiments.create_list_boards import (
+    run_problem_data_generator
+)
+from IncrementalPipeline.experiments.warm_start_benchmark import build_model
+from IncrementalPipeline.Tools.simple_computations import max_board_length
+from IncrementalPipeline.Tools.warm_start import pool_values, warm_start_from_pool
+
+
+def record_incumbents(model, where):
+    if where == GRB.Callback.MIPSOL:
+        model._incumbents.append((model.cbGet(GRB.Callback.RUNTIME),
+                                  model.cbGet(GRB.Callback.MIPSOL_OBJ)))
+
+
+def solve_from_pool(input_list, pool, time_limit: float):
+    """
+    Returns the (runtime, objective) of every incumbent of the model
+    of input_list started from the pool, and its final objective.
+    """
+    model = build_model(input_list)
+    model.setParam('TimeLimit', time_limit)
+    warm_start_from_pool(model, pool, pipeline.no_machine_changes)
+    model._incumbents = []
+    model.optimize(record_incumbents)
+    objective = model.ObjVal if model.SolCount > 0 else None
+    incumbents = model._incumbents
+    model.dispose()
+    return incumbents, objective
+
+
+def time_to_objective(incumbents, objective):
+    """
+    Returns the runtime of the first incumbent at most objective,
+    None if there is none.
+    """
+    return next((runtime for runtime, value in incumbents
+                 if value <= objective + 1e-6), None)
+
+
+def compare_starts(n_boards, pool_starts, time_limit, tolerance, random_seed=0):
+    """
+    Returns, for one start and for pool_starts starts, the time to the
+    first incumbent, its objective, the time to a good incumbent
+    and the final objective, or None if the model with n_boards
+    has no solution to start from.
+    """
+    input_list = run_problem_data_generator(n_boards + 1,
+                                            random_seed=random_seed,
+                                            board_length=max_board_length)
+    previous_model = build_model(input_list[:-1])
+    previous_model.setParam('TimeLimit', time_limit)
+    previous_model.setParam('PoolSolutions', max(10, pool_starts))
+    previous_model.optimize()
+    pool = pool_values(previous_model, pool_starts)
+    previous_model.dispose()
+    if not pool:
+        return None
+
+    runs = {n_starts: solve_from_pool(input_list, pool[:n_starts], time_limit)
+            for n_starts in (1, len(pool))}
+    best = min(objective for _, objective in runs.values() if objective is not None)
+    good = best * (1 + tolerance)
+    results = dict()
+    for n_starts, (incumbents, objective) in runs.items():
+        first_time, first_objective = incumbents[0] if incumbents else (None, None)
+        results[n_starts] = (first_time, first_objective,
+                             time_to_objective(incumbents, good), objective)
+    return results
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--boards", type=int, default=3,
+                        help="largest number of boards of the previous model")
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--pool-starts", type=int, default=5)
+    parser.add_argument("--time-limit", type=float, default=30)
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="relative distance of a good incumbent to the best objective")
+    # Read by config_loader
+    parser.add_argument("--config")
+    return parser.parse_args()
+
+
+def format_time(runtime):
+    return f"{runtime:.2f}" if runtime is not None else "-"
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    print(f"{'boards':>6} {'seed':>4} {'starts':>6} {'first [s]':>9} {'first obj':>10} "
+          f"{'good [s]':>8} {'objective':>10}")
+    for n_boards in range(1, arguments.boards + 1):
+        for random_seed in range(arguments.seeds):
+            results = compare_starts(n_boards, arguments.pool_starts,
+                                     arguments.time_limit, arguments.tolerance,
+                                     random_seed)
+            if results is None:
+                print(f"{n_boards:>6} {random_seed:>4} no solution to warm start from")
+                continue
+            for n_starts, (first_time, first_objective, good_time, objective)\
+                    in results.items():
+                print(f"{n_boards:>6} {random_seed:>4} {n_starts:>6} "
+                      f"{format_time(first_time):>9} {str(first_objective):>10} "
+                      f"{format_time(good_time):>8} {str(objective):>10}")
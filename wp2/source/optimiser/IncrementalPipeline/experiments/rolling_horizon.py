@@ -0,0 +1,64 @@
+"""
+Model size and solve time per step of a long shift with a horizon.
+
+The default pipeline processes a shift of boards of the problem data
+generator with IncrementalMachine, every machine looking ahead as many
+steps as given, and the size of the model and the runtime of every step
+are printed with the waste of the processed inputs.
+
+Run from wp2/source/optimiser:
+    python -m IncrementalPipeline.experiments.rolling_horizon --boards 20
+"""
+
+import argparse
+import contextlib
+import io
+from time import time
+from IncrementalPipeline.configs.default_pipeline import pipeline
+from IncrementalPipeline.experiments.create_list_boards import (
+    run_problem_data_generator
+)
+from IncrementalPipeline.Machines.IncrementalMachine import IncrementalMachine
+from IncrementalPipeline.Tools.simple_computations import max_board_length
+
+
+def look_ahead(steps: int) -> dict:
+    """
+    Returns the horizon of every machine of the pipeline
+    covering the inputs it processes in the given number of steps.
+    """
+    return {machine.id: steps * pipeline.machine_changes_per_step[machine.id][0]
+            for machine in pipeline.machines}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--boards", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=2,
+                        help="steps of look-ahead, 0 for no horizon")
+    parser.add_argument("--time-per-step", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    # Read by config_loader
+    parser.add_argument("--config")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    input_list = run_problem_data_generator(arguments.boards,
+                                            random_seed=arguments.seed,
+                                            board_length=max_board_length)
+    horizon = look_ahead(arguments.steps) if arguments.steps > 0 else None
+    incremental_machine = IncrementalMachine(pipeline, input_list, horizon=horizon)
+    start_time = time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        waste = incremental_machine.process(time_per_step=arguments.time_per_step)
+    wall_time = time() - start_time
+
+    print(f"{'step':>4} {'vars':>7} {'constrs':>7} {'general':>7} {'time [s]':>9}")
+    for step, report in enumerate(incremental_machine.step_reports):
+        size = {key: sum(row[key] for row in report["build"].values())
+                for key in ["vars", "constrs", "genconstrs"]}
+        print(f"{step:>4} {size['vars']:>7} {size['constrs']:>7} "
+              f"{size['genconstrs']:>7} {report['runtime']:>9.2f}")
+    print(f"Waste {waste}, wall time {wall_time:.1f} s")
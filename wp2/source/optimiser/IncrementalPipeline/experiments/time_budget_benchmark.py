@@ -0,0 +1,89 @@
+"""
+Benchmark of the time budget of the steps under bursty arrivals.
+
+The boards of the problem data generator arrive in bursts, and the
+default pipeline, looking ahead two steps, processes them once with the
+same time for every step, and once with the time and the boards admitted
+decided by a TimeBudgetScheduler. The wall time, how long after the last
+arrival the pipeline was done, and the waste of the processed inputs
+are compared, with the time granted and used of every scheduled step.
+
+Run from wp2/source/optimiser:
+    python -m IncrementalPipeline.experiments.time_budget_benchmark
+"""
+
+import argparse
+import contextlib
+import io
+from time import time
+from IncrementalPipeline.configs.default_pipeline import pipeline
+from IncrementalPipeline.experiments.create_list_boards import (
+    run_problem_data_generator
+)
+from IncrementalPipeline.experiments.rolling_horizon import look_ahead
+from IncrementalPipeline.Machines.IncrementalMachine import IncrementalMachine
+from IncrementalPipeline.Tools.simple_computations import max_board_length
+from IncrementalPipeline.Tools.time_budget import TimeBudgetScheduler
+
+
+def burst_arrivals(n_boards: int, burst: int, interval: float) -> list:
+    """
+    Returns the arrival times of n_boards arriving burst at a time,
+    every interval seconds.
+    """
+    return [(index // burst) * interval for index in range(n_boards)]
+
+
+def run(input_list, arrival_times, time_per_step, scheduler=None):
+    """
+    Returns the wall time, the time after the last arrival
+    and the waste of one run.
+    """
+    for index in range(len(pipeline.intermediate_lists)):
+        pipeline.intermediate_lists[index] = []
+    incremental_machine = IncrementalMachine(pipeline, input_list,
+                                             horizon=look_ahead(2),
+                                             scheduler=scheduler,
+                                             arrival_times=arrival_times)
+    start_time = time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        waste = incremental_machine.process(time_per_step=time_per_step)
+    wall_time = time() - start_time
+    return wall_time, wall_time - arrival_times[-1], waste
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--boards", type=int, default=12)
+    parser.add_argument("--burst", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=20)
+    parser.add_argument("--time-per-step", type=float, default=5)
+    parser.add_argument("--max-time", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    # Read by config_loader
+    parser.add_argument("--config")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    input_list = run_problem_data_generator(arguments.boards,
+                                            random_seed=arguments.seed,
+                                            board_length=max_board_length)
+    arrival_times = burst_arrivals(arguments.boards, arguments.burst,
+                                   arguments.interval)
+    scheduler = TimeBudgetScheduler(max_time=arguments.max_time)
+    results = {"fixed": run(input_list, arrival_times, arguments.time_per_step),
+               "scheduled": run(input_list, arrival_times, arguments.time_per_step,
+                                scheduler)}
+
+    print(f"{'step':>4} {'waiting':>7} {'boards':>6} {'granted [s]':>11} "
+          f"{'used [s]':>8} {'gap':>8}")
+    for step, decision in enumerate(scheduler.decisions):
+        print(f"{step:>4} {decision.waiting:>7} {decision.boards:>6} "
+              f"{decision.time_limit:>11.2f} {decision.time_used:>8.2f} "
+              f"{str(decision.gap):>8.8}")
+    print(scheduler.summary())
+    print(f"{'mode':>10} {'wall [s]':>9} {'after last [s]':>14} {'waste':>8}")
+    for mode, (wall_time, lag, waste) in results.items():
+        print(f"{mode:>10} {wall_time:>9.1f} {lag:>14.1f} {waste:>8.1f}")
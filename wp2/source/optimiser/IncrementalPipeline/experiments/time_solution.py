@@ -1,27 +1,93 @@
-
+import csv
 from IncrementalPipeline.configs.default_pipeline import pipeline
 from gurobipy import Model
 from time import time
-from IncrementalPipeline.Tools.early_stop import stopping_callback
-from IncrementalPipeline.Tools.warm_start import warm_start
+from IncrementalPipeline.Tools.early_stop import default_policy
+from IncrementalPipeline.Tools.lazy_constraints import lazy_callback
+from IncrementalPipeline.Tools.tuning import load_profile, pipeline_shape
+from IncrementalPipeline.Tools.warm_start import (
+    solution_values,
+    warm_start,
+    warm_start_from_values
+)
+
 
+def build_model(input_list, warm_start_model=None, cache=None):
+    """
+    Builds the model of the default pipeline for the input list,
+    warm started from warm_start_model if given,
+    and returns it with the time taken to build it.
 
-def time_solution(input_list, warm_start_model=None):
-    new_model = Model()
+    If a ModelTemplateCache is given, the model is taken from it,
+    see Tools.model_cache.
+    """
+    start_time = time()
     pipeline.intermediate_lists[0] = input_list
-    pipeline.impose_conditions(new_model)
-    if warm_start_model is not None:
-        # Warm start the machine
-        warm_start(new_model, warm_start_model, pipeline.no_machine_changes)
+    if cache is None:
+        new_model = Model()
+        pipeline.impose_conditions(new_model)
+        if warm_start_model is not None:
+            # Warm start the machine
+            warm_start(new_model, warm_start_model, pipeline.no_machine_changes)
+    else:
+        # The template can be warm_start_model itself
+        values = (solution_values(warm_start_model)
+                  if warm_start_model is not None else dict())
+        new_model, _, _ = cache.model(pipeline)
+        warm_start_from_values(new_model, values, pipeline.no_machine_changes)
+    new_model.update()
+    return new_model, time() - start_time
+
+
+def solve_model(new_model, policy=None, trajectory_path=None):
+    """
+    Solves the model under the early stop policy (default_policy if None),
+    with the lazy rules and the tuned parameters of the pipeline,
+    and returns the time taken.
+    The trajectory of the solve is written to trajectory_path as csv if given.
+    """
+    if policy is None:
+        policy = default_policy()
+    load_profile(new_model, pipeline_shape(pipeline))
     start_time = time()
-    new_model.optimize(stopping_callback)
+    policy.start(new_model, start_time)
+    callback = policy
+    lazy_machines = pipeline.lazy_machines()
+    if lazy_machines:
+        new_model.setParam('LazyConstraints', 1)
+        callback = lazy_callback(lazy_machines, policy)
+    new_model.optimize(callback)
     time_taken = time() - start_time
+    if trajectory_path is not None:
+        record_trajectory(policy.trajectory(new_model), trajectory_path)
+    return time_taken
+
+
+def time_solution(input_list, warm_start_model=None, policy=None,
+                  trajectory_path=None, cache=None):
+    """
+    Solves the default pipeline for the input list,
+    and returns the model and the time taken by the solve.
+    """
+    new_model, _ = build_model(input_list, warm_start_model, cache)
+    time_taken = solve_model(new_model, policy, trajectory_path)
     return new_model, time_taken
 
 
-def time_solution_after_warm_start(input_list):
-    previous_best_model, _ = time_solution(input_list[:-1])
+def record_trajectory(trajectory, path):
+    """
+    Writes the (seconds, incumbent, bound) of a trajectory to a csv file.
+    """
+    with open(path, "w", newline="") as trajectory_file:
+        writer = csv.writer(trajectory_file)
+        writer.writerow(["seconds", "incumbent", "bound"])
+        writer.writerows(trajectory)
+
+
+def time_solution_after_warm_start(input_list, cache=None):
+    previous_best_model, _ = time_solution(input_list[:-1], cache=cache)
     _, time_taken = time_solution(
         input_list,
-        warm_start_model=previous_best_model)
+        warm_start_model=previous_best_model,
+        cache=cache)
     return time_taken
@@ -0,0 +1,81 @@
+"""
+Tunes the Gurobi parameters of the default pipeline.
+
+For fixed seeds and numbers of boards, the step models of the problem
+data generator instances are exported with their warm start, as they are
+solved at runtime. Gurobi's tuning tool is run over them, and the best
+parameters are stored as the profile of the pipeline and the config,
+which is then loaded by IncrementalMachine, see Tools.tuning.
+
+Run from wp2/source/optimiser:
+    python -m IncrementalPipeline.experiments.tune_parameters --config ...
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+from IncrementalPipeline.configs.default_pipeline import pipeline
+from IncrementalPipeline.experiments.create_list_boards import (
+    run_problem_data_generator
+)
+from IncrementalPipeline.experiments.time_solution import build_model
+from IncrementalPipeline.Tools.simple_computations import max_board_length
+from IncrementalPipeline.Tools.tuning import (
+    export_step_model,
+    pipeline_description,
+    save_profile,
+    shape_key,
+    tune_models
+)
+
+
+def export_step_models(directory, boards, seeds, time_limit) -> list:
+    """
+    Exports, for every instance, the model with all its boards
+    warm started from the solved model without the last board.
+    """
+    paths = []
+    for n_boards in boards:
+        for seed in seeds:
+            input_list = run_problem_data_generator(n_boards, random_seed=seed,
+                                                    board_length=max_board_length)
+            previous_model, _ = build_model(input_list[:-1])
+            previous_model.setParam('OutputFlag', 0)
+            previous_model.setParam('TimeLimit', time_limit)
+            previous_model.optimize()
+            model, _ = build_model(input_list, previous_model)
+            paths.append(export_step_model(model, directory,
+                                           f"boards{n_boards}_seed{seed}"))
+    return paths
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--boards", type=int, nargs="+", default=[2, 3])
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1])
+    parser.add_argument("--time-limit", type=float, default=30,
+                        help="seconds per solve")
+    parser.add_argument("--tune-time-limit", type=float, default=300,
+                        help="seconds of tuning per model")
+    parser.add_argument("--models", help="directory to keep the exported models")
+    parser.add_argument("--profiles", help="directory of the profiles")
+    # Read by config_loader
+    parser.add_argument("--config")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        directory = Path(arguments.models or temporary_directory)
+        paths = export_step_models(directory, arguments.boards,
+                                   arguments.seeds, arguments.time_limit)
+        parameters, candidates = tune_models(paths, arguments.tune_time_limit,
+                                             arguments.time_limit)
+    print(f"{'candidate':>20} {'total [s]':>10} parameters")
+    for candidate, (candidate_parameters, total) in candidates.items():
+        print(f"{candidate:>20} {total:>10.2f} {candidate_parameters}")
+    description = pipeline_description(pipeline)
+    path = save_profile(parameters, shape_key(description), description,
+                        arguments.profiles)
+    print(f"Best parameters {parameters} stored in {path}")
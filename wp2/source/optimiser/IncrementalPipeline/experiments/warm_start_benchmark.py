@@ -0,0 +1,66 @@
+"""
+Micro-benchmark of the warm start.
+
+For several numbers of boards, the solution of the model with n boards
+is transferred to the model with n + 1 boards, once with the structural
+warm start and once with the original name-based one.
+"""
+
+from time import time
+from gurobipy import Model
+from IncrementalPipeline.configs.default_pipeline import pipeline
+from IncrementalPipeline.experiments.create_list_boards import (
+    run_problem_data_generator
+)
+from IncrementalPipeline.Tools.warm_start import warm_start, warm_start_by_name
+
+
+def build_model(input_list):
+    """
+    Builds the model of the default pipeline for the given boards.
+    """
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    pipeline.intermediate_lists[0] = input_list
+    pipeline.impose_conditions(model)
+    model.update()
+    return model
+
+
+def time_warm_start(n_boards, time_limit=10, random_seed=0):
+    """
+    Returns the number of variables of the new model and the time
+    spent by each warm start, or None if no previous solution was found.
+    """
+    input_list = run_problem_data_generator(n_boards + 1,
+                                            random_seed=random_seed)
+    previous_model = build_model(input_list[:-1])
+    previous_model.setParam('TimeLimit', time_limit)
+    previous_model.optimize()
+    if previous_model.SolCount == 0:
+        return None
+
+    new_model = build_model(input_list)
+    start_time = time()
+    warm_start(new_model, previous_model, pipeline.no_machine_changes)
+    indexed_time = time() - start_time
+
+    start_time = time()
+    warm_start_by_name(new_model, previous_model, pipeline.no_machine_changes)
+    by_name_time = time() - start_time
+
+    return new_model.NumVars, indexed_time, by_name_time
+
+
+if __name__ == "__main__":
+    results = dict()
+    for n_boards in range(1, 6):
+        results[n_boards] = time_warm_start(n_boards)
+
+    print(f"{'boards':>6} {'vars':>8} {'indexed [s]':>12} {'by name [s]':>12}")
+    for n_boards, result in results.items():
+        if result is None:
+            print(f"{n_boards:>6} no solution to warm start from")
+            continue
+        n_vars, indexed_time, by_name_time = result
+        print(f"{n_boards:>6} {n_vars:>8} {indexed_time:>12.4f} {by_name_time:>12.4f}")
@@ -1,10 +1,13 @@
 """Contains tests for the checking machine."""
 
+from gurobipy import GRB, Model
 from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
 from IncrementalPipeline.test.test_machines.utils.output_from_input import (
     can_machine_produce_output_from_input
 )
 from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.lazy_constraints import lazy_callback
+from IncrementalPipeline.Tools.to_vars import to_vars
 from IncrementalPipeline.Tools.simple_computations import (
     layer_length,
     my_forbidden_zones,
@@ -98,3 +101,47 @@ def test_layers_finish_with_zeros():
     )
     status = can_machine_produce_output_from_input(machine, input_list, [])
     assert status == 2  # GRB.OPTIMAL
+
+
+def lazy_status(input_list):
+    """
+    Returns the status of the lazy checking machine on the input list,
+    and the number of general constraints of its model.
+    """
+    machine = CheckingMachine(id="lazy_test", lazy=True)
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    machine.impose_conditions(model, to_vars(input_list, model, machine.id))
+    model.setParam('LazyConstraints', 1)
+    model.optimize(lazy_callback([machine]))
+    return model.status, model.NumGenConstrs
+
+
+def test_lazy_rules():
+    """
+    Tests that the lazy checking machine rejects cuts in forbidden zones
+    and too close in consecutive layers, without building those rules.
+    """
+    complete_second_layer = (
+        [Piece(length=layer_length)] +
+        [Piece(length=0)] * (max_pieces_per_layer - 1) +
+        [Piece(length=layer_length)]
+    )
+    status, n_genconstrs = lazy_status(complete_second_layer)
+    assert status == GRB.OPTIMAL
+    eager_model = Model()
+    eager_machine = CheckingMachine(id="eager_test")
+    eager_machine.impose_conditions(eager_model, to_vars(complete_second_layer, eager_model,
+                                                         eager_machine.id))
+    eager_model.update()
+    assert n_genconstrs < eager_model.NumGenConstrs
+
+    zone = my_forbidden_zones[0]
+    assert lazy_status([Piece(length=(zone[0] + zone[1]) / 2)])[0] == GRB.INFEASIBLE
+
+    too_close = (
+        [Piece(length=zone[0]), Piece(length=layer_length - zone[0])] +
+        [Piece(length=0)] * (max_pieces_per_layer - 2) +
+        [Piece(length=zone[0] - min_consecutive_distance / 2), Piece(length=0)]
+    )
+    assert lazy_status(too_close)[0] == GRB.INFEASIBLE
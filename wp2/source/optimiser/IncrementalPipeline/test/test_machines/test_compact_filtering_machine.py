@@ -0,0 +1,103 @@
+"""
+Contains parity tests between the compact filtering machine
+and the filtering machine.
+"""
+
+import pytest
+from gurobipy import Model
+from IncrementalPipeline.Machines.CompactFilteringMachine import CompactFilteringMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.test.test_machines.utils.output_from_input import can_machine_produce_output_from_input
+from IncrementalPipeline.test.test_machines.utils.streaming import streamed_waste_and_outputs
+from IncrementalPipeline.test.test_machines.fixtures.fixtures import piece_list1, piece_list2, piece_list3, piece_list4
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.to_vars import to_vars
+from IncrementalPipeline.Tools.var_keys import get_var_keys
+
+
+def optimal_filtering(machine, input_list):
+    """
+    Returns the optimal waste and the lengths of the non empty outputs,
+    empty pieces can be kept or dropped in different optimal solutions.
+    """
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    _, output_list = machine.impose_conditions(model, to_vars(input_list, model, machine.id))
+    model.optimize()
+    assert model.status == 2  # GRB.OPTIMAL
+    return model.ObjVal, [round(output.length.X) for output in output_list if output.length.X > 0.5]
+
+
+@pytest.mark.parametrize("input_list, expected_output", [
+    ([Piece(length=100), Piece(length=200)], [Piece(length=100), Piece(length=200)]),
+    ([Piece(length=100), Piece(length=200)], [Piece(length=100), Piece(length=0)]),
+    ([Piece(length=100), Piece(length=200)], [Piece(length=200), Piece(length=0)]),
+    ([Piece(length=100), Piece(length=200)], [Piece(length=0), Piece(length=200)]),
+    ([Piece(length=100), Piece(length=200)], [Piece(length=200), Piece(length=100)]),
+    ([Piece(length=100), Piece(length=200)], [Piece(length=100), Piece(length=300)]),
+    ([Piece(length=100, good=0), Piece(length=200)], [Piece(length=100), Piece(length=0)]),
+    ([Piece(length=100, good=0), Piece(length=200)], [Piece(length=200), Piece(length=0)]),
+])
+def test_compact_filtering_parity(input_list, expected_output):
+    """
+    Tests that both machines accept and reject the same outputs.
+    """
+    for max_shift in [None, 1]:
+        compact_machine = CompactFilteringMachine(id="parity_test", max_shift=max_shift)
+        assert (can_machine_produce_output_from_input(compact_machine, input_list, expected_output) ==
+                can_machine_produce_output_from_input(FilteringMachine(id="parity_test"),
+                                                      input_list, expected_output))
+
+
+def test_compact_filtering_parity_on_fixtures(piece_list1, piece_list2, piece_list3, piece_list4):
+    """
+    Tests that both machines have the same optimal waste and outputs
+    on the pieces cut from the fixture boards.
+    """
+    for piece_list in [piece_list1, piece_list2, piece_list3, piece_list4]:
+        assert (optimal_filtering(CompactFilteringMachine(id="parity_test"), piece_list) ==
+                optimal_filtering(FilteringMachine(id="parity_test"), piece_list))
+
+
+@pytest.mark.parametrize("machine_changes", [(1, 1), (2, 1), (1, 2)])
+def test_compact_filtering_parity_streamed(machine_changes):
+    """
+    Tests that both machines have the same waste and outputs when
+    the pieces are streamed into one model with committed decisions,
+    also after a dropped piece leaves a committed output empty.
+    """
+    input_list = [Piece(length=100), Piece(length=20, good=0),
+                  Piece(length=200), Piece(length=180)]
+    for max_shift in [None, 1]:
+        compact_machine = CompactFilteringMachine(id="parity_test", max_shift=max_shift)
+        assert (streamed_waste_and_outputs(compact_machine, input_list, machine_changes) ==
+                streamed_waste_and_outputs(FilteringMachine(id="parity_test"),
+                                           input_list, machine_changes) ==
+                (20, [100, 200, 180]))
+
+
+def test_compact_filtering_max_shift():
+    """
+    Tests that with max_shift a kept piece cannot have
+    more than max_shift dropped pieces before it.
+    """
+    input_list = [Piece(length=100, good=0), Piece(length=100, good=0), Piece(length=200)]
+    machine = CompactFilteringMachine(id="max_shift_test", max_shift=1)
+    waste, output_lengths = optimal_filtering(machine, input_list)
+    assert waste == 400
+    assert output_lengths == []
+
+
+def test_compact_filtering_id():
+    """
+    Tests that the variables of the machine are named and registered
+    under its own id.
+    """
+    machine = CompactFilteringMachine(id="id_test")
+    assert machine.id == "CompactFilteringMachineid_test"
+    model = Model()
+    machine.impose_conditions(model, to_vars([Piece(length=100)], model, machine.id))
+    model.update()
+    assert all(var.VarName.startswith(machine.id)
+               for var in model.getVars() if "keep" in var.VarName)
+    assert {key[0] for key in get_var_keys(model)} == {machine.id}
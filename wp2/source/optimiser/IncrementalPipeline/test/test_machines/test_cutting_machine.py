@@ -6,6 +6,12 @@ Tests for the CuttingMachine class using various input boards and expected outpu
 from IncrementalPipeline.test.test_machines.utils.output_from_input import can_machine_produce_output_from_input
 from IncrementalPipeline.test.test_machines.fixtures.fixtures import board1, board2, piece_list1, piece_list3, piece_list4
 from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Objects.board import BoardVars
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.simple_computations import max_pieces_per_board
+from IncrementalPipeline.test.test_machines.utils.empty_piece_filler import empty_piece_filler
+from gurobipy import Model
+import pytest
 
 
 
@@ -31,3 +37,36 @@ def test_cutting_machine_valid_multiple_boards(board1, board2, piece_list4):
     status = can_machine_produce_output_from_input(machine, [board1, board2], piece_list4)
     assert status == 2  # GRB.OPTIMAL
 
+
+def test_cutting_machine_candidate_cuts_valid_single_board(board1, piece_list1):
+    machine = CuttingMachine(id="cutting_machine_test", candidate_cuts=True)
+    status = can_machine_produce_output_from_input(machine, [board1], piece_list1)
+    assert status == 2  # GRB.OPTIMAL
+
+
+def test_cutting_machine_candidate_cuts_invalid_single_board(board2, piece_list1):
+    machine = CuttingMachine(id="cutting_machine_test", candidate_cuts=True)
+    status = can_machine_produce_output_from_input(machine, [board2], piece_list1)
+    assert status == 3  # GRB.INFEASIBLE
+
+
+def test_cutting_machine_candidate_cuts_bad_quality(board1):
+    """
+    A piece covering the bad part cannot be good,
+    even if its ends are outside of the bad part.
+    """
+    machine = CuttingMachine(id="cutting_machine_test", candidate_cuts=True)
+    output = empty_piece_filler([
+        Piece(length=50, good=1),
+        Piece(length=100, good=1),
+        Piece(length=350, good=1)
+    ], max_pieces_per_board)
+    status = can_machine_produce_output_from_input(machine, [board1], output)
+    assert status == 3  # GRB.INFEASIBLE
+
+
+def test_cutting_machine_candidate_cuts_unknown_board():
+    machine = CuttingMachine(id="cutting_machine_test", candidate_cuts=True)
+    model = Model()
+    with pytest.raises(ValueError, match="candidate cuts need known boards"):
+        machine.impose_conditions(model, [BoardVars(model)])
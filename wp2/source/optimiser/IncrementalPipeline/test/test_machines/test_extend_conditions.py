@@ -0,0 +1,118 @@
+"""
+Tests that extending a model with new inputs gives the same model
+as imposing all the inputs at once.
+"""
+
+import pytest
+from gurobipy import Model
+from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.CompactFilteringMachine import CompactFilteringMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Machines.ReorderingMachine import ReorderMachine
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Objects.piece import Piece, PieceVars
+from IncrementalPipeline.Tools.simple_computations import max_pieces_per_layer
+from IncrementalPipeline.test.test_machines.utils.streaming import streamed_waste_and_outputs
+from IncrementalPipeline.Tools.to_vars import to_vars
+from IncrementalPipeline.Tools.var_keys import get_var_keys
+
+
+def model_size(model):
+    model.update()
+    return (model.NumVars, model.NumConstrs, model.NumGenConstrs, model.NumNZs)
+
+
+def imposed_at_once(machine, input_list):
+    model = Model()
+    machine.impose_conditions(model, to_vars(input_list, model, machine.id))
+    return model
+
+
+def imposed_in_two_steps(machine, input_list, n_first):
+    model = Model()
+    machine.impose_conditions(model, to_vars(input_list[:n_first], model, machine.id))
+    machine.extend_conditions(model, to_vars(input_list[n_first:], model, machine.id,
+                                             start_index=n_first))
+    return model
+
+
+pieces = [Piece(length=100), Piece(length=20, good=0), Piece(length=200), Piece(length=180)]
+checking_pieces = [Piece(length=50)] * (max_pieces_per_layer + 3)
+
+
+@pytest.mark.parametrize("machine, input_list, n_first", [
+    (ReorderMachine(id="extend_test", input_type=PieceVars), pieces, 1),
+    (ReorderMachine(id="extend_test", input_type=PieceVars), pieces, 3),
+    (ReorderMachine(id="extend_test", input_type=PieceVars, window=1), pieces, 2),
+    (FilteringMachine(id="extend_test"), pieces, 2),
+    (CompactFilteringMachine(id="extend_test"), pieces, 2),
+    (CompactFilteringMachine(id="extend_test", max_shift=1), pieces, 2),
+    (CheckingMachine(id="extend_test"), checking_pieces, 2),
+    (CheckingMachine(id="extend_test"), checking_pieces, max_pieces_per_layer),
+    (CuttingMachine(id="extend_test"), [Board(length=500, bad_parts=[(90, 100)], curved_parts=[])] * 2, 1),
+])
+def test_extension_has_same_size(machine, input_list, n_first):
+    """
+    Tests that the extended model has as many variables, constraints,
+    general constraints and nonzeros as the model imposed at once.
+    """
+    assert (model_size(imposed_in_two_steps(machine, input_list, n_first)) ==
+            model_size(imposed_at_once(machine, input_list)))
+
+
+def test_extended_reorder_is_infeasible():
+    """
+    Tests that an extended reordering machine still forbids moving
+    the last element two places to the front.
+    """
+    machine = ReorderMachine(id="extend_test", input_type=PieceVars)
+    input_list = [Piece(length=100), Piece(length=200), Piece(length=300)]
+    model = Model()
+    machine.impose_conditions(model, to_vars(input_list[:2], model, machine.id))
+    _, new_outputs = machine.extend_conditions(
+        model, to_vars(input_list[2:], model, machine.id, start_index=2))
+    assert len(new_outputs) == 1
+    model.addConstr(machine.output_list[0].length == 300)
+    model.optimize()
+    assert model.status == 3  # GRB.INFEASIBLE
+
+
+def test_committed_filtering_links_only_new_items():
+    """
+    Tests that once a piece is committed, the filtering machine only
+    links the new pieces with those not committed yet, and still finds
+    the least waste.
+    """
+    machine = FilteringMachine(id="extend_test")
+    pipeline = Pipeline("extend_test", [machine],
+                        machine_changes_per_step={machine.id: (1, 1)})
+    pipeline.intermediate_lists[0] = pieces[:3]
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    pipeline.impose_conditions(model)
+    model.optimize()
+    pipeline.commit_decisions(model)
+    assert machine.n_committed == (1, 1)
+
+    pipeline.extend_conditions(model, pieces[3:])
+    pairs = {key[2:4] for key in get_var_keys(model) if key[1] == "input_to_output"}
+    # The pairs of the 3 pieces not committed with the new one,
+    # but not those of the committed piece 0
+    assert {(3, 1), (3, 2), (3, 3), (1, 3), (2, 3)} <= pairs
+    assert not {(0, 3), (3, 0)} & pairs
+    model.optimize()
+    assert model.ObjVal == pytest.approx(20)
+
+
+@pytest.mark.parametrize("machine_changes", [(1, 1), (2, 1), (1, 2)])
+def test_streamed_filtering_keeps_pieces_after_a_dropped_one(machine_changes):
+    """
+    Tests that when a dropped piece leaves a committed output empty,
+    the good pieces streamed after it still get an output.
+    """
+    waste, output_lengths = streamed_waste_and_outputs(
+        FilteringMachine(id="stream_test"), pieces, machine_changes)
+    assert waste == pytest.approx(20)
+    assert output_lengths == [100, 200, 180]
@@ -0,0 +1,66 @@
+"""
+Tests that the machines accept and reject the same inputs and outputs
+with the big M formulation as with the indicator formulation.
+"""
+
+import pytest
+from IncrementalPipeline.test.test_machines.utils.output_from_input import can_machine_produce_output_from_input
+from IncrementalPipeline.test.test_machines.fixtures.fixtures import board1, board2, piece_list1, piece_list3, piece_list4
+from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.ReorderingMachine import ReorderMachine
+from IncrementalPipeline.Objects.piece import Piece, PieceVars
+from IncrementalPipeline.Tools.formulation import BIG_M, INDICATORS
+from IncrementalPipeline.Tools.simple_computations import (
+    layer_length,
+    my_forbidden_zones,
+    max_pieces_per_layer
+)
+
+
+@pytest.mark.parametrize("formulation", [INDICATORS, BIG_M])
+def test_cutting_machine_formulations(formulation, board1, board2, piece_list1, piece_list3, piece_list4):
+    machine = CuttingMachine(id="formulation_test", formulation=formulation)
+    assert can_machine_produce_output_from_input(machine, [board1], piece_list1) == 2  # GRB.OPTIMAL
+    assert can_machine_produce_output_from_input(machine, [board2], piece_list1) == 3  # GRB.INFEASIBLE
+    assert can_machine_produce_output_from_input(machine, [board1, board2], piece_list3) == 3  # GRB.INFEASIBLE
+    assert can_machine_produce_output_from_input(machine, [board1, board2], piece_list4) == 2  # GRB.OPTIMAL
+
+
+@pytest.mark.parametrize("formulation", [INDICATORS, BIG_M])
+def test_filtering_machine_formulations(formulation):
+    machine = FilteringMachine(id="formulation_test", formulation=formulation)
+    input_list = [Piece(length=100), Piece(length=200)]
+    assert can_machine_produce_output_from_input(
+        machine, input_list, [Piece(length=200), Piece(length=0)]) == 2  # GRB.OPTIMAL
+    assert can_machine_produce_output_from_input(
+        machine, input_list, [Piece(length=0), Piece(length=200)]) == 3  # GRB.INFEASIBLE
+    assert can_machine_produce_output_from_input(
+        machine, [Piece(length=100, good=0)], [Piece(length=100)]) == 3  # GRB.INFEASIBLE
+
+
+@pytest.mark.parametrize("formulation", [INDICATORS, BIG_M])
+def test_reorder_machine_formulations(formulation):
+    machine = ReorderMachine(id="formulation_test", input_type=PieceVars, formulation=formulation)
+    input_list = [Piece(length=100), Piece(length=200), Piece(length=300)]
+    assert can_machine_produce_output_from_input(
+        machine, input_list,
+        [Piece(length=200), Piece(length=100), Piece(length=300)]) == 2  # GRB.OPTIMAL
+    assert can_machine_produce_output_from_input(
+        machine, input_list,
+        [Piece(length=300), Piece(length=100), Piece(length=200)]) == 3  # GRB.INFEASIBLE
+
+
+@pytest.mark.parametrize("formulation", [INDICATORS, BIG_M])
+def test_checking_machine_formulations(formulation):
+    machine = CheckingMachine(id="formulation_test", formulation=formulation)
+    complete_second_layer = (
+        [Piece(length=layer_length)] +
+        [Piece(length=0)] * (max_pieces_per_layer - 1) +
+        [Piece(length=layer_length)]
+    )
+    assert can_machine_produce_output_from_input(machine, complete_second_layer, []) == 2  # GRB.OPTIMAL
+    for forbidden_zone in my_forbidden_zones:
+        input_list = [Piece(length=(forbidden_zone[0] + forbidden_zone[1]) / 2)]
+        assert can_machine_produce_output_from_input(machine, input_list, []) == 3  # GRB.INFEASIBLE
@@ -0,0 +1,82 @@
+"""
+Tests that a pipeline with a horizon builds models whose size
+does not depend on how many inputs are buffered.
+"""
+
+import pytest
+from gurobipy import Model
+from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.IncrementalMachine import IncrementalMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.model_size import model_size
+from IncrementalPipeline.Tools.simple_computations import max_pieces_per_board
+
+
+def horizon_pipeline():
+    cutting_machine = CuttingMachine("horizon_test")
+    filtering_machine = FilteringMachine("horizon_test")
+    checking_machine = CheckingMachine("horizon_test")
+    return Pipeline("horizon_test",
+                    [cutting_machine, filtering_machine, checking_machine],
+                    machine_changes_per_step={
+                        cutting_machine.id: (1, max_pieces_per_board),
+                        filtering_machine.id: (max_pieces_per_board, max_pieces_per_board),
+                        checking_machine.id: (max_pieces_per_board, 0)})
+
+
+def built_size(n_boards, n_pieces, horizon):
+    pipeline = horizon_pipeline()
+    pipeline.set_horizon(horizon)
+    pipeline.intermediate_lists[0] = [Board(length=300, bad_parts=[(100, 120)])] * n_boards
+    pipeline.intermediate_lists[1] = [Piece(length=100)] * n_pieces
+    model = Model()
+    pipeline.impose_conditions(model)
+    return model_size(model), pipeline
+
+
+def test_size_does_not_depend_on_the_buffers():
+    """
+    Tests that buffered boards and pieces beyond the horizon
+    are left out of the model.
+    """
+    cutting_id, filtering_id = (machine.id for machine in horizon_pipeline().machines[:2])
+    horizon = {cutting_id: 2, filtering_id: 2 * max_pieces_per_board}
+    size, pipeline = built_size(2, 1, horizon)
+    assert built_size(5, 1, horizon)[0] == size
+    assert pipeline.machines[1].n_inputs == 2 * max_pieces_per_board
+    # Without the horizon, every buffered board is in the model
+    assert built_size(5, 1, None)[0]["vars"] > size["vars"]
+    # A full buffer leaves the outputs of the cutting machine out
+    full_size, pipeline = built_size(2, 2 * max_pieces_per_board, horizon)
+    cut_pieces = pipeline.machines_output[cutting_id]
+    assert not any(piece in cut_pieces for piece in pipeline.machines[1].input_list)
+    assert pipeline.machines[1].n_inputs == 2 * max_pieces_per_board
+
+
+def test_horizon_covers_a_step():
+    pipeline = horizon_pipeline()
+    with pytest.raises(ValueError):
+        pipeline.set_horizon({pipeline.machines[1].id: max_pieces_per_board - 1})
+    with pytest.raises(ValueError):
+        IncrementalMachine(pipeline, [], incremental_model=True,
+                           horizon={pipeline.machines[0].id: 1})
+
+
+def test_committed_waste_is_printed_with_the_outputs(capsys):
+    """
+    Tests that the waste committed with a horizon is only printed
+    if the outputs are dumped.
+    """
+    for dump_outputs in [False, True]:
+        machine = FilteringMachine("horizon_test")
+        pipeline = Pipeline("horizon_test", [machine],
+                            machine_changes_per_step={machine.id: (1, 1)})
+        run = IncrementalMachine(pipeline, [Piece(length=100), Piece(length=20, good=0)],
+                                 horizon={machine.id: 1}, dump_outputs=dump_outputs)
+        capsys.readouterr()
+        assert run.process(time_per_step=5) == pytest.approx(20)
+        assert ("Committed waste" in capsys.readouterr().out) == dump_outputs
@@ -57,4 +57,27 @@ def test_reordering_machine_invalid():
     input_list = [Piece(length=100), Piece(length=200)]
     expected_output = [Piece(length=300), Piece(length=400)]  # Invalid output
     status = can_machine_produce_output_from_input(machine, input_list, expected_output)
-    assert status == 3  # GRB.INFEASIBLE
\ No newline at end of file
+    assert status == 3  # GRB.INFEASIBLE
+
+def test_reordering_machine_valid_window():
+    """
+    Tests if the reordering machine with a window can move a piece
+    as many places as the window.
+    """
+    machine = ReorderMachine(id="reorder_machine_test", input_type=PieceVars, window=2)
+    input_list = [Piece(length=100), Piece(length=200), Piece(length=300), Piece(length=400)]
+    expected_output = [Piece(length=200), Piece(length=300), Piece(length=100), Piece(length=400)]
+    status = can_machine_produce_output_from_input(machine, input_list, expected_output)
+    assert status == 2  # GRB.OPTIMAL
+
+
+def test_reordering_machine_invalid_window():
+    """
+    Tests if the reordering machine with a window correctly identifies
+    that a piece cannot move more places than the window.
+    """
+    machine = ReorderMachine(id="reorder_machine_test", input_type=PieceVars, window=1)
+    input_list = [Piece(length=100), Piece(length=200), Piece(length=300), Piece(length=400)]
+    expected_output = [Piece(length=200), Piece(length=300), Piece(length=100), Piece(length=400)]
+    status = can_machine_produce_output_from_input(machine, input_list, expected_output)
+    assert status == 3  # GRB.INFEASIBLE
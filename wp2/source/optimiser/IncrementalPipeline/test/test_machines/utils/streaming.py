@@ -0,0 +1,29 @@
+"""
+Streams pieces one step at a time through a pipeline of one machine,
+extending the same model and committing its decisions after every step.
+"""
+
+from gurobipy import Model
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+
+
+def streamed_waste_and_outputs(machine, input_list, machine_changes: tuple):
+    """
+    Returns the objective of the last step and the lengths of the non
+    empty outputs of the machine, with one input added per step and
+    machine_changes inputs and outputs committed after each.
+    """
+    pipeline = Pipeline(f"{machine.id}-stream", [machine],
+                        machine_changes_per_step={machine.id: machine_changes})
+    pipeline.intermediate_lists[0] = input_list[:1]
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    pipeline.impose_conditions(model)
+    model.optimize()
+    pipeline.commit_decisions(model)
+    for item in input_list[1:]:
+        pipeline.extend_conditions(model, [item])
+        model.optimize()
+        pipeline.commit_decisions(model)
+    return model.ObjVal, [round(output.length.X) for output in machine.output_list
+                          if output.length.X > 0.5]
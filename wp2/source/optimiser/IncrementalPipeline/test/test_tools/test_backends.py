@@ -0,0 +1,104 @@
+"""Contains tests for the backends of the pipeline models."""
+
+import pytest
+from gurobipy import GRB
+from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Machines.ReorderingMachine import ReorderMachine
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Objects.piece import PieceBatch, PieceVars
+from IncrementalPipeline.configs.default_pipeline import reorder_window
+from IncrementalPipeline.Tools.backends import CP_SAT, GUROBI, create_model, quicksum
+from IncrementalPipeline.Tools.simple_computations import max_pieces_per_board
+
+pytest.importorskip("ortools")
+
+
+def solved_model(backend):
+    pipeline = Pipeline("backend_test", [CuttingMachine("backend_test", candidate_cuts=True),
+                                         FilteringMachine("backend_test")])
+    pipeline.intermediate_lists[0] = [Board(length=80, bad_parts=[(50, 60)], curved_parts=[])]
+    model = create_model(backend)
+    model.setParam('OutputFlag', 0)
+    _, machines_output = pipeline.impose_conditions(model)
+    model.optimize()
+    return model, machines_output[pipeline.machines[0].id]
+
+
+def test_same_objective():
+    gurobi_model, _ = solved_model(GUROBI)
+    model, pieces = solved_model(CP_SAT)
+    assert model.Status == GRB.OPTIMAL
+    assert model.ObjVal == pytest.approx(gurobi_model.ObjVal)
+    batch = PieceBatch.from_piece_vars(model, pieces)
+    assert sum(batch.lengths) == 80
+
+
+def test_cp_sat_constraints():
+    model = create_model(CP_SAT)
+    x = model.addVars(3, vtype=GRB.INTEGER, ub=10, name="x")
+    on = model.addVar(vtype=GRB.BINARY, name="on")
+    model.addConstr(quicksum(x[i] for i in range(3)) >= 12, name="total")
+    model.addGenConstrIndicator(on, 0, x[0] == 0, name="off")
+    model.setObjective(quicksum([2 * x[0], x[1], x[2], 1]) + on, GRB.MINIMIZE)
+    model.optimize()
+    assert model.Status == GRB.OPTIMAL
+    # x[1] and x[2] give 12 at 1 per unit, x[0] stays 0
+    assert model.ObjVal == 13
+    assert model.getAttr("X", [x[0], on]) == [0, 0]
+
+
+def test_cp_sat_needs_integers():
+    model = create_model(CP_SAT)
+    x = model.addVar(name="x")
+    model.addConstr(2.5 * x <= 4, name="fractional")
+    with pytest.raises(ValueError):
+        model.optimize()
+    with pytest.raises(ValueError):
+        model.setParam('MIPFocus', 1)
+
+
+def test_cp_sat_extends_the_default_pipeline():
+    """
+    Tests the machines of the default pipeline on CP-SAT over two steps:
+    the decisions of the first board are committed, and the second board
+    extends the model, which removes and imposes again layers of checking.
+    """
+    cutting_machine = CuttingMachine("backend_test", candidate_cuts=True)
+    reordering_machine = ReorderMachine("backend_test", input_type=PieceVars,
+                                        window=reorder_window)
+    filtering_machine = FilteringMachine("backend_test")
+    checking_machine = CheckingMachine("backend_test")
+    pipeline = Pipeline("backend_test",
+                        [cutting_machine, reordering_machine, filtering_machine,
+                         checking_machine],
+                        machine_changes_per_step={
+                            cutting_machine.id: (1, max_pieces_per_board),
+                            reordering_machine.id: (max_pieces_per_board,
+                                                    max_pieces_per_board),
+                            filtering_machine.id: (max_pieces_per_board,
+                                                   max_pieces_per_board),
+                            checking_machine.id: (max_pieces_per_board, 0)})
+    pipeline.intermediate_lists[0] = [Board(length=80, bad_parts=[(50, 60)], curved_parts=[])]
+    model = create_model(CP_SAT)
+    model.setParam('OutputFlag', 0)
+    model.setParam('Threads', 1)
+    pipeline.impose_conditions(model)
+    model.optimize()
+    assert model.Status == GRB.OPTIMAL
+    first_objective = model.ObjVal
+    first_pieces = PieceBatch.from_piece_vars(
+        model, pipeline.machines_output[cutting_machine.id])
+
+    pipeline.commit_decisions(model)
+    _, machines_output = pipeline.extend_conditions(
+        model, [Board(length=60, bad_parts=[], curved_parts=[])])
+    model.optimize()
+    assert model.Status == GRB.OPTIMAL
+    assert model.ObjVal >= first_objective
+    pieces = PieceBatch.from_piece_vars(model, machines_output[cutting_machine.id])
+    # The cuts of the first board were committed
+    assert list(pieces.lengths[:max_pieces_per_board]) == list(first_pieces.lengths)
+    assert sum(pieces.lengths[max_pieces_per_board:]) == 60
@@ -0,0 +1,96 @@
+"""Contains tests for reading solutions into piece and board batches."""
+
+from gurobipy import Model
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Objects.board import Board, BoardBatch
+from IncrementalPipeline.Objects.piece import Piece, PieceBatch
+from IncrementalPipeline.Tools.simple_computations import max_pieces_per_board
+from IncrementalPipeline.Tools.to_vars import to_vars
+
+
+def solved(model):
+    model.setParam('OutputFlag', 0)
+    model.optimize()
+    return model
+
+
+def test_batches_read_the_solution():
+    """
+    Tests that known items read back from a solution are the same,
+    also for slices of the batches.
+    """
+    model = Model()
+    boards = [Board(length=300, bad_parts=[(10, 20), (50, 60)], curved_parts=[]),
+              Board(length=200, bad_parts=[], curved_parts=[(5, 15)]),
+              Board(length=100, bad_parts=[(0, 5)], curved_parts=[])]
+    pieces = [Piece(length=40), Piece(length=20, good=False)]
+    board_vars = to_vars(boards, model, "A")
+    piece_vars = to_vars(pieces, model, "B")
+    solved(model)
+
+    board_batch = BoardBatch.from_board_vars(model, board_vars)
+    assert len(board_batch) == 3
+    assert [board.bad_parts for board in board_batch] == [[(10, 20), (50, 60)], [], [(0, 5)]]
+    assert board_batch[1].curved_parts == [(5, 15)]
+    sliced = board_batch[::2]
+    assert isinstance(sliced, BoardBatch)
+    assert [board.length for board in sliced] == [300, 100]
+    assert sliced[-1].bad_parts == [(0, 5)]
+
+    piece_batch = PieceBatch.from_piece_vars(model, piece_vars)
+    assert [(piece.length, piece.good) for piece in piece_batch] == [(40, True), (20, False)]
+    assert len(piece_batch[1:]) == 1
+
+
+def test_process_input_sends_outputs():
+    """
+    Tests that the outputs processed in a step are added
+    to the list of the next machine, which then takes out
+    the inputs it processed.
+    """
+    cutting_machine, filtering_machine = CuttingMachine(""), FilteringMachine("")
+    pipeline = Pipeline("batches_test", [cutting_machine, filtering_machine],
+                        machine_changes_per_step={
+                            cutting_machine.id: (1, max_pieces_per_board),
+                            filtering_machine.id: (max_pieces_per_board - 2, 2)})
+    pipeline.intermediate_lists[0] = [Board(length=300, bad_parts=[(100, 120)])]
+    model = Model()
+    _, machines_output = pipeline.impose_conditions(model)
+    solved(model)
+
+    pipeline.process_input(model, machines_output)
+    assert pipeline.intermediate_lists[0] == []
+    assert len(pipeline.intermediate_lists[1]) == 2
+    assert len(pipeline.intermediate_lists[2]) == 2
+    assert all(isinstance(piece, Piece)
+               for piece in pipeline.intermediate_lists[1] + pipeline.intermediate_lists[2])
+    assert isinstance(pipeline.intermediate_lists[1], PieceBatch)
+
+
+def test_batches_are_concatenated_and_imposed():
+    """
+    Tests that a batch added to a list or a batch keeps all items,
+    and that its variables are fixed to them, the known boards
+    being made only from their row.
+    """
+    boards = BoardBatch.from_boards([Board(length=300, bad_parts=[(10, 20)], curved_parts=[])])
+    boards = [Board(length=200, bad_parts=[], curved_parts=[(5, 15)])] + boards + boards
+    assert isinstance(boards, BoardBatch)
+    assert [board.length for board in boards] == [200, 300, 300]
+    assert boards[2].bad_parts == [(10, 20)]
+    pieces = PieceBatch([40], [True], ["a"]) + [Piece(length=20, good=False, id="b")]
+    assert [(piece.length, piece.good, piece.id) for piece in pieces] ==\
+        [(40, True, "a"), (20, False, "b")]
+
+    model = Model()
+    board_vars = to_vars(boards, model, "A", start_index=2)
+    piece_vars = to_vars(pieces, model, "B")
+    model.update()
+    assert [board_var.length.LB for board_var in board_vars] == [200, 300, 300]
+    assert [(start.UB, end.UB) for start, end in board_vars[1].bad_parts] == [(10, 20)]
+    assert board_vars[0].board.curved_parts == [(5, 15)]
+    assert [(piece_var.length.LB, piece_var.good.UB) for piece_var in piece_vars] ==\
+        [(40, 1), (20, 0)]
+    assert board_vars[0].id == "A board [2]"
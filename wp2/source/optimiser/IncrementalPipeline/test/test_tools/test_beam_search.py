@@ -0,0 +1,114 @@
+"""Contains tests for the beam search heuristic."""
+
+import pytest
+from gurobipy import Model
+from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
+from IncrementalPipeline.Machines.CompactFilteringMachine import CompactFilteringMachine
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.IncrementalMachine import IncrementalMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.beam_search import (
+    BeamSearchPlanner,
+    LayerRules,
+    set_plan_as_start
+)
+from IncrementalPipeline.Tools.simple_computations import (
+    layer_length,
+    max_pieces_per_board,
+    max_pieces_per_layer,
+    min_consecutive_distance,
+    compute_forbidden_zones
+)
+
+
+def test_layer_rules():
+    """
+    Tests that seams in forbidden zones, above the layer length
+    or too close to the seams of the layer below are rejected.
+    """
+    rules = LayerRules()
+    zone_start, zone_end = compute_forbidden_zones()[0]
+    assert rules.add(rules.start(), (zone_start + zone_end) / 2) is None
+    assert rules.add(rules.start(), layer_length + 1) is None
+
+    state = rules.add(rules.start(), zone_end)
+    state = rules.add(state, layer_length - zone_end)
+    state = rules.pad(state, max_pieces_per_layer - 2)
+    assert state is not None
+    assert rules.add(state, zone_end + min_consecutive_distance / 2) is None
+    assert rules.add(state, zone_end + min_consecutive_distance) is not None
+
+
+def test_incomplete_layer_closes_the_beam():
+    """
+    Tests that after a full incomplete layer only empty pieces are accepted.
+    """
+    rules = LayerRules()
+    state = rules.add(rules.start(), compute_forbidden_zones()[0][1])
+    state = rules.pad(state, max_pieces_per_layer - 1)
+    assert rules.stuck(state)
+    assert rules.add(state, 1) is None
+    assert rules.add(state, 0) is not None
+
+
+def test_plan_is_mip_start():
+    """
+    Tests that the plan is accepted by Gurobi as a solution
+    with the waste the plan computed.
+    """
+    pipeline = Pipeline("beam_search_test",
+                        [CuttingMachine(""),
+                         CompactFilteringMachine("", max_shift=2),
+                         CheckingMachine("")])
+    pipeline.intermediate_lists[0] = [Board(length=580, bad_parts=[[120, 135]])]
+    plan = BeamSearchPlanner().plan(pipeline)
+    assert len(plan.cuts[0]) == max_pieces_per_board - 1
+    assert plan.waste < 580
+
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    pipeline.impose_conditions(model)
+    set_plan_as_start(model, pipeline, plan)
+    model.setParam('SolutionLimit', 1)
+    model.setParam('Heuristics', 0)
+    model.optimize()
+    assert model.SolCount == 1
+    assert model.ObjVal == pytest.approx(plan.waste)
+
+
+def test_waiting_pieces_are_decided_first():
+    """
+    Tests that the pieces already waiting for the filtering machine
+    are the first inputs it decides on, and bad ones are dropped.
+    """
+    pipeline = Pipeline("beam_search_test",
+                        [CuttingMachine(""),
+                         FilteringMachine("")])
+    pipeline.intermediate_lists[0] = [Board(length=300)]
+    pipeline.intermediate_lists[1] = [Piece(length=200, good=False), Piece(length=100)]
+    plan = BeamSearchPlanner(beam_width=3).plan(pipeline)
+    assert plan.keep[:2] == [False, True]
+    assert plan.waste == 200
+    assert len(plan.keep) == 2 + max_pieces_per_board
+
+
+def test_unsupported_pipeline():
+    """
+    Tests that pipelines without a filtering machine and
+    non positive beam widths are rejected.
+    """
+    with pytest.raises(ValueError):
+        BeamSearchPlanner(beam_width=0)
+    pipeline = Pipeline("beam_search_test", [CuttingMachine("")])
+    with pytest.raises(ValueError):
+        BeamSearchPlanner().plan(pipeline)
+
+
+def test_plan_needs_new_models():
+    pipeline = Pipeline("beam_search_test", [FilteringMachine("beam_search_test")])
+    with pytest.raises(ValueError):
+        IncrementalMachine(pipeline, [], incremental_model=True,
+                           heuristic=BeamSearchPlanner())
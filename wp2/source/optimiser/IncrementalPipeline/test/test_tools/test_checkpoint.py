@@ -0,0 +1,76 @@
+"""Contains tests for the checkpoints of an IncrementalMachine."""
+
+import contextlib
+import io
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.IncrementalMachine import IncrementalMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.checkpoint import (
+    CheckpointWriter,
+    checkpoint_state,
+    read_checkpoint
+)
+
+boards = [Board(length=280, bad_parts=[(100, 120)], curved_parts=[]),
+          Board(length=200, bad_parts=[(10, 20)], curved_parts=[]),
+          Board(length=150, bad_parts=[], curved_parts=[])]
+
+
+def checkpoint_pipeline():
+    cutting_machine = CuttingMachine("checkpoint_test")
+    filtering_machine = FilteringMachine("checkpoint_test")
+    return Pipeline("checkpoint_test", [cutting_machine, filtering_machine],
+                    machine_changes_per_step={cutting_machine.id: (1, 3),
+                                              filtering_machine.id: (3, 3)})
+
+
+def test_state_round_trip(tmp_path):
+    pipeline = checkpoint_pipeline()
+    pipeline.intermediate_lists = [[boards[0]], [Piece(length=90, good=False, id="a")], []]
+    values = {("CuttingMachineCheckpoint_test", "cuts", 0, None, 1): 120.0,
+              ("FilteringMachineCheckpoint_test", "keep", 2, None, None): 1.0}
+    writer = CheckpointWriter(tmp_path / "state.json.gz")
+    writer.submit(checkpoint_state(pipeline, values, pipeline.machine_changes_per_step,
+                                   waste_produced=20, committed_waste=10, n_entered=4))
+    writer.close()
+    assert writer.n_written == 1
+
+    state = read_checkpoint(tmp_path / "state.json.gz")
+    board, = state["intermediate_lists"][0]
+    piece, = state["intermediate_lists"][1]
+    assert (board.length, board.bad_parts, board.curved_parts) == (280, [(100, 120)], [])
+    assert (piece.length, piece.good, piece.id) == (90, False, "a")
+    assert state["incumbent"] == values
+    assert state["machine_changes"] == pipeline.machine_changes_per_step
+    assert (state["waste_produced"], state["committed_waste"], state["n_entered"]) == (20, 10, 4)
+
+
+def test_restore_continues_the_run(tmp_path):
+    """
+    Tests that a run restored from the checkpoint of a run with the
+    first board only processes the other boards, from the saved state.
+    The models have one board each, to keep them small.
+    """
+    path = tmp_path / "run.json.gz"
+    pipeline = checkpoint_pipeline()
+    horizon = {pipeline.machines[0].id: 1}
+    first_run = IncrementalMachine(pipeline, boards[:1], horizon=horizon,
+                                   checkpoint_path=path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        first_waste = first_run.process(time_per_step=5)
+    assert first_run.checkpoint_writer.n_written >= 1
+    assert read_checkpoint(path)["n_entered"] == 1
+
+    pipeline = checkpoint_pipeline()
+    restored_run = IncrementalMachine(pipeline, boards, horizon=horizon)
+    restored_run.restore(path)
+    assert restored_run.waste_produced == first_waste
+    with contextlib.redirect_stdout(io.StringIO()):
+        waste = restored_run.process(time_per_step=5)
+    assert restored_run.restored_start is None
+    assert len(restored_run.step_reports) == 2
+    assert waste >= first_waste
+    assert pipeline.empty()
@@ -0,0 +1,36 @@
+"""Contains tests for the sequential decomposition of a pipeline."""
+
+import pytest
+from gurobipy import Model
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Tools.decomposition import solve_decomposed
+
+
+def decomposition_pipeline(candidate_cuts=True):
+    pipeline = Pipeline("decomposition_test", [
+        CuttingMachine("decomposition_test", candidate_cuts=candidate_cuts),
+        FilteringMachine("decomposition_test")])
+    pipeline.intermediate_lists[0] = [Board(length=200, bad_parts=[(60, 80)], curved_parts=[])]
+    return pipeline
+
+
+def test_same_waste_as_monolithic():
+    pipeline = decomposition_pipeline()
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    pipeline.impose_conditions(model)
+    model.optimize()
+
+    result = solve_decomposed(decomposition_pipeline(), time_limit=30)
+    assert result.status == "optimal"
+    assert result.waste == pytest.approx(model.ObjVal)
+    assert result.bound == pytest.approx(result.waste, abs=1e-3)
+    assert result.optimality_cuts >= 1
+
+
+def test_needs_candidate_cuts():
+    with pytest.raises(ValueError):
+        solve_decomposed(decomposition_pipeline(candidate_cuts=False), time_limit=5)
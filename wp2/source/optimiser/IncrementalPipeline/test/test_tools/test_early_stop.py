@@ -0,0 +1,96 @@
+"""Contains tests for the early stop policies."""
+
+import gc
+from gurobipy import GRB
+from IncrementalPipeline.Tools.early_stop import (
+    AnyPolicy,
+    GapTarget,
+    StallWindow,
+    StepDeadline
+)
+
+
+class FakeModel:
+    """
+    Stands for a model inside a MIP callback with the given values.
+    """
+
+    def __init__(self, incumbent=GRB.INFINITY, bound=0):
+        self.values = {GRB.Callback.MIP_OBJBST: incumbent,
+                       GRB.Callback.MIP_OBJBND: bound}
+        self.terminated = False
+
+    def cbGet(self, what):
+        return self.values[what]
+
+    def terminate(self):
+        self.terminated = True
+
+
+def test_gap_target():
+    """
+    Tests that the solve stops once the gap is below the target,
+    and that the trajectory is recorded.
+    """
+    policy = GapTarget(0.01)
+    model = FakeModel(bound=90)
+    policy.start(model)
+    policy(model, GRB.Callback.MIP)
+    model.values[GRB.Callback.MIP_OBJBST] = 100
+    policy(model, GRB.Callback.MIP)
+    assert not model.terminated
+    model.values[GRB.Callback.MIP_OBJBND] = 99.5
+    policy(model, GRB.Callback.MIP)
+    assert model.terminated
+    assert [point[1:] for point in policy.trajectory(model)] == \
+        [(GRB.INFINITY, 90), (100, 90), (100, 99.5)]
+
+
+def test_state_per_model():
+    """
+    Tests that two models solved with the same policy do not share state.
+    """
+    policy = StallWindow(window=5)
+    first, second = FakeModel(incumbent=100), FakeModel(incumbent=50)
+    policy.start(first, step_start=0)
+    policy.start(second)
+    policy(first, GRB.Callback.MIP)
+    policy(second, GRB.Callback.MIP)
+    assert policy._run(first).best == 100
+    assert policy._run(second).best == 50
+    assert len(policy.trajectory(first)) == 1
+
+
+def test_runs_are_dropped_with_the_model():
+    policy = StallWindow(window=5)
+    model = FakeModel(incumbent=100)
+    policy.start(model, step_start=0)
+    policy(model, GRB.Callback.MIP)
+    assert len(policy._runs) == 1
+    del model
+    gc.collect()
+    assert len(policy._runs) == 0
+    # A new model starts without the state of the old one
+    assert policy.trajectory(FakeModel()) == []
+
+
+def test_stall_window_and_deadline():
+    """
+    Tests that the stall window counts wall time since the last
+    improvement, and that the deadline counts from the step start.
+    """
+    policy = StallWindow(window=5)
+    model = FakeModel(incumbent=100)
+    policy.start(model)
+    policy(model, GRB.Callback.MIP)
+    assert not model.terminated
+    policy._run(model).last_improvement -= 10
+    policy(model, GRB.Callback.MIP)
+    assert model.terminated
+
+    policy = AnyPolicy(GapTarget(0.0001), StepDeadline(seconds=3))
+    model = FakeModel(incumbent=100)
+    policy.start(model, step_start=0)
+    policy(model, GRB.Callback.MIP)
+    assert model.terminated
+    assert "seconds of the step" in policy.stop_reason(model)
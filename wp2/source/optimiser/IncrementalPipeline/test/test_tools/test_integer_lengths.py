@@ -0,0 +1,55 @@
+"""Contains tests for the integer lengths of a pipeline model."""
+
+import pytest
+from gurobipy import GRB, Model
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.integer_lengths import length_unit
+from IncrementalPipeline.Tools.var_keys import get_var_keys
+
+config = {"BeamConfiguration": {"BeamLength": 500, "BeamSkipStart": 10, "BeamSkipEnd": 10,
+                                "MinLengthOfBoardInLayer": 50, "BoardMaxLength": 600,
+                                "GapToBoardAbutInConsecutiveLayers": 10,
+                                "MaxShiftCurvedCut": 50,
+                                "StaticForbiddenZones": [{"Begin": 90, "End": 110}]}}
+
+
+def test_length_unit():
+    assert length_unit([], config) == 10
+    assert length_unit([Board(length=280, bad_parts=[(100, 120)], curved_parts=[]),
+                        Piece(length=40)], config) == 10
+    assert length_unit([Board(length=285, bad_parts=[], curved_parts=[])], config) == 5
+    assert length_unit([Piece(length=40.5)], config) is None
+
+
+def solved_pipeline(unit):
+    pipeline = Pipeline("integer_lengths_test", [CuttingMachine("integer_lengths_test"),
+                                                 FilteringMachine("integer_lengths_test")])
+    pipeline.set_length_unit(unit)
+    pipeline.intermediate_lists[0] = [Board(length=120, bad_parts=[(60, 80)], curved_parts=[])]
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    pipeline.impose_conditions(model)
+    model.optimize()
+    return pipeline, model
+
+
+@pytest.mark.parametrize("unit", [1, 10])
+def test_integer_lengths(unit):
+    pipeline, model = solved_pipeline(unit)
+    # The bad part and the 40 after it, shorter than a piece
+    assert model.ObjVal == pytest.approx(60)
+    cuts = [var for key, var in get_var_keys(model).items() if key[1] == "cuts"]
+    for var in cuts:
+        assert var.X / unit == pytest.approx(round(var.X / unit))
+    if unit == 1:
+        assert {var.VType for var in cuts} == {GRB.INTEGER}
+
+
+def test_length_unit_must_be_positive():
+    pipeline = Pipeline("integer_lengths_test", [FilteringMachine("integer_lengths_test")])
+    with pytest.raises(ValueError):
+        pipeline.set_length_unit(0)
@@ -0,0 +1,81 @@
+"""Contains tests for the model templates of a pipeline."""
+
+import pytest
+from gurobipy import Model
+from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.model_cache import ModelTemplateCache
+from IncrementalPipeline.Tools.var_keys import get_var_keys
+
+
+def cache_pipeline():
+    return Pipeline("cache_test", [CuttingMachine("cache_test"),
+                                   FilteringMachine("cache_test")])
+
+
+def solved_objective(model):
+    model.setParam('OutputFlag', 0)
+    model.optimize()
+    return model.ObjVal
+
+
+def test_template_with_new_data():
+    """
+    Tests that the template of a structure, reused for other data,
+    has the objective of a model built for that data.
+    """
+    pipeline = Pipeline("cache_test", [FilteringMachine("cache_test")])
+    cache = ModelTemplateCache()
+    pipeline.intermediate_lists[0] = [Piece(length=50, good=False), Piece(length=80),
+                                      Piece(length=30, good=False)]
+    template, _, _ = cache.model(pipeline)
+    solved_objective(template)
+
+    pipeline.intermediate_lists[0] = [Piece(length=70), Piece(length=20, good=False),
+                                      Piece(length=90, good=False)]
+    reused, _, machines_output = cache.model(pipeline)
+    assert reused is template
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert machines_output == pipeline.machines_output
+
+    built = Model()
+    pipeline.impose_conditions(built)
+    assert solved_objective(reused) == pytest.approx(solved_objective(built))
+
+
+def test_board_data_updated():
+    pipeline = cache_pipeline()
+    cache = ModelTemplateCache()
+    pipeline.intermediate_lists[0] = [Board(length=280, bad_parts=[(100, 120)])]
+    cache.model(pipeline)
+    pipeline.intermediate_lists[0] = [Board(length=200, bad_parts=[(10, 30)])]
+    model, _, _ = cache.model(pipeline)
+    model.update()
+    keys = get_var_keys(model)
+    machine_id = pipeline.machines[0].id
+    for role, value in [("board_length", 200), ("bad_part_start", 10), ("bad_part_end", 30)]:
+        var = keys[(machine_id, role, 0, None, None if role == "board_length" else 0)]
+        assert (var.LB, var.UB) == (value, value)
+
+
+def test_least_recently_used_evicted():
+    pipeline = cache_pipeline()
+    cache = ModelTemplateCache(max_bytes=1)
+    pipeline.intermediate_lists[0] = [Board(length=200, bad_parts=[(10, 30)])]
+    first, _, _ = cache.model(pipeline)
+    # Another number of bad parts is another structure
+    pipeline.intermediate_lists[0] = [Board(length=200, bad_parts=[])]
+    second, _, _ = cache.model(pipeline)
+    assert second is not first
+    assert (cache.misses, cache.evictions, len(cache.templates)) == (2, 1, 1)
+    assert cache.size == next(iter(cache.templates.values())).size
+
+
+def test_no_templates_with_lazy_machines():
+    pipeline = Pipeline("cache_test", [CheckingMachine("cache_test", lazy=True)])
+    with pytest.raises(ValueError):
+        ModelTemplateCache().model(pipeline)
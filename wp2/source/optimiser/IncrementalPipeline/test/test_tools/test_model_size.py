@@ -0,0 +1,54 @@
+"""Contains tests for the build report of a pipeline."""
+
+from gurobipy import Model
+from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.IncrementalMachine import IncrementalMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.model_size import SIZE_KEYS, format_build_report, model_size
+
+
+def test_build_report_adds_up():
+    """
+    Tests that the sizes added by the machines add up to
+    the size of the model, also after extending it.
+    """
+    pipeline = Pipeline("model_size_test",
+                        [CuttingMachine(""), FilteringMachine(""), CheckingMachine("")])
+    pipeline.intermediate_lists[0] = [Board(length=300, bad_parts=[[100, 120]])]
+    model = Model()
+    pipeline.impose_conditions(model)
+    assert list(pipeline.build_report) == [machine.id for machine in pipeline.machines]
+    size = model_size(model)
+    for key in SIZE_KEYS:
+        assert sum(row[key] for row in pipeline.build_report.values()) == size[key]
+    assert pipeline.build_report["CuttingMachine"]["indicators"] > 0
+    assert pipeline.build_report["CheckingMachine"]["or"] > 0
+
+    pipeline.extend_conditions(model, [Board(length=200)])
+    new_size = model_size(model)
+    for key in SIZE_KEYS:
+        assert (sum(row[key] for row in pipeline.build_report.values())
+                == new_size[key] - size[key])
+
+
+def test_build_report_is_printed_with_the_outputs(capsys):
+    """
+    Tests that the build report of every solve is kept,
+    and only printed if the outputs are dumped.
+    """
+    for dump_outputs in [False, True]:
+        machine = FilteringMachine("model_size_test")
+        pipeline = Pipeline("model_size_test", [machine],
+                            machine_changes_per_step={machine.id: (1, 1)})
+        run = IncrementalMachine(pipeline, [Piece(length=100), Piece(length=20, good=0)],
+                                 incremental_model=True, dump_outputs=dump_outputs)
+        capsys.readouterr()
+        run.process(time_per_step=5)
+        printed = capsys.readouterr().out
+        assert run.step_reports
+        report = run.step_reports[0]
+        assert (format_build_report(report["build"], report["runtime"]) in printed) == dump_outputs
@@ -0,0 +1,63 @@
+"""Contains tests for the parallel solver portfolio."""
+
+import pytest
+from gurobipy import Model
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.IncrementalMachine import IncrementalMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.portfolio import (
+    PortfolioResult,
+    PortfolioStatistics,
+    solve_portfolio
+)
+from IncrementalPipeline.Tools.to_vars import to_vars
+
+
+def build_filtering_model(input_list):
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    machine = FilteringMachine(id="portfolio_test")
+    vars_input = to_vars(input_list, model, machine.id)
+    keep, _ = machine.impose_conditions(model, vars_input)
+    return model, keep
+
+
+def test_portfolio_loads_best_solution():
+    """
+    Tests that the solution of the portfolio is loaded into the model,
+    and has the optimal waste.
+    """
+    input_list = [Piece(length=100), Piece(length=20, good=0), Piece(length=300)]
+    model, keep = build_filtering_model(input_list)
+    portfolio = {"default": {"Seed": 0, "Threads": 1},
+                 "feasibility": {"Seed": 1, "MIPFocus": 1, "Threads": 1}}
+    result = solve_portfolio(model, time_limit=30, portfolio=portfolio,
+                             gap_target=1e-4)
+    assert result.winner in portfolio
+    assert set(result.runs) == set(portfolio)
+    assert result.objective == pytest.approx(20)
+    assert model.ObjVal == pytest.approx(20)
+    assert [round(keep[i].X) for i in range(3)] == [1, 0, 1]
+
+
+def test_statistics_prune():
+    """
+    Tests that configurations below the win rate are pruned,
+    and the best one is always kept.
+    """
+    portfolio = {"a": {}, "b": {}, "c": {}}
+    statistics = PortfolioStatistics()
+    for winner in ["a", "a", "a", "b"]:
+        statistics.record(PortfolioResult(winner, 0, [], dict()))
+    assert statistics.win_rates() == {"a": 0.75, "b": 0.25}
+    assert set(statistics.prune(portfolio, 0.5)) == {"a"}
+    assert set(statistics.prune(portfolio, 0.9)) == {"a"}
+    assert set(statistics.prune(portfolio, 0.1)) == {"a", "b"}
+
+
+def test_portfolio_needs_new_models():
+    pipeline = Pipeline("portfolio_test", [FilteringMachine("portfolio_test")])
+    with pytest.raises(ValueError):
+        IncrementalMachine(pipeline, [], incremental_model=True,
+                           portfolio={"default": {"Seed": 0}})
@@ -0,0 +1,70 @@
+"""Contains tests for the time budget of the steps."""
+
+import pytest
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Objects.board import Board
+from IncrementalPipeline.Tools.time_budget import TimeBudgetScheduler
+
+
+def budget_pipeline(n_boards):
+    cutting_machine = CuttingMachine("budget_test")
+    filtering_machine = FilteringMachine("budget_test")
+    pipeline = Pipeline("budget_test", [cutting_machine, filtering_machine],
+                        machine_changes_per_step={cutting_machine.id: (1, 3),
+                                                  filtering_machine.id: (3, 3)})
+    pipeline.intermediate_lists[0] = [Board(length=300)] * n_boards
+    return pipeline
+
+
+def test_time_follows_the_arrivals():
+    """
+    Tests that a step gets the time between two arrivals, less when
+    the boards queue up or the machines are about to wait, and that
+    the boards admitted fill the look-ahead.
+    """
+    scheduler = TimeBudgetScheduler(min_time=1, max_time=30, look_ahead=2)
+    # Nothing in the pipeline: the machines wait for the decision
+    decision = scheduler.decide(budget_pipeline(0), waiting=1, now=0)
+    assert (decision.time_limit, decision.boards) == (1, 1)
+    # One board every 4 seconds
+    decision = scheduler.decide(budget_pipeline(1), waiting=1, now=4)
+    assert decision.arrival_rate == pytest.approx(0.25)
+    assert (decision.time_limit, decision.boards) == (pytest.approx(4), 1)
+    # A burst of 8 boards, the rate goes up and the time is scaled down
+    decision = scheduler.decide(budget_pipeline(2), waiting=8, now=8)
+    assert decision.arrival_rate == pytest.approx(1.125)
+    assert (decision.time_limit, decision.boards) == (1, 0)
+
+
+def test_time_follows_the_gap():
+    """
+    Tests that a step gets more time after one which used all its time
+    far from the target gap, and less after one which reached it early.
+    """
+    scheduler = TimeBudgetScheduler(min_time=1, max_time=30, look_ahead=5,
+                                    target_gap=0.01)
+    pipeline = budget_pipeline(5)
+    # No arrival rate yet
+    decision = scheduler.decide(pipeline, waiting=1, now=0)
+    assert decision.time_limit == 30
+    scheduler.record(decision, time_used=3, gap=0)
+    # One board every 4 seconds
+    decision = scheduler.decide(pipeline, waiting=2, now=4)
+    assert decision.time_limit == pytest.approx(4)
+    scheduler.record(decision, time_used=4, gap=0.2)
+    decision = scheduler.decide(pipeline, waiting=3, now=8)
+    assert decision.time_limit == pytest.approx(6)
+    scheduler.record(decision, time_used=1, gap=0)
+    decision = scheduler.decide(pipeline, waiting=4, now=12)
+    assert decision.time_limit == pytest.approx(3)
+    assert scheduler.summary() == {"steps": 3, "granted": pytest.approx(40),
+                                   "used": 8, "overruns": 0}
+
+
+def test_look_ahead_within_horizon():
+    pipeline = budget_pipeline(0)
+    pipeline.set_horizon({pipeline.machines[0].id: 1})
+    decision = TimeBudgetScheduler(look_ahead=3).decide(pipeline, waiting=5, now=0)
+    assert decision.boards == 1
@@ -0,0 +1,75 @@
+"""Contains tests for the conversion of known boards and pieces to variables."""
+
+from gurobipy import Model
+from IncrementalPipeline.Objects.board import Board, create_board_vars, max_n_bad_parts
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.to_vars import to_vars
+from IncrementalPipeline.Tools.var_keys import get_var_keys
+
+
+def test_known_board_is_fixed():
+    """
+    Tests that a known board only gets fixed variables for the parts
+    it has, without any constraint.
+    """
+    model = Model()
+    board = Board(length=500, bad_parts=[(90, 100)], curved_parts=[])
+    board_vars, = to_vars([board], model, "A")
+    model.update()
+
+    assert model.NumConstrs == 0
+    assert model.NumGenConstrs == 0
+    assert len(board_vars.bad_parts) == 1
+    assert len(board_vars.curved_parts) == 0
+    start_var, end_var = board_vars.bad_parts[0]
+    assert (start_var.LB, start_var.UB) == (90, 90)
+    assert (end_var.LB, end_var.UB) == (100, 100)
+    assert (board_vars.length.LB, board_vars.length.UB) == (500, 500)
+
+
+def test_piece_vars_are_reused():
+    """
+    Tests that the outputs of a previous machine are used as they are,
+    and registered as inputs of the next machine.
+    """
+    model = Model()
+    piece_vars, = to_vars([Piece(length=60, good=False)], model, "A")
+    model.update()
+    assert (piece_vars.good.LB, piece_vars.good.UB) == (0, 0)
+
+    next_piece_vars, = to_vars([piece_vars], model, "B", start_index=3)
+    model.update()
+
+    assert next_piece_vars is piece_vars
+    assert model.NumVars == 2
+    assert get_var_keys(model)[("B", "piece_length", 3, None, None)] is piece_vars.length
+
+
+def test_mixed_lists_and_blocks():
+    """
+    Tests that the known items of a list mixed with outputs of a previous
+    machine keep their position and key, and that known and unknown boards
+    made in the same blocks get their own parts.
+    """
+    model = Model()
+    output_vars, = to_vars([Piece(length=30)], model, "A")
+    inputs = to_vars([Piece(length=10), output_vars, Piece(length=20, good=False)],
+                     model, "B", start_index=1)
+    model.update()
+    assert inputs[1] is output_vars
+    var_keys = get_var_keys(model)
+    assert var_keys[("B", "piece_length", 3, None, None)] is inputs[2].length
+    assert [piece_vars.length.LB for piece_vars in inputs] == [10, 30, 20]
+    assert inputs[2].good.UB == 0
+
+    known, unknown = create_board_vars(
+        model, ["known", "unknown"], keys=[("C", None, 0), ("C", None, 1)],
+        boards=[Board(length=300, bad_parts=[(10, 20)]), None])
+    model.update()
+    assert known.board is not None and unknown.board is None
+    assert len(known.curved_parts) == 0
+    assert [(var.LB, var.UB) for var in known.bad_parts[0]] == [(10, 10), (20, 20)]
+    assert len(unknown.bad_parts) == max_n_bad_parts
+    assert unknown.length.UB > 300
+    assert var_keys[("C", "bad_part_end", None, 1, max_n_bad_parts - 1)] \
+        is unknown.bad_parts[-1][1]
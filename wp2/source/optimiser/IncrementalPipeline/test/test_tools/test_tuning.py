@@ -0,0 +1,72 @@
+"""Contains tests for the tuned parameter profiles."""
+
+from gurobipy import GRB, Model
+from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
+from IncrementalPipeline.Machines.CuttingMachine import CuttingMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Tools.formulation import BIG_M
+from IncrementalPipeline.Tools.tuning import (
+    changed_parameters,
+    export_step_model,
+    load_profile,
+    pipeline_shape,
+    read_step_model,
+    save_profile
+)
+
+
+def test_pipeline_shape():
+    """
+    Tests that the shape depends on the machines, their formulation
+    and the configuration.
+    """
+    config = {"BeamConfiguration": {"BeamLength": 500}}
+    pipeline = Pipeline("tuning_test", [CuttingMachine("")])
+    shape = pipeline_shape(pipeline, config)
+    assert shape == pipeline_shape(Pipeline("other", [CuttingMachine("")]), config)
+    assert shape != pipeline_shape(pipeline, {"BeamConfiguration": {"BeamLength": 600}})
+    pipeline.set_formulation(BIG_M)
+    assert shape != pipeline_shape(pipeline, config)
+    assert shape != pipeline_shape(Pipeline("lazy", [CheckingMachine("", lazy=True)]), config)
+
+
+def test_profile_round_trip(tmp_path):
+    """
+    Tests that a saved profile is loaded into a model,
+    without the parameters decided by the caller,
+    and that the defaults are kept without profile.
+    """
+    tuned = Model()
+    tuned.setParam('MIPFocus', 1)
+    tuned.setParam('Heuristics', 0.2)
+    tuned.setParam('TimeLimit', 3)
+    parameters = changed_parameters(tuned)
+    assert set(parameters) == {"MIPFocus", "Heuristics"}
+    save_profile(parameters, "shape", {"machines": []}, tmp_path)
+
+    model = Model()
+    model.setParam('TimeLimit', 10)
+    assert load_profile(model, "shape", tmp_path)
+    assert model.Params.MIPFocus == 1
+    assert model.Params.Heuristics == 0.2
+    assert model.Params.TimeLimit == 10
+
+    other = Model()
+    assert not load_profile(other, "unknown", tmp_path)
+    assert other.Params.MIPFocus == 0
+
+
+def test_export_step_model(tmp_path):
+    """
+    Tests that an exported model is read back with its MIP start,
+    even if the names of its variables are not unique.
+    """
+    model = Model()
+    x = model.addVars(3, vtype=GRB.INTEGER, ub=5, name="same")
+    model.addConstr(x.sum() <= 7)
+    model.update()
+    model.setAttr("Start", list(x.values()), [1, 2, 3])
+    path = export_step_model(model, tmp_path, "step")
+    exported = read_step_model(path)
+    assert exported.NumVars == 3
+    assert exported.getAttr("Start", exported.getVars()) == [1, 2, 3]
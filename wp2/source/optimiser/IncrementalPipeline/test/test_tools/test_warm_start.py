@@ -0,0 +1,106 @@
+"""Contains tests for the structural warm start."""
+
+import contextlib
+import io
+from gurobipy import Model
+from IncrementalPipeline.Machines.CheckingMachine import CheckingMachine
+from IncrementalPipeline.Machines.FilteringMachine import FilteringMachine
+from IncrementalPipeline.Machines.IncrementalMachine import IncrementalMachine
+from IncrementalPipeline.Machines.Pipeline import Pipeline
+from IncrementalPipeline.Objects.piece import Piece
+from IncrementalPipeline.Tools.to_vars import to_vars
+from IncrementalPipeline.Tools.var_keys import get_var_keys, shift_key
+from IncrementalPipeline.Tools.warm_start import (
+    pool_values,
+    warm_start,
+    warm_start_from_pool
+)
+
+
+def build_filtering_model(input_list):
+    model = Model()
+    model.setParam('OutputFlag', 0)
+    machine = FilteringMachine(id="warm_start_test")
+    vars_input = to_vars(input_list, model, machine.id)
+    keep, _ = machine.impose_conditions(model, vars_input)
+    return model, keep
+
+
+def test_shift_key():
+    """
+    Tests that keys are shifted by the processed inputs and outputs,
+    and dropped when they refer to items that left the machine.
+    """
+    machine_changes = {"A": (1, 2)}
+    assert shift_key(("A", "keep", 3, None, None), machine_changes) == ("A", "keep", 2, None, None)
+    assert shift_key(("A", "x", 3, 2, 1), machine_changes) == ("A", "x", 2, 0, 1)
+    assert shift_key(("A", "x", 0, 5, None), machine_changes) is None
+    assert shift_key(("B", "x", 0, 0, None), machine_changes) == ("B", "x", 0, 0, None)
+
+
+def test_warm_start_shifts_solution():
+    """
+    Tests that the solution of the previous model is used as start
+    of the new model once the first piece has been processed.
+    """
+    previous_model, previous_keep = build_filtering_model(
+        [Piece(length=100), Piece(length=20, good=0), Piece(length=300)])
+    previous_model.optimize()
+    assert previous_model.status == 2  # GRB.OPTIMAL
+
+    new_model, new_keep = build_filtering_model(
+        [Piece(length=20, good=0), Piece(length=300)])
+    warm_start(new_model, previous_model,
+               {"FilteringMachinewarm_start_test": (1, 1)})
+    new_model.update()
+    for i in range(2):
+        assert new_keep[i].Start == round(previous_keep[i + 1].X)
+
+
+def test_warm_start_from_pool():
+    """
+    Tests that the best solutions of the pool of the previous model
+    are the MIP starts of the new model, in order, once shifted.
+    """
+    previous_model, _ = build_filtering_model(
+        [Piece(length=100), Piece(length=20, good=0), Piece(length=300)])
+    # Every keep decision is feasible, the pool gets all of them
+    previous_model.setParam('PoolSearchMode', 2)
+    previous_model.optimize()
+    pool = pool_values(previous_model, 3)
+    assert len(pool) == 3
+    assert pool[0] == {key: round(var.X) for key, var in get_var_keys(previous_model).items()}
+
+    new_model, new_keep = build_filtering_model(
+        [Piece(length=20, good=0), Piece(length=300)])
+    machine_changes = {"FilteringMachinewarm_start_test": (1, 1)}
+    assert warm_start_from_pool(new_model, pool, machine_changes) == 3
+    assert new_model.NumStart == 3
+    keep_key = ("FilteringMachinewarm_start_test", "keep")
+    for start_number, values in enumerate(pool):
+        new_model.Params.StartNumber = start_number
+        assert [new_keep[i].Start for i in range(2)] ==\
+            [values[keep_key + (i + 1, None, None)] for i in range(2)]
+
+    assert pool_values(new_model, 3) == []
+    assert warm_start_from_pool(new_model, [], machine_changes) == 0
+
+
+def test_pool_starts_of_the_live_model():
+    """
+    Tests that the pool of the live model is set as starts of the
+    extended model, whose checking machine replaces the variables
+    of its last layer.
+    """
+    filtering_machine = FilteringMachine("pool_test")
+    checking_machine = CheckingMachine("pool_test")
+    pipeline = Pipeline("pool_test", [filtering_machine, checking_machine],
+                        machine_changes_per_step={filtering_machine.id: (1, 1),
+                                                  checking_machine.id: (1, 0)})
+    pieces = [Piece(length=200), Piece(length=30, good=0), Piece(length=250), Piece(length=150)]
+    run = IncrementalMachine(pipeline, pieces, incremental_model=True, pool_starts=3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        run.process(time_per_step=5)
+    assert len(run.step_reports) >= 2
+    assert run.live_pool
+    assert len(run.live_pool) <= 3
@@ -1,3 +1,7 @@
+import hashlib
+import json
+import sys
+from pathlib import Path
 from gurobipy import Model, GRB
 from cut import cut
 from filter import filter
@@ -5,6 +9,17 @@ from check import ensure_correct_beam
 from reorder import reorder
 import config
 
+# Tuned parameters for this model and configuration,
+# written by running: python optimise.py --tune
+configuration = {name: value for name, value in vars(config).items()
+                 if not name.startswith("_")
+                 and isinstance(value, (int, float, str, list, tuple, dict))}
+shape = hashlib.sha256(json.dumps(
+    {"machines": ["cut", "filter", "reorder", "reorder", "check"],
+     "configuration": configuration},
+    sort_keys=True).encode()).hexdigest()[:16]
+profile = Path(__file__).parent / "tuned_profiles" / f"{shape}.prm"
+
 model = Model("BeamCutting")
 # Configure the model
 model.setParam("TimeLimit", 10)     # Fallback time limit
@@ -39,6 +54,18 @@ ensure_correct_beam(list(reordered2.values()),
                     model,
                     config.global_danger)
 
+if "--tune" in sys.argv:
+    model.setParam("TuneTimeLimit", 300)
+    model.tune()
+    if model.TuneResultCount > 0:
+        model.getTuneResult(0)
+        profile.parent.mkdir(exist_ok=True)
+        model.write(str(profile))
+        print(f"Tuned parameters stored in {profile}")
+elif profile.exists():
+    # Otherwise the parameters above are kept
+    model.read(str(profile))
+
 model.optimize()
 
 if model.Status == 4:  # GRB.INFEASIBLE